@@ -0,0 +1 @@
+"""End-to-end benchmarks: run with python -m benchmarks.run from the repository root."""
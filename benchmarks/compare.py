@@ -0,0 +1,72 @@
+import sys
+import json
+import argparse
+from typing import Any, Dict, List, Tuple
+
+# Metrics compared between runs and whether a higher value is better.
+COMPARED_METRICS = {
+    "throughput.statements_per_second": True,
+    "throughput.rows_per_second": True,
+    "run_seconds.p50": False,
+    "run_seconds.p95": False,
+    "memory.peak_traced_mb": False,
+}
+STAGE_PERCENTILES = ("p50", "p95", "p99")
+
+
+def _flatten(results: Dict[str, Any]) -> Dict[str, float]:
+    values = {}
+    for name in COMPARED_METRICS:
+        section, key = name.split(".")
+        value = results.get(section, {}).get(key)
+        if value is not None:
+            values[name] = value
+    for stage, stats in results.get("stages", {}).items():
+        for pct in STAGE_PERCENTILES:
+            values[f"stages.{stage}.{pct}"] = stats[pct]
+    return values
+
+
+def compare(baseline: Dict[str, Any], current: Dict[str, Any], tolerance: float) -> Tuple[List[str], List[str]]:
+    """
+    Compare two result files metric by metric.
+
+    Returns:
+        Tuple[List[str], List[str]]: Report lines, and the names of metrics that got worse
+        by more than tolerance (a fraction, e.g. 0.1 for 10%).
+    """
+    before = _flatten(baseline)
+    after = _flatten(current)
+    lines = [f"{'metric':<40} {'baseline':>12} {'current':>12} {'change':>8}"]
+    regressions = []
+    for name in sorted(set(before) & set(after)):
+        old, new = before[name], after[name]
+        change = (new - old) / old if old else 0.0
+        higher_is_better = COMPARED_METRICS.get(name, False)
+        worse = -change if higher_is_better else change
+        flag = ""
+        if worse > tolerance:
+            regressions.append(name)
+            flag = "  REGRESSION"
+        lines.append(f"{name:<40} {old:>12.4f} {new:>12.4f} {change:>+8.1%}{flag}")
+    return lines, regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Compare two benchmark result files.")
+    parser.add_argument("baseline")
+    parser.add_argument("current")
+    parser.add_argument("--tolerance", type=float, default=0.1, help="Allowed relative regression (default 0.1).")
+    args = parser.parse_args()
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.current) as f:
+        current = json.load(f)
+    print(f"baseline {baseline.get('commit')} vs current {current.get('commit')}")
+    lines, regressions = compare(baseline, current, args.tolerance)
+    print("\n".join(lines))
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
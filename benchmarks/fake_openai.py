@@ -0,0 +1,99 @@
+import json
+import time
+import random
+import logging
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+from .schema import BenchSchema, generate_statements
+
+
+class FakeOpenAI:
+    def __init__(self, schema: BenchSchema, latency: float = 0.0, statements: int = 10, canned: Optional[str] = None, seed: int = 0) -> None:
+        """
+        Local stand-in for the OpenAI chat completions endpoint.
+
+        Each completion waits latency seconds and returns either the canned content or a
+        Python list of statements generated for the benchmark schema. Streaming requests
+        receive the same content as server-sent events, split into small deltas.
+
+        Args:
+            schema (BenchSchema): Schema to generate statements for.
+            latency (float): Seconds before the first byte of every response.
+            statements (int): Statements per templated completion.
+            canned (Optional[str]): Fixed completion content instead of templated statements.
+            seed (int): Seed for templated statements.
+        """
+        self.schema = schema
+        self.latency = latency
+        self.statements = statements
+        self.canned = canned
+        self.rng = random.Random(seed)
+        self.requests = 0
+        self._lock = threading.Lock()
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def api_base(self) -> str:
+        return f"http://127.0.0.1:{self._server.server_address[1]}/v1"
+
+    def completion(self) -> str:
+        if self.canned is not None:
+            return self.canned
+        with self._lock:
+            statements = generate_statements(self.schema, self.statements, self.rng)
+        return repr(statements)
+
+    def start(self) -> None:
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self) -> None:
+                body = json.loads(self.rfile.read(int(self.headers.get("Content-Length") or 0)) or b"{}")
+                with fake._lock:
+                    fake.requests += 1
+                time.sleep(fake.latency)
+                if body.get("stream"):
+                    self._stream(fake.completion())
+                    return
+                choices = [
+                    {"index": i, "message": {"role": "assistant", "content": fake.completion()}, "finish_reason": "stop"}
+                    for i in range(body.get("n") or 1)
+                ]
+                self._json({"id": "bench", "object": "chat.completion", "model": body.get("model"), "choices": choices})
+
+            def _json(self, payload: dict) -> None:
+                data = json.dumps(payload).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def _stream(self, content: str) -> None:
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.end_headers()
+                for i in range(0, len(content), 16):
+                    chunk = {
+                        "id": "bench",
+                        "object": "chat.completion.chunk",
+                        "choices": [{"index": 0, "delta": {"content": content[i:i + 16]}, "finish_reason": None}],
+                    }
+                    self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+                self.wfile.write(b"data: [DONE]\n\n")
+
+            def log_message(self, format: str, *args) -> None:
+                logging.debug(f"Fake OpenAI request: {format % args}")
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, name="fake-openai", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
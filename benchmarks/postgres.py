@@ -0,0 +1,117 @@
+import os
+import shutil
+import socket
+import tempfile
+import subprocess
+from contextlib import closing, contextmanager
+from typing import Dict, List, Optional
+from urllib.parse import urlparse
+import psycopg2
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _pg_bin(name: str) -> str:
+    """Locate a Postgres server binary via PG_BIN, PATH or pg_config --bindir."""
+    candidates = []
+    if os.getenv("PG_BIN"):
+        candidates.append(os.path.join(os.environ["PG_BIN"], name))
+    found = shutil.which(name)
+    if found:
+        candidates.append(found)
+    pg_config = shutil.which("pg_config")
+    if pg_config:
+        bindir = subprocess.run([pg_config, "--bindir"], capture_output=True, text=True).stdout.strip()
+        candidates.append(os.path.join(bindir, name))
+    for candidate in candidates:
+        if os.path.exists(candidate):
+            return candidate
+    raise RuntimeError(f"Could not find {name}; install Postgres, set PG_BIN, or point BENCH_DSN at a server.")
+
+
+class ThrowawayPostgres:
+    def __init__(self, dsn: Optional[str] = None) -> None:
+        """
+        A scratch database for one benchmark run.
+
+        With a DSN (or BENCH_DSN) a fresh database is created on that server and dropped
+        afterwards. Otherwise a private cluster is created with initdb in a temporary
+        directory, started with pg_ctl on a free port with fsync off, and removed on stop.
+        """
+        self.dsn = dsn or os.getenv("BENCH_DSN")
+        self.database = f"synpg_bench_{os.getpid()}"
+        self.host = "127.0.0.1"
+        self.port = 5432
+        self.user = "postgres"
+        self.password = "bench"
+        self._datadir: Optional[str] = None
+
+    def start(self) -> None:
+        if self.dsn:
+            url = urlparse(self.dsn)
+            self.host = url.hostname or "localhost"
+            self.port = url.port or 5432
+            self.user = url.username or "postgres"
+            self.password = url.password or "bench"
+        else:
+            self._datadir = tempfile.mkdtemp(prefix="synpg-bench-")
+            self.port = _free_port()
+            subprocess.run(
+                [_pg_bin("initdb"), "-D", self._datadir, "-U", self.user, "--auth=trust", "-E", "UTF8"],
+                check=True, capture_output=True,
+            )
+            options = f"-p {self.port} -k {self._datadir} -c listen_addresses=127.0.0.1 -c fsync=off -c synchronous_commit=off"
+            subprocess.run(
+                [_pg_bin("pg_ctl"), "-D", self._datadir, "-o", options, "-l", os.path.join(self._datadir, "server.log"), "-w", "start"],
+                check=True, capture_output=True,
+            )
+        with self._admin() as conn, conn.cursor() as cur:
+            cur.execute(f'DROP DATABASE IF EXISTS "{self.database}";')
+            cur.execute(f'CREATE DATABASE "{self.database}";')
+
+    def load(self, ddl: List[str]) -> None:
+        with closing(psycopg2.connect(**self.params())) as conn:
+            with conn.cursor() as cur:
+                for statement in ddl:
+                    cur.execute(statement)
+            conn.commit()
+
+    def params(self) -> Dict[str, object]:
+        return {"host": self.host, "port": self.port, "user": self.user, "password": self.password, "database": self.database}
+
+    def env(self) -> Dict[str, str]:
+        """POSTGRES_* settings that point Database at the scratch database."""
+        return {
+            "POSTGRES_HOST": self.host,
+            "POSTGRES_PORT": str(self.port),
+            "POSTGRES_USER": self.user,
+            "POSTGRES_PASSWORD": self.password,
+            "POSTGRES_DB": self.database,
+        }
+
+    def stop(self) -> None:
+        try:
+            with self._admin() as conn, conn.cursor() as cur:
+                cur.execute(
+                    "SELECT pg_terminate_backend(pid) FROM pg_stat_activity WHERE datname = %s AND pid <> pg_backend_pid();",
+                    (self.database,),
+                )
+                cur.execute(f'DROP DATABASE IF EXISTS "{self.database}";')
+        finally:
+            if self._datadir is not None:
+                subprocess.run([_pg_bin("pg_ctl"), "-D", self._datadir, "-m", "fast", "-w", "stop"], capture_output=True)
+                shutil.rmtree(self._datadir, ignore_errors=True)
+                self._datadir = None
+
+    @contextmanager
+    def _admin(self):
+        conn = psycopg2.connect(host=self.host, port=self.port, user=self.user, password=self.password, database="postgres")
+        conn.autocommit = True
+        try:
+            yield conn
+        finally:
+            conn.close()
@@ -0,0 +1,178 @@
+import os
+import sys
+import json
+import time
+import random
+import logging
+import argparse
+import platform
+import resource
+import subprocess
+import tracemalloc
+from datetime import datetime, timezone
+from typing import Any, Dict, List
+from .schema import generate_schema
+from .fake_openai import FakeOpenAI
+from .postgres import ThrowawayPostgres
+from .compare import compare
+
+
+def git_revision() -> Dict[str, Any]:
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], cwd=root, capture_output=True, text=True, check=True).stdout.strip()
+        dirty = bool(subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=root, capture_output=True, text=True).stdout.strip())
+    except (OSError, subprocess.CalledProcessError):
+        return {"commit": None, "dirty": None}
+    return {"commit": commit, "dirty": dirty}
+
+
+def summarize(values: List[float]) -> Dict[str, float]:
+    from src.workers import percentile
+
+    return {
+        "count": len(values),
+        "mean": sum(values) / len(values) if values else 0.0,
+        "p50": percentile(values, 50),
+        "p95": percentile(values, 95),
+        "p99": percentile(values, 99),
+    }
+
+
+def parse_args(argv: List[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="End-to-end DataGenerator benchmark against a fake LLM and a scratch Postgres.")
+    parser.add_argument("--tables", type=int, default=20, help="Tables in the generated schema.")
+    parser.add_argument("--columns", type=int, default=8, help="Columns per table.")
+    parser.add_argument("--views", type=int, default=5, help="Views in the generated schema.")
+    parser.add_argument("--fk-ratio", type=float, default=0.5, help="Share of tables with a foreign key.")
+    parser.add_argument("--seed-rows", type=int, default=1000, help="Rows loaded into every table before the benchmark.")
+    parser.add_argument("--runs", type=int, default=20, help="Timed runs of generate_and_run_queries.")
+    parser.add_argument("--warmup", type=int, default=2, help="Untimed runs before measuring.")
+    parser.add_argument("--llm-latency", type=float, default=0.0, help="Seconds the fake LLM waits per request.")
+    parser.add_argument("--statements", type=int, default=10, help="Statements per fake completion.")
+    parser.add_argument("--canned", help="File whose content is returned as every completion instead of templated statements.")
+    parser.add_argument("--cold", action="store_true", help="Clear the schema cache before every run to measure introspection.")
+    parser.add_argument("--env", action="append", default=[], metavar="KEY=VALUE", help="Extra settings, e.g. --env GENERATION_MODE=template.")
+    parser.add_argument("--output", help="Write the JSON results to this file.")
+    parser.add_argument("--compare", metavar="BASELINE", help="Compare against an earlier results file and exit 1 on regressions.")
+    parser.add_argument("--tolerance", type=float, default=0.1, help="Allowed relative regression for --compare.")
+    parser.add_argument("--log-level", default="WARNING", help="Log level while benchmarking.")
+    return parser.parse_args(argv)
+
+
+def run(args: argparse.Namespace) -> Dict[str, Any]:
+    schema = generate_schema(args.tables, args.columns, args.fk_ratio, args.views)
+    canned = None
+    if args.canned:
+        with open(args.canned) as f:
+            canned = f.read()
+    postgres = ThrowawayPostgres()
+    fake = FakeOpenAI(schema, args.llm_latency, args.statements, canned)
+    postgres.start()
+    try:
+        postgres.load(schema.ddl())
+        fake.start()
+        settings = dict(postgres.env(), OPENAI_API_KEY="bench", SCHEMA_CACHE_PATH="", TEMPLATE_LIBRARY_PATH="")
+        settings.update(item.split("=", 1) for item in args.env)
+        os.environ.update(settings)
+
+        import openai
+        from src.db import Database
+        from src.data_generator import DataGenerator
+        from src.metrics import ROWS_LOADED, STAGE_LATENCY, STATEMENTS_EXECUTED, STATEMENTS_FAILED
+
+        openai.api_base = fake.api_base
+        logging.getLogger().setLevel(args.log_level)
+        stages: Dict[str, List[float]] = {}
+        observe = STAGE_LATENCY.observe
+
+        def record(value: float, **labels: str) -> None:
+            stages.setdefault(labels["stage"], []).append(value)
+            observe(value, **labels)
+
+        db = Database()
+        generator = DataGenerator(db)
+        if args.seed_rows:
+            db.connect()
+            generator.schema_cache.refresh(db)
+            generator.native_rows = args.seed_rows
+            generator.load_native_rows()
+            generator.native_rows = int(os.getenv("NATIVE_ROWS_PER_TABLE") or "1000")
+            db.close()
+        for _ in range(args.warmup):
+            generator.generate_and_run_queries()
+
+        STAGE_LATENCY.observe = record
+        executed, failed, rows = STATEMENTS_EXECUTED.total(), STATEMENTS_FAILED.total(), ROWS_LOADED.total()
+        requests = fake.requests
+        run_seconds = []
+        tracemalloc.start()
+        start = time.perf_counter()
+        for _ in range(args.runs):
+            if args.cold:
+                generator.schema_cache.clear()
+            run_start = time.perf_counter()
+            generator.generate_and_run_queries()
+            run_seconds.append(time.perf_counter() - run_start)
+        elapsed = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        STAGE_LATENCY.observe = observe
+        generator.stop()
+        db.close_pool()
+
+        executed = STATEMENTS_EXECUTED.total() - executed
+        failed = STATEMENTS_FAILED.total() - failed
+        rows = ROWS_LOADED.total() - rows
+        return {
+            **git_revision(),
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "config": {key: value for key, value in vars(args).items() if key not in ("output", "compare")},
+            "settings": {key: value for key, value in settings.items() if not key.startswith(("POSTGRES_", "OPENAI_"))},
+            "totals": {
+                "runs": args.runs,
+                "elapsed_seconds": elapsed,
+                "statements_executed": executed,
+                "statements_failed": failed,
+                "rows_loaded": rows,
+                "llm_requests": fake.requests - requests,
+            },
+            "throughput": {
+                "statements_per_second": (executed + failed) / elapsed if elapsed else 0.0,
+                "rows_per_second": rows / elapsed if elapsed else 0.0,
+            },
+            "run_seconds": summarize(run_seconds),
+            "stages": {stage: summarize(values) for stage, values in sorted(stages.items())},
+            "memory": {
+                "peak_traced_mb": peak / 2 ** 20,
+                "max_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+            },
+        }
+    finally:
+        fake.stop()
+        postgres.stop()
+
+
+def main(argv: List[str]) -> int:
+    args = parse_args(argv)
+    random.seed(0)
+    results = run(args)
+    text = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    print(text)
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        lines, regressions = compare(baseline, results, args.tolerance)
+        print("\n".join(lines))
+        if regressions:
+            print(f"{len(regressions)} metrics regressed by more than {args.tolerance:.0%}.")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
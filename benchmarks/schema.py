@@ -0,0 +1,84 @@
+import random
+from dataclasses import dataclass, field
+from typing import List, Optional, Tuple
+
+COLUMN_TYPES = ("integer", "text", "numeric(10,2)", "timestamp", "boolean", "varchar(40)")
+
+
+@dataclass
+class BenchTable:
+    name: str
+    columns: List[Tuple[str, str]]
+    parent: Optional[str] = None
+
+    def ddl(self) -> str:
+        lines = ["id serial PRIMARY KEY"]
+        if self.parent is not None:
+            lines.append(f"{self.parent}_id integer REFERENCES {self.parent} (id) ON DELETE CASCADE")
+        lines.extend(f"{name} {data_type}" for name, data_type in self.columns)
+        return f"CREATE TABLE {self.name} (\n    " + ",\n    ".join(lines) + "\n);"
+
+
+@dataclass
+class BenchSchema:
+    tables: List[BenchTable]
+    views: List[str] = field(default_factory=list)
+
+    def ddl(self) -> List[str]:
+        return [table.ddl() for table in self.tables] + self.views
+
+
+def generate_schema(tables: int, columns: int, fk_ratio: float = 0.5, views: int = 0, seed: int = 0) -> BenchSchema:
+    """
+    Build a synthetic schema: tables t000..tNNN with a serial key, typed columns and,
+    for about fk_ratio of them, a foreign key to an earlier table.
+    """
+    rng = random.Random(seed)
+    result = []
+    for i in range(tables):
+        parent = result[rng.randrange(i)].name if i and rng.random() < fk_ratio else None
+        table_columns = [(f"c{j:02d}", COLUMN_TYPES[(i + j) % len(COLUMN_TYPES)]) for j in range(columns)]
+        result.append(BenchTable(f"t{i:03d}", table_columns, parent))
+    view_ddl = [
+        f"CREATE VIEW v{k:03d} AS SELECT * FROM {result[k % tables].name} WHERE id % 2 = 0;"
+        for k in range(views if tables else 0)
+    ]
+    return BenchSchema(result, view_ddl)
+
+
+def sample_value(data_type: str, rng: random.Random) -> str:
+    """A SQL literal for a column of the given benchmark type."""
+    if data_type == "integer":
+        return str(rng.randint(1, 1_000_000))
+    if data_type.startswith("numeric"):
+        return f"{rng.uniform(0, 10_000):.2f}"
+    if data_type == "timestamp":
+        return f"'2024-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d} {rng.randint(0, 23):02d}:00:00'"
+    if data_type == "boolean":
+        return rng.choice(("TRUE", "FALSE"))
+    return f"'value {rng.randint(1, 1_000_000)}'"
+
+
+def generate_statements(schema: BenchSchema, count: int, rng: random.Random) -> List[str]:
+    """
+    Statements in the shape the prompt asks the LLM for: 50% INSERTs, 30% UPDATEs and
+    20% DELETEs, with random-row subqueries for targets and foreign keys.
+    """
+    statements = []
+    for _ in range(count):
+        table = rng.choice(schema.tables)
+        roll = rng.random()
+        random_row = f"(SELECT id FROM {table.name} ORDER BY RANDOM() LIMIT 1)"
+        if roll < 0.5 or not table.columns:
+            names = [name for name, _ in table.columns]
+            values = [sample_value(data_type, rng) for _, data_type in table.columns]
+            if table.parent is not None:
+                names.append(f"{table.parent}_id")
+                values.append(f"(SELECT id FROM {table.parent} ORDER BY RANDOM() LIMIT 1)")
+            statements.append(f"INSERT INTO {table.name} ({', '.join(names)}) VALUES ({', '.join(values)});")
+        elif roll < 0.8:
+            name, data_type = rng.choice(table.columns)
+            statements.append(f"UPDATE {table.name} SET {name} = {sample_value(data_type, rng)} WHERE id = {random_row};")
+        else:
+            statements.append(f"DELETE FROM {table.name} WHERE id = {random_row};")
+    return statements
@@ -1,31 +1,86 @@
-import signal
 import sys
-from src import Scheduler
+import signal
+import argparse
+import threading
+from src import Database, Scheduler
 from src.connection_tester import test_db_connection
+from src.backfill import Backfill, parse_time
+from src.journal import JournalReplayer
+from src.logging_setup import configure_logging
+from src.service import Service
 
-def signal_handler(sig, frame):
-    print("\nStopping the scheduler...")
-    scheduler.stop()
-    print("Scheduler stopped successfully.")
-    sys.exit(0)
 
-if __name__ == "__main__":
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description="Generate synthetic load against a PostgreSQL database.")
+    commands = parser.add_subparsers(dest="command")
+    commands.add_parser("run", help="Generate and execute statements on the schedule (default).")
+    replay = commands.add_parser("replay", help="Re-execute a recorded journal without calling the LLM.")
+    replay.add_argument("journal", help="Journal segment file or JOURNAL_DIR directory.")
+    replay.add_argument("--speed", help="1 for real time, N (or Nx) for N times faster, max for no pacing. Defaults to REPLAY_SPEED or 1.")
+    replay.add_argument("--concurrency", type=int, help="Worker connections. Defaults to REPLAY_CONCURRENCY or 1.")
+    replay.add_argument("--include-failed", action="store_true", help="Also replay statements that failed when recorded.")
+    backfill = commands.add_parser("backfill", help="Bulk load historical rows spread over a time range.")
+    backfill.add_argument("--start", required=True, type=parse_time, help="Start of the history, e.g. 2024-01-01.")
+    backfill.add_argument("--end", required=True, type=parse_time, help="End of the history (exclusive).")
+    backfill.add_argument("--rows", required=True, type=int, help="Rows per table over the whole range.")
+    backfill.add_argument("--chunk-hours", type=float, help="Time window loaded per chunk. Defaults to BACKFILL_CHUNK_HOURS or 24.")
+    backfill.add_argument("--workers", type=int, help="Chunks loaded in parallel. Defaults to BACKFILL_WORKERS or 4.")
+    backfill.add_argument("--checkpoint", help="Progress file used to resume. Defaults to BACKFILL_CHECKPOINT.")
+    backfill.add_argument("--tables", help="Comma-separated tables to backfill instead of all of them.")
+    return parser.parse_args(argv)
+
+
+def stop_on_signal() -> threading.Event:
+    stop_event = threading.Event()
+    signal.signal(signal.SIGINT, lambda signum, frame: stop_event.set())
+    signal.signal(signal.SIGTERM, lambda signum, frame: stop_event.set())
+    return stop_event
+
+
+def run() -> int:
+    scheduler = Scheduler()
     try:
         print("Testing database connection...")
-        test_db_connection()
+        for db in scheduler.databases:
+            test_db_connection(db)
     except ConnectionError as e:
         print(e)
-        sys.exit(1)
+        return 1
 
-    scheduler = Scheduler()
-    signal.signal(signal.SIGINT, signal_handler)
-    signal.signal(signal.SIGTERM, signal_handler)
+    service = Service(scheduler)
+    service.install_signal_handlers()
+    print("Starting the scheduler... Press Ctrl+C to stop.")
+    return service.run()
+
+
+def replay(args) -> int:
+    db = Database()
+    replayer = JournalReplayer(db, speed=args.speed, concurrency=args.concurrency, include_failed=args.include_failed)
+    stop_event = stop_on_signal()
+    print(f"Replaying {args.journal}... Press Ctrl+C to stop.")
+    try:
+        report = replayer.replay(args.journal, stop_event)
+    finally:
+        db.close_pool()
+    print(f"Replayed {report.summary()}.")
+    return 0
+
+
+def backfill(args) -> int:
+    db = Database()
+    job = Backfill(db, args.start, args.end, args.rows, args.chunk_hours, args.workers, args.checkpoint)
+    stop_event = stop_on_signal()
+    print(f"Backfilling {args.start} to {args.end}... Press Ctrl+C to stop after the running chunks.")
     try:
-        print("Starting the scheduler...")
-        scheduler.start()
-        print("Scheduler is running. Press Ctrl+C to stop.")
-        while True:
-            pass
-    except Exception as e:
-        print(f"An error occurred: {e}")
-        scheduler.stop()
\ No newline at end of file
+        rows = job.run(stop_event, args.tables.split(",") if args.tables else None)
+    finally:
+        db.close_pool()
+    print(f"Backfilled {rows} rows.")
+    return 1 if stop_event.is_set() else 0
+
+
+if __name__ == "__main__":
+    args = parse_args(sys.argv[1:])
+    configure_logging()
+    commands = {"replay": replay, "backfill": backfill}
+    sys.exit(commands[args.command](args) if args.command in commands else run())
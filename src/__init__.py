@@ -2,4 +2,24 @@ from .scheduler import Scheduler
 from .db import Database
 from .gpt import GPTQueryGenerator
 from .data_generator import DataGenerator
+from .schema_cache import SchemaCache
+from .executor import QueryExecutor, QueryResult
+from .prepared import PreparedStatementCache
+from .templates import QueryTemplate, TemplateLibrary
+from .row_generator import RowGenerator
+from .foreign_keys import ForeignKeyGraph, KeyPool, KeyPoolRegistry
+from .target_selection import TargetSelector
+from .pipeline import QueryPrefetcher
+from .response_parser import IncrementalListParser
+from .schema_prompt import SchemaShards, compact_schema, shard_schema
+from .workers import WorkerPool, ExecutionReport
+from .validator import FailureCache, StatementValidator
+from .journal import JournalReplayer, JournalWriter, read_journal
+from .targets import Target, TargetFleet, load_targets
+from .backfill import Backfill, BackfillCheckpoint, plan_chunks
+from .throttle import AdaptiveThrottle, AimdController, HealthMonitor
+from .load_profile import LoadProfile, RateRunner, TokenBucket
+from .metrics import MetricsRegistry, MetricsServer, REGISTRY
+from .service import Service
+from .logging_setup import configure_logging, shutdown_logging
 from .connection_tester import test_db_connection
\ No newline at end of file
@@ -0,0 +1,231 @@
+import os
+import json
+import time
+import zlib
+import logging
+import threading
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Set, Tuple
+from dotenv import load_dotenv
+from .db import Database
+from .row_generator import RowGenerator
+from .foreign_keys import ForeignKeyGraph, KeyPoolRegistry
+from .metrics import ROWS_LOADED, ROWS_PER_SECOND, STAGE_LATENCY
+
+load_dotenv()
+
+TIME_TYPES = ("date", "timestamp without time zone", "timestamp with time zone")
+
+
+@dataclass
+class BackfillChunk:
+    index: int
+    start: datetime
+    end: datetime
+    rows: int
+    offset: int
+
+
+def parse_time(value: str) -> datetime:
+    """Parse an ISO date or timestamp into a naive UTC datetime."""
+    parsed = datetime.fromisoformat(value)
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+
+def plan_chunks(start: datetime, end: datetime, rows: int, chunk_hours: float) -> List[BackfillChunk]:
+    """
+    Split [start, end) into windows of chunk_hours and spread rows evenly over them.
+
+    Returns:
+        List[BackfillChunk]: Chunks in time order; offset is the number of rows in earlier chunks.
+    """
+    if end <= start:
+        raise ValueError(f"Backfill end {end} must be after start {start}.")
+    if chunk_hours <= 0:
+        raise ValueError("BACKFILL_CHUNK_HOURS must be positive.")
+    step = timedelta(hours=chunk_hours)
+    bounds = []
+    cursor = start
+    while cursor < end:
+        bounds.append((cursor, min(cursor + step, end)))
+        cursor += step
+    per_chunk, remainder = divmod(rows, len(bounds))
+    chunks = []
+    offset = 0
+    for index, (chunk_start, chunk_end) in enumerate(bounds):
+        count = per_chunk + (1 if index < remainder else 0)
+        chunks.append(BackfillChunk(index, chunk_start, chunk_end, count, offset))
+        offset += count
+    return chunks
+
+
+class BackfillCheckpoint:
+    def __init__(self, path: Optional[str], plan: Dict[str, Any]) -> None:
+        """
+        Record which (table, chunk) pairs are loaded so an interrupted backfill can resume.
+
+        Chunks are marked after their transaction commits, so a crash between the commit and
+        the write loads that chunk again on resume.
+
+        Args:
+            path (Optional[str]): JSON checkpoint file. Without one progress is not persisted.
+            plan (Dict[str, Any]): Backfill parameters; resuming with different ones is refused.
+        """
+        self.path = path
+        self.plan = plan
+        self.done: Dict[str, Set[int]] = {}
+        self._lock = threading.Lock()
+        if path and os.path.exists(path):
+            with open(path) as f:
+                data = json.load(f)
+            if data.get("plan") != plan:
+                raise ValueError(f"Checkpoint {path} belongs to a different backfill ({data.get('plan')}); remove it to start over.")
+            self.done = {table: set(indexes) for table, indexes in data.get("done", {}).items()}
+            logging.info(f"Resuming backfill from {path} with {sum(len(v) for v in self.done.values())} chunks already loaded.")
+
+    def is_done(self, table: str, index: int) -> bool:
+        return index in self.done.get(table, ())
+
+    def mark(self, table: str, index: int) -> None:
+        with self._lock:
+            self.done.setdefault(table, set()).add(index)
+            if not self.path:
+                return
+            data = {"plan": self.plan, "done": {table: sorted(indexes) for table, indexes in self.done.items()}}
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(data, f)
+            os.replace(tmp_path, self.path)
+
+
+class Backfill:
+    def __init__(self, db: Database, start: datetime, end: datetime, rows: int, chunk_hours: Optional[float] = None,
+                 workers: Optional[int] = None, checkpoint_path: Optional[str] = None) -> None:
+        """
+        Load historical rows into every table with COPY, spread over a time range.
+
+        The range is split into chunks and every chunk of a table is loaded by a separate
+        worker on its own connection and in its own transaction, with date and timestamp
+        columns drawn from the chunk's window. Other columns follow their pg_stats distribution
+        when COLUMN_STATS is on. Tables are processed parents first; a table's foreign keys
+        draw from the parent's keys once the parent is complete.
+
+        Args:
+            db (Database): Target database.
+            start (datetime): Start of the history, inclusive.
+            end (datetime): End of the history, exclusive.
+            rows (int): Rows per table over the whole range.
+            chunk_hours (Optional[float]): Window per chunk, defaults to BACKFILL_CHUNK_HOURS or 24.
+            workers (Optional[int]): Parallel loaders, defaults to BACKFILL_WORKERS or 4.
+            checkpoint_path (Optional[str]): Progress file, defaults to BACKFILL_CHECKPOINT.
+        """
+        self.db = db
+        self.rows = rows
+        self.chunk_hours: float = chunk_hours or float(os.getenv("BACKFILL_CHUNK_HOURS") or "24")
+        self.workers: int = workers or int(os.getenv("BACKFILL_WORKERS") or "4")
+        if self.workers < 1:
+            raise EnvironmentError(f"Invalid BACKFILL_WORKERS '{self.workers}', expected at least 1.")
+        if self.db.pool_max < self.workers + 1:
+            logging.warning(f"Raising POSTGRES_POOL_MAX to {self.workers + 1} to fit the backfill workers.")
+            self.db.pool_max = self.workers + 1
+        self.column_stats: bool = (os.getenv("COLUMN_STATS") or "true").lower() in ("1", "true", "yes")
+        self.chunks = plan_chunks(start, end, rows, self.chunk_hours)
+        plan = {"start": start.isoformat(), "end": end.isoformat(), "rows": rows, "chunk_hours": self.chunk_hours}
+        path = checkpoint_path if checkpoint_path is not None else os.getenv("BACKFILL_CHECKPOINT")
+        self.checkpoint = BackfillCheckpoint(path, plan)
+
+    def run(self, stop_event: Optional[threading.Event] = None, tables: Optional[List[str]] = None) -> int:
+        """
+        Load every pending chunk of every table until done or stop_event is set.
+
+        Args:
+            stop_event (Optional[threading.Event]): Stops the backfill after the running chunks.
+            tables (Optional[List[str]]): Restrict the backfill to these tables.
+
+        Returns:
+            int: Rows loaded by this run.
+        """
+        stop_event = stop_event or threading.Event()
+        self.db.connect()
+        try:
+            return self._run(stop_event, tables)
+        finally:
+            self.db.close()
+
+    def _run(self, stop_event: threading.Event, tables: Optional[List[str]]) -> int:
+        columns = self.db.get_table_columns()
+        primary_keys = self.db.get_primary_keys()
+        foreign_keys = self.db.get_foreign_keys()
+        stats = self.db.get_column_stats() if self.column_stats else {}
+        self.db.connection.rollback()
+        graph = ForeignKeyGraph(columns, foreign_keys)
+        key_pools = KeyPoolRegistry(primary_keys)
+        order = [table for table in graph.insert_order() if tables is None or table in tables]
+        timed = [table for table in order if any(column["type"] in TIME_TYPES for column in columns.get(table, []))]
+        logging.info(
+            f"Backfilling {len(order)} tables ({len(timed)} with date or timestamp columns) over "
+            f"{len(self.chunks)} chunks of {self.chunk_hours}h with {self.workers} workers."
+        )
+        skip = [(table, column) for table, key in primary_keys.items() for column in key]
+        skip += [(table, column["name"]) for table in columns for column in columns[table] if column["type"] in TIME_TYPES]
+        total = 0
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="backfill") as pool:
+            for table in order:
+                if stop_event.is_set():
+                    break
+                pending = [chunk for chunk in self.chunks if chunk.rows and not self.checkpoint.is_done(table, chunk.index)]
+                if not pending:
+                    continue
+                sources = self._key_sources(graph, key_pools, primary_keys, table)
+                futures = [pool.submit(self._load_chunk, columns, stats, skip, table, chunk, sources, stop_event) for chunk in pending]
+                loaded = sum(future.result() for future in futures)
+                total += loaded
+                logging.info(f"Backfilled {loaded} rows into {table}.")
+        elapsed = time.perf_counter() - start
+        ROWS_PER_SECOND.set(total / max(elapsed, 1e-9))
+        logging.info(f"Backfill loaded {total} rows in {elapsed:.2f}s ({total / max(elapsed, 1e-9):.0f} rows/s).")
+        return total
+
+    def _key_sources(self, graph: ForeignKeyGraph, key_pools: KeyPoolRegistry,
+                     primary_keys: Dict[str, List[str]], table: str) -> Dict[str, Any]:
+        """Reload the key pools of the table's parents and map each single-column foreign key to one."""
+        sources = {}
+        for fk in graph.references(table):
+            if len(fk["columns"]) != 1 or primary_keys.get(fk["ref_table"]) != fk["ref_columns"]:
+                continue
+            key_pools.load(self.db.connection, fk["ref_table"])
+            self.db.connection.rollback()
+            sources[fk["columns"][0]] = key_pools.pool(fk["ref_table"])
+        return sources
+
+    def _load_chunk(self, columns: Dict[str, List[Dict[str, Any]]], stats: Dict[str, Dict[str, Dict[str, Any]]],
+                    skip: List[Tuple[str, str]], table: str, chunk: BackfillChunk, sources: Dict[str, Any],
+                    stop_event: threading.Event) -> int:
+        if stop_event.is_set():
+            return 0
+        generator = RowGenerator(columns, seed=zlib.crc32(f"{table}:{chunk.index}".encode()), sequence_start=chunk.offset)
+        generator.set_time_range(chunk.start, chunk.end)
+        if stats:
+            generator.set_column_stats({table: stats.get(table, {})}, skip)
+        for column, pool in sources.items():
+            generator.set_key_source(table, column, pool)
+        try:
+            with self.db.borrow() as conn:
+                try:
+                    with STAGE_LATENCY.time(stage="backfill"):
+                        loaded = generator.copy_rows(conn, table, chunk.rows)
+                        conn.commit()
+                except Exception:
+                    conn.rollback()
+                    raise
+        except Exception as e:
+            logging.error(f"Failed to backfill {table} for {chunk.start} - {chunk.end}: {e}")
+            return 0
+        ROWS_LOADED.inc(loaded, table=table)
+        self.checkpoint.mark(table, chunk.index)
+        return loaded
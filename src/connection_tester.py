@@ -1,7 +1,14 @@
 import os
+from typing import Optional
 import psycopg2
+from .db import Database
 
-def test_db_connection():
+def test_db_connection(db: Optional[Database] = None):
+    if db is not None:
+        with db.borrow():
+            pass
+        print(f"Database connection to {db.name} successful.")
+        return
     try:
         conn = psycopg2.connect(
             host=os.getenv("POSTGRES_HOST"),
@@ -1,49 +1,430 @@
+import os
+import time
 import logging
+import itertools
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import replace
 from .db import Database
 from .gpt import GPTQueryGenerator
-from typing import List
+from .schema_cache import SchemaCache, ddl_signature
+from .executor import QueryExecutor, QueryResult
+from .templates import TemplateLibrary
+from .row_generator import RowGenerator
+from .foreign_keys import ForeignKeyGraph, KeyPoolRegistry
+from .target_selection import TargetSelector
+from .pipeline import QueryPrefetcher
+from .workers import WorkerPool
+from .validator import StatementValidator
+from .journal import JournalWriter
+from .throttle import AdaptiveThrottle
+from .sql_parser import target_table
+from .schema_prompt import SCHEMA_LEGEND, SchemaShards, compact_schema, estimate_tokens, shard_schema
+from .metrics import QUEUE_DEPTH, ROWS_LOADED, ROWS_PER_SECOND, STAGE_LATENCY, STATEMENTS_EXECUTED, STATEMENTS_FAILED, STATEMENTS_PER_SECOND
+from typing import Deque, Iterable, Iterator, List, Optional, Tuple
 
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s - %(levelname)s - %(message)s",
-    handlers=[
-        logging.FileHandler("data_generator.log"),
-        logging.StreamHandler(),
-    ]
-)
+GENERATION_MODES = ("gpt", "template", "native")
+SCHEMA_ENCODINGS = ("ddl", "compact")
+SHARD_MODES = ("rotate", "parallel")
+
+schema_log = logging.getLogger("synpg.schema")
 
 class DataGenerator:
     def __init__(self, db: Database):
         """Initialize the DataGenerator with a database connection and GPT query generator."""
         self.db = db
         self.gpt = GPTQueryGenerator()
+        self.schema_cache = SchemaCache()
+        self.executor = QueryExecutor()
+        self.workers = WorkerPool(db, self.executor)
+        self.validator = StatementValidator()
+        self.journal = JournalWriter()
+        self.throttle = AdaptiveThrottle(self.workers.workers)
+        self.mode: str = (os.getenv("GENERATION_MODE") or "gpt").lower()
+        if self.mode not in GENERATION_MODES:
+            raise EnvironmentError(f"Invalid GENERATION_MODE '{self.mode}', expected one of {GENERATION_MODES}.")
+        self.template_batch_size: int = int(os.getenv("TEMPLATE_BATCH_SIZE") or "100")
+        self.templates = TemplateLibrary() if self.mode == "template" else None
+        self.native_rows: int = int(os.getenv("NATIVE_ROWS_PER_TABLE") or "1000")
+        self.row_generator = None
+        self.column_stats: bool = (os.getenv("COLUMN_STATS") or "true").lower() in ("1", "true", "yes")
+        self.column_stats_refresh: float = float(os.getenv("COLUMN_STATS_REFRESH_SECONDS") or "600")
+        self._stats_loaded_at: Optional[float] = None
+        self.key_pools = None
+        self._primary_keys = None
+        self.schema_encoding: str = (os.getenv("SCHEMA_ENCODING") or "ddl").lower()
+        if self.schema_encoding not in SCHEMA_ENCODINGS:
+            raise EnvironmentError(f"Invalid SCHEMA_ENCODING '{self.schema_encoding}', expected one of {SCHEMA_ENCODINGS}.")
+        self.prompt_token_budget: int = int(os.getenv("PROMPT_TOKEN_BUDGET") or "0")
+        self.streaming: bool = (os.getenv("LLM_STREAMING") or "false").lower() in ("1", "true", "yes")
+        self.shard_mode: str = (os.getenv("SHARD_MODE") or "rotate").lower()
+        if self.shard_mode not in SHARD_MODES:
+            raise EnvironmentError(f"Invalid SHARD_MODE '{self.shard_mode}', expected one of {SHARD_MODES}.")
+        self._shards: Optional[SchemaShards] = None
+        self._shards_source: Optional[List[str]] = None
+        self.prefetcher = QueryPrefetcher(self.gpt)
+        self._pending: Deque[str] = deque()
+        self._pending_from_llm = True
+        self._native_order: Optional[Tuple[ForeignKeyGraph, List[str]]] = None
+        self._insert_graph: Optional[ForeignKeyGraph] = None
+        self._native_cursor = 0
 
     def generate_and_run_queries(self) -> None:
         """
         Generate synthetic SQL queries and execute them on the database.
 
-        If a query fails, it skips to the next one.
+        If a query fails, it skips to the next one. How queries are grouped into
+        transactions is controlled by the QueryExecutor mode (EXECUTION_MODE); with
+        WORKER_COUNT above 1 the batch is split by target table across parallel workers.
         """
         try:
-            self.db.connect()
-            logging.info("Connected to the database.")
-            ddl = self.db.get_all_ddl()
-            logging.info(f"Retrieved DDL: {ddl}")
-            queries = self.gpt.generate_queries(ddl)
-            logging.info(f"Generated {len(queries)} queries.")
-            for query in queries:
-                try:
-                    with self.db.connection.cursor() as cur:
-                        cur.execute("BEGIN;")
-                        cur.execute(query)
-                        cur.execute("COMMIT;")
-                        logging.info(f"Executed query successfully: {query}")
-                except Exception as e:
-                    logging.error(f"Failed to execute query: {query}\nError: {e}")
-                    self.db.connection.rollback()
-                    logging.info("Transaction rolled back.")
+            ddl = self.open_session()
+            if self.mode == "native":
+                self.load_native_rows()
+                return
+            queries, from_llm = self.produce_queries(ddl)
+            if isinstance(queries, list):
+                logging.info(f"Generated {len(queries)} queries{' with the LLM' if from_llm else ' from templates'}.")
+            else:
+                logging.info("Executing queries as they stream from the LLM.")
+            self.run_queries(queries, from_llm)
         except Exception as e:
             logging.critical(f"An unexpected error occurred: {e}")
         finally:
-            self.db.close()
-            logging.info("Closed database connection.")
\ No newline at end of file
+            self.close_session()
+
+    def open_session(self) -> List[str]:
+        """
+        Borrow the session connection and refresh the cached schema.
+
+        Returns:
+            List[str]: DDL of the current schema.
+        """
+        self.db.connect()
+        logging.info("Connected to the database.")
+        with STAGE_LATENCY.time(stage="introspection"):
+            self.refresh_schema()
+            ddl = self.schema_cache.get("ddl", self.db.get_all_ddl)
+        logging.info(f"Retrieved DDL for {len(ddl)} relations.")
+        schema_log.debug("Retrieved DDL: %s", ddl)
+        return ddl
+
+    def refresh_schema(self) -> bool:
+        """
+        Re-check the schema fingerprint, see SchemaCache.refresh.
+
+        When the schema changed, the validator's failures and EXPLAIN results are dropped too.
+
+        Returns:
+            bool: True if the schema cache was invalidated.
+        """
+        changed = self.schema_cache.refresh(self.db)
+        if changed:
+            self.validator.reset()
+        return changed
+
+    def close_session(self) -> None:
+        """Return the session connection to the pool."""
+        self.db.close()
+        logging.info("Closed database connection.")
+
+    def run_queries(self, queries: Iterable[str], from_llm: bool) -> List[QueryResult]:
+        """
+        Execute statements on the session connection, or across the worker pool.
+
+        The INSERTs of a batch are first put in foreign key order (see ForeignKeyGraph.sort_inserts),
+        then statements are checked by the validator, random-row subqueries are rewritten
+        against the key pools, the results are appended to the journal (JOURNAL_DIR)
+        and fed back to the key pools, the failure cache and the template library. queries may
+        be a stream, in which case each statement runs as soon as it arrives (the
+        worker pool still needs the whole batch to partition it) and INSERTs keep their arrival order.
+        """
+        if isinstance(queries, list):
+            queries = self.insert_graph().sort_inserts(queries)
+        key_pools = self.get_key_pools()
+        originals: List[str] = []
+
+        def track(statements: Iterable[str]) -> Iterator[str]:
+            for statement in statements:
+                originals.append(statement)
+                yield statement
+
+        valid = self.validator.filter(self.db.connection, queries)
+        rewritten = key_pools.rewrite_stream(self.db.connection, track(valid))
+        start = time.perf_counter()
+        with STAGE_LATENCY.time(stage="execute"):
+            if self.throttle.enabled:
+                results = self._execute_throttled(rewritten)
+            elif self.workers.workers > 1:
+                results, _ = self.workers.execute(list(rewritten), components=self.insert_graph().components())
+            else:
+                results = self.executor.execute(self.db.connection, rewritten)
+                succeeded = sum(1 for result in results if result.success)
+                logging.info(f"Executed {succeeded}/{len(results)} queries successfully.")
+        STATEMENTS_PER_SECOND.set(len(results) / max(time.perf_counter() - start, 1e-9))
+        for result in results:
+            table = target_table(result.query) or "unknown"
+            (STATEMENTS_EXECUTED if result.success else STATEMENTS_FAILED).inc(table=table)
+        self.journal.record(results)
+        key_pools.observe(results)
+        self.validator.observe(results)
+        if self.templates is not None:
+            learned = [replace(result, query=query) for result, query in zip(results, originals)]
+            if from_llm:
+                self.templates.learn(learned)
+            else:
+                self.templates.record_results(learned)
+        return results
+
+    def _execute_throttled(self, statements: Iterable[str]) -> List[QueryResult]:
+        """
+        Execute statements in batches sized by the adaptive throttle, on as many workers as it allows.
+
+        The target's health is sampled between batches, and execution pauses while it is saturated.
+        Once the throttle is stopped on shutdown, the remaining statements are not executed.
+        """
+        statements = iter(statements)
+        results: List[QueryResult] = []
+        while True:
+            self.throttle.update(self.db.connection)
+            self.throttle.wait_until_healthy(self.db.connection)
+            if self.throttle.stopped:
+                break
+            batch = list(itertools.islice(statements, self.throttle.batch_size))
+            if not batch:
+                break
+            if self.throttle.workers > 1:
+                executed, _ = self.workers.execute(batch, self.throttle.workers, self.insert_graph().components())
+            else:
+                executed = self.executor.execute(self.db.connection, batch)
+            self.throttle.observe(executed)
+            results.extend(executed)
+        succeeded = sum(1 for result in results if result.success)
+        logging.info(
+            f"Executed {succeeded}/{len(results)} queries successfully "
+            f"(throttled to batches of {self.throttle.batch_size} on {self.throttle.workers} workers)."
+        )
+        return results
+
+    def run_chunk(self, limit: int) -> int:
+        """
+        Run up to limit statements (rows in native mode) on the open session. Used by rate mode.
+
+        Statements are taken from a buffer that is refilled with a fresh batch once it is
+        empty; the schema fingerprint is re-checked at every refill.
+
+        Returns:
+            int: Number of statements (or rows) run.
+        """
+        if self.mode == "native":
+            return self.load_next_table(limit)
+        if not self._pending:
+            self.refresh_schema()
+            queries, from_llm = self.produce_queries(self.schema_cache.get("ddl", self.db.get_all_ddl))
+            self._pending = deque(queries)
+            self._pending_from_llm = from_llm
+        chunk = [self._pending.popleft() for _ in range(min(limit, len(self._pending)))]
+        QUEUE_DEPTH.set(len(self._pending), queue="pending_statements")
+        if not chunk:
+            return 0
+        return len(self.run_queries(chunk, self._pending_from_llm))
+
+    def load_native_rows(self) -> int:
+        """
+        Bulk load NATIVE_ROWS_PER_TABLE generated rows into every table with COPY, without the LLM.
+
+        Tables are loaded parents first, following the foreign key graph, and each
+        table is committed in its own transaction. Single-column foreign keys draw
+        their values from the parent table's key pool.
+
+        Returns:
+            int: Total number of rows loaded.
+        """
+        graph = self.prepare_native()
+        start = time.perf_counter()
+        total = 0
+        for table in graph.insert_order():
+            total += self.copy_table(graph, table, self.native_rows)
+        elapsed = time.perf_counter() - start
+        ROWS_PER_SECOND.set(total / max(elapsed, 1e-9))
+        logging.info(f"Loaded {total} rows in {elapsed:.2f}s ({total / max(elapsed, 1e-9):.0f} rows/s).")
+        return total
+
+    def load_next_table(self, rows: int) -> int:
+        """Load rows into the next table of the insert order, cycling through all tables."""
+        if self._native_order is None or self._native_cursor >= len(self._native_order[1]):
+            self.refresh_schema()
+            graph = self.prepare_native()
+            self._native_order = (graph, [table for table in graph.insert_order() if table in self.row_generator.columns])
+            self._native_cursor = 0
+        graph, order = self._native_order
+        if not order:
+            return 0
+        table = order[self._native_cursor]
+        self._native_cursor += 1
+        return self.copy_table(graph, table, rows)
+
+    def prepare_native(self) -> ForeignKeyGraph:
+        """
+        Set up the row generator for the current schema and point foreign keys at parent key pools.
+
+        With COLUMN_STATS, columns are sampled from their pg_stats distribution, re-read every
+        COLUMN_STATS_REFRESH_SECONDS; primary key columns keep the type generators.
+
+        Returns:
+            ForeignKeyGraph: The schema's foreign key graph.
+        """
+        columns = self.schema_cache.get("columns", self.db.get_table_columns)
+        if self.row_generator is None or self.row_generator.columns is not columns:
+            self.row_generator = RowGenerator(columns)
+            self._stats_loaded_at = None
+        if self.column_stats and (self._stats_loaded_at is None or time.monotonic() - self._stats_loaded_at >= self.column_stats_refresh):
+            primary_keys = self.schema_cache.get("primary_keys", self.db.get_primary_keys)
+            skip = [(table, column) for table, key in primary_keys.items() for column in key]
+            self.row_generator.set_column_stats(self.db.get_column_stats(), skip)
+            self._stats_loaded_at = time.monotonic()
+            logging.info(f"Sampling {len(self.row_generator.samplers)} columns from pg_stats.")
+        graph = ForeignKeyGraph(columns, self.schema_cache.get("foreign_keys", self.db.get_foreign_keys))
+        key_pools = self.get_key_pools()
+        for fk in graph.foreign_keys:
+            if len(fk["columns"]) == 1 and key_pools.primary_keys.get(fk["ref_table"]) == fk["ref_columns"][0]:
+                self.row_generator.set_key_source(fk["table"], fk["columns"][0], key_pools.pool(fk["ref_table"]))
+        return graph
+
+    def copy_table(self, graph: ForeignKeyGraph, table: str, rows: int) -> int:
+        """
+        COPY generated rows into one table in its own transaction.
+
+        Returns:
+            int: Rows loaded, 0 if the table was skipped or the load failed.
+        """
+        if table not in self.row_generator.columns:
+            return 0
+        key_pools = self.key_pools
+        try:
+            for fk in graph.references(table):
+                if key_pools.is_stale(fk["ref_table"]):
+                    key_pools.load(self.db.connection, fk["ref_table"])
+            start = time.perf_counter()
+            with STAGE_LATENCY.time(stage="execute"):
+                loaded = self.row_generator.copy_rows(self.db.connection, table, rows)
+                self.db.connection.commit()
+            ROWS_LOADED.inc(loaded, table=table)
+            ROWS_PER_SECOND.set(loaded / max(time.perf_counter() - start, 1e-9))
+            if loaded:
+                key_pools.load_recent(self.db.connection, table, loaded)
+            return loaded
+        except Exception as e:
+            logging.error(f"Failed to load rows into {table}: {e}")
+            self.db.connection.rollback()
+            return 0
+
+    def insert_graph(self) -> ForeignKeyGraph:
+        """Return the foreign key graph of the schema, rebuilt when the cached foreign keys change."""
+        foreign_keys = self.schema_cache.get("foreign_keys", self.db.get_foreign_keys)
+        if self._insert_graph is None or self._insert_graph.foreign_keys is not foreign_keys:
+            columns = self.schema_cache.get("columns", self.db.get_table_columns)
+            self._insert_graph = ForeignKeyGraph(columns, foreign_keys)
+        return self._insert_graph
+
+    def get_key_pools(self) -> KeyPoolRegistry:
+        """
+        Return the key pool registry, rebuilding it when the primary keys changed.
+
+        The registry's target selector is refreshed with current row estimates so each
+        table gets a random-row strategy that fits its size.
+        """
+        primary_keys = self.schema_cache.get("primary_keys", self.db.get_primary_keys)
+        if self.key_pools is None or self._primary_keys is not primary_keys:
+            columns = self.schema_cache.get("columns", self.db.get_table_columns)
+            integer_keys = [
+                table for table, key in primary_keys.items()
+                if len(key) == 1 and any(
+                    column["name"] == key[0] and column["type"] in ("smallint", "integer", "bigint")
+                    for column in columns.get(table, [])
+                )
+            ]
+            self.key_pools = KeyPoolRegistry(primary_keys)
+            self.key_pools.selector = TargetSelector(integer_keys)
+            self._primary_keys = primary_keys
+        self.key_pools.selector.refresh(self.db.get_table_row_estimates)
+        return self.key_pools
+
+    def prompt_shards(self, ddl: List[str]) -> SchemaShards:
+        """
+        Return the schema the LLM prompt is built from, split into shards when it is too large.
+
+        With SCHEMA_ENCODING=compact every base table is encoded on one line with
+        abbreviated types and views are dropped. With PROMPT_TOKEN_BUDGET set, tables
+        are packed into shards whose estimated prompt size stays within the budget.
+        """
+        if self._shards is not None and self._shards_source is ddl:
+            return self._shards
+        if self.schema_encoding == "compact":
+            tables = self.schema_cache.get("compact_schema", lambda: compact_schema(
+                self.schema_cache.get("columns", self.db.get_table_columns),
+                self.schema_cache.get("primary_keys", self.db.get_primary_keys),
+                self.schema_cache.get("foreign_keys", self.db.get_foreign_keys),
+            ))
+            legend = SCHEMA_LEGEND
+        else:
+            tables = {str(i): statement for i, statement in enumerate(ddl)}
+            legend = None
+        if self.prompt_token_budget > 0:
+            overhead = estimate_tokens(self.gpt.construct_prompt([]))
+            shards = shard_schema(tables, self.prompt_token_budget, overhead, legend)
+            logging.info(f"Split the schema of {len(tables)} tables into {len(shards)} prompt shards.")
+        elif tables:
+            shards = [([legend] if legend else []) + list(tables.values())]
+        else:
+            shards = []
+        self._shards = SchemaShards(shards)
+        self._shards_source = ddl
+        return self._shards
+
+    def produce_queries(self, ddl: List[str]) -> Tuple[Iterable[str], bool]:
+        """
+        Produce the statements for one run.
+
+        In template mode statements are rendered from the template library, and the
+        LLM is only called when the library is too small or due for a refresh.
+        Sharded schemas are rotated across runs, or with SHARD_MODE=parallel every
+        shard is requested at once and the batches are concatenated. With LLM_STREAMING
+        a single LLM request returns a stream of statements instead of a list.
+
+        Returns:
+            Tuple[Iterable[str], bool]: The statements and whether they came from the LLM.
+        """
+        if self.templates is not None:
+            self.templates.bind_schema(ddl_signature(ddl))
+            if not self.templates.needs_refresh():
+                return self.templates.generate(self.template_batch_size), False
+        shards = self.prompt_shards(ddl)
+        if not len(shards):
+            logging.warning("The schema has no tables to generate statements for, skipping this run.")
+            return [], False
+        self.gpt.hints = self.validator.prompt_hints()
+        if self.prefetcher.enabled:
+            self.prefetcher.update_ddl(ddl, shards.shards)
+            batch = self.prefetcher.get() or []
+            QUEUE_DEPTH.set(self.prefetcher.queue_depth(), queue="prefetched_batches")
+            return batch, True
+        if self.shard_mode == "parallel" and len(shards) > 1:
+            with ThreadPoolExecutor(max_workers=len(shards), thread_name_prefix="llm-shard") as pool:
+                batches = list(pool.map(self.gpt.generate_queries, shards.shards))
+            return [query for batch in batches for query in batch], True
+        if self.streaming:
+            return self.gpt.stream_queries(shards.next()), True
+        return self.gpt.generate_queries(shards.next()), True
+
+    def interrupt(self) -> None:
+        """Wake up a running job that waits on a throttle pause or the prefetcher, so shutdown is prompt."""
+        self.throttle.stop()
+        self.prefetcher.stop()
+
+    def stop(self) -> None:
+        """Stop background work such as the query prefetcher and the worker threads, and close the journal."""
+        self.throttle.stop()
+        self.prefetcher.stop()
+        self.workers.shutdown()
+        self.journal.close()
\ No newline at end of file
@@ -1,41 +1,162 @@
 import os
+import time
 import logging
-from typing import List, Optional
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
 import psycopg2
-from psycopg2.extensions import connection
+from psycopg2 import pool
+from psycopg2.extensions import connection, parse_dsn
 from dotenv import load_dotenv
 
 load_dotenv()
 
-logging.basicConfig(level=logging.INFO)
-
 class Database:
-    def __init__(self) -> None:
+    def __init__(self, dsn: Optional[str] = None, schema: Optional[str] = None, name: Optional[str] = None) -> None:
+        """
+        Initialize the database settings. Connections are opened lazily by the pool.
+
+        Args:
+            dsn (Optional[str]): libpq connection string or URL. Defaults to the POSTGRES_* settings.
+            schema (Optional[str]): Schema to introspect and write to, defaults to POSTGRES_SCHEMA or "public".
+                Other schemas are put first on the search_path of every pooled connection.
+            name (Optional[str]): Label used in log messages, defaults to the database name.
+        """
         self.connection: Optional[connection] = None
-        self.host: str = os.getenv("POSTGRES_HOST")
-        self.port: int = int(os.getenv("POSTGRES_PORT"))
-        self.user: str = os.getenv("POSTGRES_USER")
-        self.password: str = os.getenv("POSTGRES_PASSWORD")
-        self.database: str = os.getenv("POSTGRES_DB")
-        if not all([self.host, self.port, self.user, self.password, self.database]):
-            raise EnvironmentError("Missing required database configuration in .env file.")
+        self.dsn = dsn
+        if dsn:
+            try:
+                params = parse_dsn(dsn)
+            except psycopg2.ProgrammingError as e:
+                raise EnvironmentError(f"Invalid database DSN: {e}")
+            self.host: str = params.get("host") or "localhost"
+            self.port: int = int(params.get("port") or "5432")
+            self.user: str = params.get("user")
+            self.password: str = params.get("password")
+            self.database: str = params.get("dbname")
+        else:
+            self.host = os.getenv("POSTGRES_HOST")
+            self.port = int(os.getenv("POSTGRES_PORT"))
+            self.user = os.getenv("POSTGRES_USER")
+            self.password = os.getenv("POSTGRES_PASSWORD")
+            self.database = os.getenv("POSTGRES_DB")
+            if not all([self.host, self.port, self.user, self.password, self.database]):
+                raise EnvironmentError("Missing required database configuration in .env file.")
+        self.schema: str = schema or os.getenv("POSTGRES_SCHEMA") or "public"
+        self.name: str = name or (self.database if self.schema == "public" else f"{self.database}/{self.schema}")
+        self.pool_min: int = int(os.getenv("POSTGRES_POOL_MIN", "1"))
+        self.pool_max: int = int(os.getenv("POSTGRES_POOL_MAX", "5"))
+        self.health_check_interval: float = float(os.getenv("POSTGRES_POOL_HEALTH_CHECK_SECONDS", "30"))
+        if self.pool_min < 0 or self.pool_max < max(self.pool_min, 1):
+            raise EnvironmentError("Invalid POSTGRES_POOL_MIN/POSTGRES_POOL_MAX in .env file.")
+        workers = int(os.getenv("WORKER_COUNT") or "1")
+        if workers > 1 and self.pool_max < workers + 1:
+            logging.warning(f"Raising POSTGRES_POOL_MAX to {workers + 1} to fit {workers} workers and the session connection.")
+            self.pool_max = workers + 1
+        self._pool: Optional[pool.ThreadedConnectionPool] = None
+        self._pool_lock = threading.Lock()
+        self._last_used: Dict[int, float] = {}
 
     def connect(self) -> None:
+        """
+        Borrow a session connection from the pool into self.connection.
+
+        The connection goes back to the pool on close(), so scheduled runs
+        reuse sessions instead of paying the connect and TLS handshake each time.
+        """
+        self.connection = self.acquire()
+        logging.info("Database connection established.")
+
+    def acquire(self) -> connection:
+        """
+        Borrow a healthy connection from the pool.
+
+        Connections idle for longer than the health check interval are pinged
+        first; broken ones are discarded and replaced with a fresh connection.
+
+        Returns:
+            connection: A psycopg2 connection owned by the caller until release().
+        """
         try:
-            self.connection = psycopg2.connect(
-                host=self.host,
-                port=self.port,
-                user=self.user,
-                password=self.password,
-                database=self.database,
-            )
-            logging.info("Database connection established.")
+            db_pool = self._get_pool()
+            for _ in range(self.pool_max + 1):
+                conn = db_pool.getconn()
+                if self._is_healthy(conn):
+                    return conn
+                logging.warning("Discarding broken pooled database connection.")
+                self._last_used.pop(id(conn), None)
+                db_pool.putconn(conn, close=True)
         except Exception as e:
             raise ConnectionError(f"Failed to connect to the database: {e}")
+        raise ConnectionError("Failed to obtain a healthy database connection from the pool.")
+
+    def release(self, conn: connection, discard: bool = False) -> None:
+        """
+        Return a borrowed connection to the pool, closing it if it is broken or discard is set.
+        """
+        discard = discard or bool(conn.closed)
+        with self._pool_lock:
+            db_pool = self._pool
+        if db_pool is None or db_pool.closed:
+            conn.close()
+            return
+        if discard:
+            self._last_used.pop(id(conn), None)
+        else:
+            self._last_used[id(conn)] = time.monotonic()
+        db_pool.putconn(conn, close=discard)
+
+    @contextmanager
+    def borrow(self) -> Iterator[connection]:
+        """
+        Context manager that borrows a connection and returns it to the pool on exit.
+
+        Connections that fail with an operational error are discarded instead of reused.
+        """
+        conn = self.acquire()
+        discard = False
+        try:
+            yield conn
+        except (psycopg2.OperationalError, psycopg2.InterfaceError):
+            discard = True
+            raise
+        finally:
+            self.release(conn, discard=discard)
+
+    def _get_pool(self) -> pool.ThreadedConnectionPool:
+        with self._pool_lock:
+            if self._pool is None or self._pool.closed:
+                self._pool = pool.ThreadedConnectionPool(self.pool_min, self.pool_max, **self.connect_params())
+                logging.info(f"Database connection pool for {self.name} opened (min={self.pool_min}, max={self.pool_max}).")
+            return self._pool
+
+    def connect_params(self) -> Dict[str, Any]:
+        """Keyword arguments for psycopg2.connect, including the search_path for a non-public schema."""
+        if self.dsn:
+            params: Dict[str, Any] = {"dsn": self.dsn}
+        else:
+            params = {"host": self.host, "port": self.port, "user": self.user, "password": self.password, "database": self.database}
+        if self.schema != "public":
+            params["options"] = f"-c search_path={self.schema},public"
+        return params
+
+    def _is_healthy(self, conn: connection) -> bool:
+        last_used = self._last_used.get(id(conn))
+        if last_used is None or time.monotonic() - last_used < self.health_check_interval:
+            return True
+        if conn.closed:
+            return False
+        try:
+            with conn.cursor() as cur:
+                cur.execute("SELECT 1;")
+            conn.rollback()
+            return True
+        except psycopg2.Error:
+            return False
 
     def get_all_ddl(self) -> List[str]:
         """
-        Retrieve DDL statements for all tables and views in the public schema.
+        Retrieve DDL statements for all tables and views in the target schema.
 
         Returns:
             List[str]: List of DDL statements as strings.
@@ -46,34 +167,249 @@ class Database:
         table_query = """
             SELECT 'CREATE TABLE ' || table_name || E' (\n' ||
                 array_to_string(
-                    array_agg(column_name || ' ' || data_type), E',\n'
+                    array_agg(column_name || ' ' || data_type ORDER BY ordinal_position), E',\n'
                 ) || E'\n);' AS table_ddl
             FROM information_schema.columns
-            WHERE table_schema = 'public'
+            WHERE table_schema = %s
             GROUP BY table_name;
         """
 
         view_query = """
             SELECT 'CREATE VIEW ' || table_name || E' AS\n' || view_definition AS view_ddl
             FROM information_schema.views
-            WHERE table_schema = 'public';
+            WHERE table_schema = %s;
         """
 
         ddl_statements = []
         with self.connection.cursor() as cur:
-            cur.execute(table_query)
+            cur.execute(table_query, (self.schema,))
             table_ddl = [row[0] for row in cur.fetchall()]
             ddl_statements.extend(table_ddl)
 
-            cur.execute(view_query)
+            cur.execute(view_query, (self.schema,))
             view_ddl = [row[0] for row in cur.fetchall()]
             ddl_statements.extend(view_ddl)
 
         return ddl_statements
 
+    def get_table_columns(self) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Retrieve column metadata for all base tables in the target schema.
+
+        Returns:
+            Dict[str, List[Dict[str, Any]]]: Columns per table in ordinal order, each with
+            name, type, nullable, has_default, generated, max_length, precision and scale.
+        """
+        if not self.connection:
+            raise ConnectionError("Database connection is not established.")
+
+        column_query = """
+            SELECT c.table_name, c.column_name, c.data_type, c.is_nullable = 'YES',
+                c.column_default IS NOT NULL,
+                c.is_identity = 'YES' OR c.is_generated <> 'NEVER',
+                c.character_maximum_length, c.numeric_precision, c.numeric_scale
+            FROM information_schema.columns c
+            JOIN information_schema.tables t
+                ON t.table_schema = c.table_schema AND t.table_name = c.table_name
+            WHERE c.table_schema = %s AND t.table_type = 'BASE TABLE'
+            ORDER BY c.table_name, c.ordinal_position;
+        """
+
+        columns: Dict[str, List[Dict[str, Any]]] = {}
+        with self.connection.cursor() as cur:
+            cur.execute(column_query, (self.schema,))
+            for table, name, data_type, nullable, has_default, generated, max_length, precision, scale in cur.fetchall():
+                columns.setdefault(table, []).append({
+                    "name": name,
+                    "type": data_type,
+                    "nullable": nullable,
+                    "has_default": has_default,
+                    "generated": generated,
+                    "max_length": max_length,
+                    "precision": precision,
+                    "scale": scale,
+                })
+        return columns
+
+    def get_primary_keys(self) -> Dict[str, List[str]]:
+        """
+        Retrieve the primary key columns of all tables in the target schema.
+
+        Returns:
+            Dict[str, List[str]]: Primary key column names per table, in key order.
+        """
+        if not self.connection:
+            raise ConnectionError("Database connection is not established.")
+
+        primary_key_query = """
+            SELECT c.relname::text, array_agg(a.attname::text ORDER BY k.ord)
+            FROM pg_constraint con
+            JOIN pg_class c ON c.oid = con.conrelid
+            JOIN pg_namespace n ON n.oid = c.relnamespace
+            CROSS JOIN LATERAL unnest(con.conkey) WITH ORDINALITY AS k(attnum, ord)
+            JOIN pg_attribute a ON a.attrelid = con.conrelid AND a.attnum = k.attnum
+            WHERE con.contype = 'p' AND n.nspname = %s
+            GROUP BY c.relname;
+        """
+
+        with self.connection.cursor() as cur:
+            cur.execute(primary_key_query, (self.schema,))
+            return {table: list(columns) for table, columns in cur.fetchall()}
+
+    def get_foreign_keys(self) -> List[Dict[str, Any]]:
+        """
+        Retrieve the foreign key constraints between tables in the target schema.
+
+        Returns:
+            List[Dict[str, Any]]: One entry per constraint with name, table, columns,
+            ref_table and ref_columns.
+        """
+        if not self.connection:
+            raise ConnectionError("Database connection is not established.")
+
+        foreign_key_query = """
+            SELECT con.conname::text, child.relname::text, parent.relname::text,
+                array_agg(ca.attname::text ORDER BY k.ord), array_agg(pa.attname::text ORDER BY k.ord)
+            FROM pg_constraint con
+            JOIN pg_class child ON child.oid = con.conrelid
+            JOIN pg_class parent ON parent.oid = con.confrelid
+            JOIN pg_namespace n ON n.oid = child.relnamespace
+            CROSS JOIN LATERAL unnest(con.conkey, con.confkey) WITH ORDINALITY AS k(child_attnum, parent_attnum, ord)
+            JOIN pg_attribute ca ON ca.attrelid = con.conrelid AND ca.attnum = k.child_attnum
+            JOIN pg_attribute pa ON pa.attrelid = con.confrelid AND pa.attnum = k.parent_attnum
+            WHERE con.contype = 'f' AND n.nspname = %s
+            GROUP BY con.conname, child.relname, parent.relname
+            ORDER BY child.relname, con.conname;
+        """
+
+        with self.connection.cursor() as cur:
+            cur.execute(foreign_key_query, (self.schema,))
+            return [
+                {
+                    "name": name,
+                    "table": table,
+                    "columns": list(columns),
+                    "ref_table": ref_table,
+                    "ref_columns": list(ref_columns),
+                }
+                for name, table, ref_table, columns, ref_columns in cur.fetchall()
+            ]
+
+    def get_column_stats(self) -> Dict[str, Dict[str, Dict[str, Any]]]:
+        """
+        Retrieve the planner statistics (pg_stats) of every analyzed column in the target schema.
+
+        Values are returned in their text form, ready for COPY. Partitioned and inherited
+        tables use the statistics of the whole hierarchy when they exist.
+
+        Returns:
+            Dict[str, Dict[str, Dict[str, Any]]]: Per table and column the null_frac, n_distinct
+            (negative for a fraction of the row count), most_common_vals, most_common_freqs,
+            histogram_bounds and the table's reltuples. Columns without statistics are missing.
+        """
+        if not self.connection:
+            raise ConnectionError("Database connection is not established.")
+
+        stats_query = """
+            SELECT DISTINCT ON (s.tablename, s.attname)
+                s.tablename::text, s.attname::text, s.null_frac, s.n_distinct,
+                s.most_common_vals::text::text[], s.most_common_freqs, s.histogram_bounds::text::text[],
+                c.reltuples::float8
+            FROM pg_stats s
+            LEFT JOIN pg_namespace n ON n.nspname = s.schemaname
+            LEFT JOIN pg_class c ON c.relnamespace = n.oid AND c.relname = s.tablename
+            WHERE s.schemaname = %s
+            ORDER BY s.tablename, s.attname, s.inherited DESC;
+        """
+
+        stats: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        with self.connection.cursor() as cur:
+            cur.execute(stats_query, (self.schema,))
+            for table, column, null_frac, n_distinct, common_values, common_freqs, bounds, reltuples in cur.fetchall():
+                stats.setdefault(table, {})[column] = {
+                    "null_frac": null_frac,
+                    "n_distinct": n_distinct,
+                    "most_common_vals": common_values,
+                    "most_common_freqs": common_freqs,
+                    "histogram_bounds": bounds,
+                    "reltuples": reltuples,
+                }
+        return stats
+
+    def get_table_row_estimates(self) -> Dict[str, float]:
+        """
+        Retrieve the planner's row count estimate (pg_class.reltuples) for every table in the target schema.
+
+        Returns:
+            Dict[str, float]: Estimated rows per table; negative when the table was never analyzed.
+        """
+        if not self.connection:
+            raise ConnectionError("Database connection is not established.")
+
+        estimate_query = """
+            SELECT c.relname::text, c.reltuples::float8
+            FROM pg_class c
+            JOIN pg_namespace n ON n.oid = c.relnamespace
+            WHERE n.nspname = %s AND c.relkind IN ('r', 'p');
+        """
+
+        with self.connection.cursor() as cur:
+            cur.execute(estimate_query, (self.schema,))
+            return {table: estimate for table, estimate in cur.fetchall()}
+
+    def get_catalog_fingerprint(self) -> str:
+        """
+        Compute a cheap fingerprint of the target schema catalog.
+
+        The hash covers relfilenode and xmin of every relation in pg_class and of
+        its columns in pg_attribute, so it changes whenever DDL touches the schema.
+
+        Returns:
+            str: md5 hash of the catalog state.
+        """
+        if not self.connection:
+            raise ConnectionError("Database connection is not established.")
+
+        fingerprint_query = """
+            SELECT md5(
+                coalesce((
+                    SELECT string_agg(c.oid || ':' || c.relfilenode || ':' || c.xmin, ',' ORDER BY c.oid)
+                    FROM pg_class c
+                    JOIN pg_namespace n ON n.oid = c.relnamespace
+                    WHERE n.nspname = %s AND c.relkind IN ('r', 'p', 'v', 'm')
+                ), '') || '|' ||
+                coalesce((
+                    SELECT string_agg(a.attrelid || ':' || a.attnum || ':' || a.xmin, ',' ORDER BY a.attrelid, a.attnum)
+                    FROM pg_attribute a
+                    JOIN pg_class c ON c.oid = a.attrelid
+                    JOIN pg_namespace n ON n.oid = c.relnamespace
+                    WHERE n.nspname = %s AND c.relkind IN ('r', 'p', 'v', 'm') AND a.attnum > 0
+                ), '')
+            );
+        """
+
+        with self.connection.cursor() as cur:
+            cur.execute(fingerprint_query, (self.schema, self.schema))
+            return cur.fetchone()[0]
+
     def close(self) -> None:
+        """
+        Return the session connection borrowed by connect() to the pool.
+        """
         if self.connection:
-            self.connection.close()
-            logging.info("Database connection closed.")
+            self.release(self.connection)
+            self.connection = None
+            logging.info("Database connection returned to the pool.")
         else:
-            logging.info("No active database connection to close.")
\ No newline at end of file
+            logging.info("No active database connection to close.")
+
+    def close_pool(self) -> None:
+        """
+        Close every pooled connection. The pool is reopened on the next acquire().
+        """
+        with self._pool_lock:
+            db_pool, self._pool = self._pool, None
+            self._last_used = {}
+        if db_pool is not None and not db_pool.closed:
+            db_pool.closeall()
+            logging.info("Database connection pool closed.")
\ No newline at end of file
@@ -0,0 +1,231 @@
+import os
+import time
+import logging
+from dataclasses import dataclass
+from typing import Any, Iterable, Iterator, List, Optional, Tuple
+from psycopg2.extensions import connection, cursor
+from psycopg2.extras import execute_batch
+from dotenv import load_dotenv
+from .prepared import INVALID_STATEMENT_NAME, PreparedStatementCache, bind, execute_template
+
+load_dotenv()
+
+EXECUTION_MODES = ("statement", "batch", "multi")
+SAVEPOINT_NAME = "synpg_stmt"
+
+query_log = logging.getLogger("synpg.query")
+
+
+@dataclass
+class QueryResult:
+    query: str
+    success: bool
+    error: Optional[str] = None
+    latency: float = 0.0
+    rows: Optional[List[Tuple[Any, ...]]] = None
+    started_at: float = 0.0
+
+
+class QueryExecutor:
+    def __init__(self, mode: Optional[str] = None) -> None:
+        """
+        Initialize the executor.
+
+        Args:
+            mode (Optional[str]): One of EXECUTION_MODES, defaults to EXECUTION_MODE or "statement".
+                "statement" commits every query in its own transaction, "batch" runs the whole
+                batch in one transaction with a savepoint per query, and "multi" additionally
+                tries to send the batch in a single round trip before falling back to "batch".
+
+        With PREPARED_STATEMENTS on, statements with data literals run as EXECUTE of a
+        statement prepared once per shape and connection (see PreparedStatementCache). In
+        "batch" mode consecutive statements of the same shape are additionally sent together
+        with execute_batch, PREPARED_PAGE_SIZE per round trip. Runs with RETURNING, such as
+        the INSERTs the key pools rewrite, share one savepoint but run one by one to fetch their rows.
+        """
+        self.mode: str = (mode or os.getenv("EXECUTION_MODE") or "statement").lower()
+        if self.mode not in EXECUTION_MODES:
+            raise EnvironmentError(f"Invalid EXECUTION_MODE '{self.mode}', expected one of {EXECUTION_MODES}.")
+        prepared = (os.getenv("PREPARED_STATEMENTS") or "false").lower() in ("1", "true", "yes")
+        self.prepared: Optional[PreparedStatementCache] = PreparedStatementCache() if prepared else None
+        self.page_size: int = int(os.getenv("PREPARED_PAGE_SIZE") or "100")
+
+    def execute(self, conn: connection, queries: Iterable[str]) -> List[QueryResult]:
+        """
+        Execute queries on the given connection using the configured mode.
+
+        Returns:
+            List[QueryResult]: One result per query, in input order.
+        """
+        if self.mode == "statement":
+            return self.execute_per_statement(conn, queries)
+        if self.mode == "multi":
+            queries = list(queries)
+            results = self.execute_single_round_trip(conn, queries)
+            if results is not None:
+                return results
+        return self.execute_batched(conn, queries)
+
+    def execute_per_statement(self, conn: connection, queries: Iterable[str]) -> List[QueryResult]:
+        """
+        Execute each query in its own transaction, rolling back the ones that fail.
+        """
+        results = []
+        for query in queries:
+            started_at = time.time()
+            start = time.perf_counter()
+            try:
+                with conn.cursor() as cur:
+                    cur.execute("BEGIN;")
+                    cur.execute(self.render(conn, cur, query))
+                    rows = cur.fetchall() if cur.description else None
+                    cur.execute("COMMIT;")
+                    query_log.info("Executed query successfully: %s", query)
+                results.append(QueryResult(query, True, latency=time.perf_counter() - start, rows=rows, started_at=started_at))
+            except Exception as e:
+                query_log.error("Failed to execute query: %s\nError: %s", query, e)
+                self._check_prepared(conn, e)
+                conn.rollback()
+                query_log.debug("Transaction rolled back.")
+                results.append(QueryResult(query, False, str(e), time.perf_counter() - start, started_at=started_at))
+        return results
+
+    def execute_batched(self, conn: connection, queries: Iterable[str]) -> List[QueryResult]:
+        """
+        Execute all queries in one transaction with a savepoint per query.
+
+        Releasing the previous savepoint and setting the next one travel in the same
+        round trip as the query itself, so a successful query costs a single round trip
+        and a failed one only rolls back to its own savepoint. A run of prepared statements
+        of the same shape shares one savepoint and is retried query by query if it fails.
+        """
+        results = []
+        savepoint_open = False
+        with conn.cursor() as cur:
+            for name, run, params, returning in self._runs(conn, cur, queries):
+                prefix = f"RELEASE SAVEPOINT {SAVEPOINT_NAME}; " if savepoint_open else ""
+                if name is not None and len(run) > 1:
+                    started_at = time.time()
+                    start = time.perf_counter()
+                    try:
+                        cur.execute(f"{prefix}SAVEPOINT {SAVEPOINT_NAME};")
+                        savepoint_open = True
+                        prefix = f"RELEASE SAVEPOINT {SAVEPOINT_NAME}; "
+                        template = execute_template(name, len(params[0]))
+                        if returning:
+                            returned = []
+                            for values in params:
+                                cur.execute(template, values)
+                                returned.append(cur.fetchall())
+                        else:
+                            execute_batch(cur, template, params, page_size=self.page_size)
+                            returned = [None] * len(run)
+                        latency = (time.perf_counter() - start) / len(run)
+                        for i, (query, rows) in enumerate(zip(run, returned)):
+                            query_log.info("Executed query successfully: %s", query)
+                            results.append(QueryResult(query, True, latency=latency, rows=rows, started_at=started_at + i * latency))
+                        continue
+                    except Exception as e:
+                        logging.warning(f"Batch of {len(run)} prepared statements failed, retrying them one by one: {e}")
+                        self._check_prepared(conn, e)
+                        cur.execute(f"ROLLBACK TO SAVEPOINT {SAVEPOINT_NAME};")
+                for query in run:
+                    started_at = time.time()
+                    start = time.perf_counter()
+                    try:
+                        cur.execute(f"{prefix}SAVEPOINT {SAVEPOINT_NAME}; {self.render(conn, cur, query)}")
+                        savepoint_open = True
+                        rows = cur.fetchall() if cur.description else None
+                        query_log.info("Executed query successfully: %s", query)
+                        results.append(QueryResult(query, True, latency=time.perf_counter() - start, rows=rows, started_at=started_at))
+                    except Exception as e:
+                        query_log.error("Failed to execute query: %s\nError: %s", query, e)
+                        self._check_prepared(conn, e)
+                        cur.execute(f"ROLLBACK TO SAVEPOINT {SAVEPOINT_NAME};")
+                        savepoint_open = True
+                        query_log.debug("Rolled back to savepoint.")
+                        results.append(QueryResult(query, False, str(e), time.perf_counter() - start, started_at=started_at))
+                    prefix = f"RELEASE SAVEPOINT {SAVEPOINT_NAME}; "
+        conn.commit()
+        return results
+
+    def execute_single_round_trip(self, conn: connection, queries: List[str]) -> Optional[List[QueryResult]]:
+        """
+        Send the whole batch as one multi-statement query and commit it.
+
+        Returns:
+            Optional[List[QueryResult]]: Results if every query succeeded, or None after rolling
+            back when any query failed, so the caller can retry with per-query isolation.
+        """
+        if not queries:
+            return []
+        started_at = time.time()
+        start = time.perf_counter()
+        try:
+            with conn.cursor() as cur:
+                script = "\n".join(f"{self.render(conn, cur, query).strip().rstrip(';')};" for query in queries)
+                cur.execute(script)
+            conn.commit()
+        except Exception as e:
+            logging.warning(f"Batch failed as a single round trip, retrying with savepoints: {e}")
+            self._check_prepared(conn, e)
+            conn.rollback()
+            return None
+        latency = (time.perf_counter() - start) / len(queries)
+        for query in queries:
+            query_log.info("Executed query successfully: %s", query)
+        return [QueryResult(query, True, latency=latency, started_at=started_at + i * latency) for i, query in enumerate(queries)]
+
+    def render(self, conn: connection, cur: cursor, query: str) -> str:
+        """Return the statement to send for query: an EXECUTE of its prepared shape, or query itself."""
+        if self.prepared is None:
+            return query
+        return self.prepared.render(conn, cur, query)
+
+    def _runs(self, conn: connection, cur: cursor, queries: Iterable[str]) -> Iterator[Tuple[Optional[str], List[str], List[List[object]], bool]]:
+        """
+        Group consecutive queries that run as the same prepared statement.
+
+        Yields:
+            Tuple[Optional[str], List[str], List[List[object]], bool]: The prepared statement name,
+            or None for a query that runs on its own, the queries, their bound parameters and
+            whether the statement has RETURNING. execute_batch does not return rows, so runs with
+            RETURNING are executed row by row, still under a single savepoint.
+        """
+        text: Optional[str] = None
+        returning = False
+        run: List[str] = []
+        params: List[List[object]] = []
+        for query in queries:
+            bound = bind(query) if self.prepared is not None else None
+            key = bound.text if bound is not None else None
+            if run and key != text:
+                yield from self._flush(conn, cur, text, run, params, returning)
+                run, params = [], []
+            if key is None:
+                yield None, [query], [], False
+                continue
+            text = key
+            returning = bound.returning
+            run.append(query)
+            params.append(bound.values)
+        if run:
+            yield from self._flush(conn, cur, text, run, params, returning)
+
+    def _flush(self, conn: connection, cur: cursor, text: str, run: List[str],
+               params: List[List[object]], returning: bool) -> Iterator[Tuple[Optional[str], List[str], List[List[object]], bool]]:
+        """
+        Prepare the shape of a run just before it is yielded, so preparing later shapes cannot
+        evict it first. A shape the server refuses runs query by query.
+        """
+        name = self.prepared.prepare(conn, cur, text)
+        if name is None:
+            for query in run:
+                yield None, [query], [], False
+        else:
+            yield name, run, params, returning
+
+    def _check_prepared(self, conn: connection, error: Exception) -> None:
+        """Forget the connection's prepared statements if the server no longer has them."""
+        if self.prepared is not None and getattr(error, "pgcode", None) == INVALID_STATEMENT_NAME:
+            self.prepared.forget(conn)
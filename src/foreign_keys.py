@@ -0,0 +1,344 @@
+import os
+import time
+import random
+import logging
+import threading
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+from psycopg2.extensions import connection
+from dotenv import load_dotenv
+from .sql_parser import Token, quote_ident, significant, statement_kind, target_table, tokenize
+from .target_selection import TargetSelector, sample_keys
+
+load_dotenv()
+
+
+class ForeignKeyGraph:
+    def __init__(self, tables: Iterable[str], foreign_keys: List[Dict[str, Any]]) -> None:
+        """
+        Build the dependency graph between tables from their foreign key constraints.
+
+        Args:
+            tables (Iterable[str]): All table names.
+            foreign_keys (List[Dict[str, Any]]): Constraints from Database.get_foreign_keys.
+        """
+        self.tables: List[str] = sorted(tables)
+        self.foreign_keys = foreign_keys
+        self._parents: Dict[str, Set[str]] = {table: set() for table in self.tables}
+        for fk in foreign_keys:
+            if fk["table"] != fk["ref_table"]:
+                self._parents.setdefault(fk["table"], set()).add(fk["ref_table"])
+                self._parents.setdefault(fk["ref_table"], set())
+        self._ranks: Optional[Dict[str, int]] = None
+        self._components: Optional[Dict[str, str]] = None
+
+    def parents(self, table: str) -> Set[str]:
+        """Tables the given table references, excluding self-references."""
+        return set(self._parents.get(table, set()))
+
+    def references(self, table: str) -> List[Dict[str, Any]]:
+        """Foreign key constraints declared on the given table."""
+        return [fk for fk in self.foreign_keys if fk["table"] == table]
+
+    def insert_order(self) -> List[str]:
+        """
+        Order tables so that every table comes after the tables it references.
+
+        Tables that take part in a reference cycle are appended at the end in name order.
+
+        Returns:
+            List[str]: Table names in a valid insert order.
+        """
+        remaining = {table: set(parents) for table, parents in self._parents.items()}
+        order = []
+        ready = sorted(table for table, parents in remaining.items() if not parents)
+        while ready:
+            table = ready.pop(0)
+            order.append(table)
+            del remaining[table]
+            for child in sorted(remaining):
+                parents = remaining[child]
+                if table in parents:
+                    parents.discard(table)
+                    if not parents:
+                        ready.append(child)
+            ready.sort()
+        if remaining:
+            logging.warning(f"Foreign key cycle between tables: {sorted(remaining)}")
+            order.extend(sorted(remaining))
+        return order
+
+    def components(self) -> Dict[str, str]:
+        """
+        Group the tables that are linked by foreign keys, directly or through other tables.
+
+        Returns:
+            Dict[str, str]: Every table mapped to the first table name of its group.
+        """
+        if self._components is None:
+            groups: Dict[str, Set[str]] = {}
+            for table, parents in self._parents.items():
+                group = {table}
+                for other in [table, *parents]:
+                    if other in groups and groups[other] is not group:
+                        group |= groups[other]
+                    group.add(other)
+                for member in group:
+                    groups[member] = group
+            self._components = {table: min(group) for table, group in groups.items()}
+        return self._components
+
+    def sort_inserts(self, queries: List[str]) -> List[str]:
+        """
+        Reorder a batch so that INSERTs into parent tables run before the INSERTs into their children.
+
+        An INSERT into a parent table that comes after an INSERT into one of its children moves
+        up to just before the first such child INSERT, together with the parent INSERTs it
+        needs itself. Every other statement keeps its relative order, so UPDATEs and DELETEs
+        still run after the rows they touch are inserted. Only parents earlier in the insert order
+        are pulled up, so tables in a reference cycle follow insert_order and cannot loop.
+        """
+        if self._ranks is None:
+            self._ranks = {table: rank for rank, table in enumerate(self.insert_order())}
+        tables = [target_table(query) if statement_kind(query) == "INSERT" else None for query in queries]
+        inserts: Dict[str, List[int]] = {}
+        for i, table in enumerate(tables):
+            if table is not None:
+                inserts.setdefault(table, []).append(i)
+        placed = [False] * len(queries)
+        ordered: List[str] = []
+
+        def place(i: int) -> None:
+            placed[i] = True
+            table = tables[i]
+            if table is not None:
+                for parent in sorted(self._parents.get(table, ())):
+                    if self._ranks[parent] >= self._ranks[table]:
+                        continue
+                    for j in inserts.get(parent, ()):
+                        if j > i and not placed[j]:
+                            place(j)
+            ordered.append(queries[i])
+
+        for i in range(len(queries)):
+            if not placed[i]:
+                place(i)
+        return ordered
+
+
+class KeyPool:
+    """Bounded set of sampled key values with O(1) add, discard and random pick."""
+
+    def __init__(self, capacity: int, rng: Optional[random.Random] = None) -> None:
+        self.capacity = capacity
+        self.loaded_at: Optional[float] = None
+        self._keys: List[Any] = []
+        self._index: Dict[Any, int] = {}
+        self._rng = rng or random.Random()
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def __contains__(self, key: Any) -> bool:
+        return key in self._index
+
+    def add(self, key: Any) -> None:
+        if key is None or key in self._index:
+            return
+        if len(self._keys) < self.capacity:
+            self._index[key] = len(self._keys)
+            self._keys.append(key)
+            return
+        i = self._rng.randrange(len(self._keys))
+        del self._index[self._keys[i]]
+        self._keys[i] = key
+        self._index[key] = i
+
+    def discard(self, key: Any) -> None:
+        i = self._index.pop(key, None)
+        if i is None:
+            return
+        last = self._keys.pop()
+        if i < len(self._keys):
+            self._keys[i] = last
+            self._index[last] = i
+
+    def reset(self, keys: Iterable[Any]) -> None:
+        self._keys = []
+        self._index = {}
+        for key in keys:
+            self.add(key)
+        self.loaded_at = time.monotonic()
+
+    def pick(self) -> Optional[Any]:
+        return self._rng.choice(self._keys) if self._keys else None
+
+    def sample(self, n: int) -> List[Any]:
+        return self._rng.choices(self._keys, k=n) if self._keys else []
+
+
+class KeyPoolRegistry:
+    def __init__(self, primary_keys: Dict[str, List[str]], seed: Optional[int] = None) -> None:
+        """
+        Keep an in-process pool of sampled primary keys for every table with a single-column key.
+
+        Pools replace per-statement ORDER BY RANDOM() LIMIT 1 subqueries with an O(1) pick,
+        and grow from the ids that INSERT ... RETURNING hands back.
+
+        Args:
+            primary_keys (Dict[str, List[str]]): Primary key columns from Database.get_primary_keys.
+            seed (Optional[int]): Seed for key picks, mainly for tests.
+        """
+        self.primary_keys = {table: columns[0] for table, columns in primary_keys.items() if len(columns) == 1}
+        self.capacity: int = int(os.getenv("KEY_POOL_SIZE") or "1000")
+        self.refresh_seconds: float = float(os.getenv("KEY_POOL_REFRESH_SECONDS") or "600")
+        self._rng = random.Random(seed)
+        self._pools: Dict[str, KeyPool] = {}
+        self._pending_deletes: Dict[str, Tuple[str, Any]] = {}
+        self._lock = threading.RLock()
+        self.selector = TargetSelector()
+
+    def pool(self, table: str) -> Optional[KeyPool]:
+        """Return the key pool of a table, or None if it has no single-column primary key."""
+        if table not in self.primary_keys:
+            return None
+        with self._lock:
+            if table not in self._pools:
+                self._pools[table] = KeyPool(self.capacity, self._rng)
+            return self._pools[table]
+
+    def is_stale(self, table: str) -> bool:
+        pool = self.pool(table)
+        return pool is not None and (
+            pool.loaded_at is None or time.monotonic() - pool.loaded_at > self.refresh_seconds
+        )
+
+    def pick(self, table: str) -> Optional[Any]:
+        """Pick a random key from a table's pool, or None if the pool is empty."""
+        pool = self.pool(table)
+        if pool is None:
+            return None
+        with self._lock:
+            return pool.pick()
+
+    def load(self, conn: connection, table: str) -> None:
+        """
+        Refill a table's pool with a random sample of its keys.
+
+        This samples the table once per refresh interval instead of once per statement;
+        see target_selection.sample_keys for how the sample is taken.
+        """
+        pool = self.pool(table)
+        if pool is None:
+            return
+        keys = sample_keys(
+            conn,
+            table,
+            self.primary_keys[table],
+            pool.capacity,
+            self.selector.row_estimate(table),
+            self.selector.small_table_rows,
+        )
+        with self._lock:
+            pool.reset(keys)
+        logging.info(f"Loaded {len(keys)} keys into the {table} key pool.")
+
+    def load_recent(self, conn: connection, table: str, limit: int) -> None:
+        """
+        Add the most recent keys of a table to its pool, e.g. after a COPY that returns no ids.
+
+        Uses the primary key index, so it does not scan the table.
+        """
+        pool = self.pool(table)
+        if pool is None:
+            return
+        key = quote_ident(self.primary_keys[table])
+        with conn.cursor() as cur:
+            cur.execute(f"SELECT {key} FROM {quote_ident(table)} ORDER BY {key} DESC LIMIT %s;", (min(limit, pool.capacity),))
+            keys = [row[0] for row in cur.fetchall()]
+        with self._lock:
+            for value in keys:
+                pool.add(value)
+            if pool.loaded_at is None:
+                pool.loaded_at = time.monotonic()
+
+    def rewrite(self, conn: connection, queries: List[str]) -> List[str]:
+        """
+        Prepare generated statements for execution.
+
+        Random-row subqueries of the form (SELECT <pk> FROM <table> ORDER BY RANDOM() LIMIT 1)
+        are replaced according to the table's target selection strategy (by default a key
+        picked from the table's pool), and INSERTs into tables with a pool get RETURNING <pk>
+        appended so new ids flow back into the pool.
+        """
+        tables = {table for query in queries for table, _ in self._random_subqueries(tokenize(query))}
+        for table in sorted(tables):
+            self.selector.strategy_for(table).prepare(conn, self, table)
+        return [self._rewrite_query(query) for query in queries]
+
+    def rewrite_stream(self, conn: connection, queries: Iterable[str]) -> Iterator[str]:
+        """
+        Lazily rewrite statements as they arrive, like rewrite.
+
+        Each table's strategy is prepared when its first random-row subquery shows up.
+        """
+        prepared = set()
+        for query in queries:
+            for table, _ in self._random_subqueries(tokenize(query)):
+                if table not in prepared:
+                    self.selector.strategy_for(table).prepare(conn, self, table)
+                    prepared.add(table)
+            yield self._rewrite_query(query)
+
+    def observe(self, results: Iterable) -> None:
+        """Feed executed statements back into the pools: add returned ids and drop deleted keys."""
+        with self._lock:
+            for result in results:
+                pending = self._pending_deletes.pop(result.query, None)
+                if not result.success:
+                    continue
+                if pending is not None:
+                    table, key = pending
+                    if table in self._pools:
+                        self._pools[table].discard(key)
+                if result.rows and statement_kind(result.query) == "INSERT":
+                    pool = self.pool(target_table(result.query))
+                    if pool is not None:
+                        for row in result.rows:
+                            pool.add(row[0])
+
+    def _random_subqueries(self, tokens: List[Token]) -> List[Tuple[str, Tuple[int, int]]]:
+        sig = significant(tokens)
+        expected = ["(", "SELECT", None, "FROM", None, "ORDER", "BY", "RANDOM", "(", ")", "LIMIT", "1", ")"]
+        matches = []
+        for k in range(len(sig) - len(expected) + 1):
+            window = [token for _, token in sig[k:k + len(expected)]]
+            if any(want is not None and token.text.upper() != want for want, token in zip(expected, window)):
+                continue
+            column = window[2].text.strip('"') if window[2].kind == "ident" else window[2].text.lower()
+            table = window[4].text.strip('"') if window[4].kind == "ident" else window[4].text.lower()
+            if self.primary_keys.get(table) == column:
+                matches.append((table, (sig[k][0], sig[k + len(expected) - 1][0])))
+        return matches
+
+    def _rewrite_query(self, query: str) -> str:
+        tokens = tokenize(query)
+        texts = [token.text for token in tokens]
+        picked = []
+        for table, (start, end) in self._random_subqueries(tokens):
+            replacement = self.selector.strategy_for(table).replacement(self, table)
+            if replacement is None:
+                continue
+            sql, key = replacement
+            texts[start:end + 1] = [sql] + [""] * (end - start)
+            if key is not None:
+                picked.append((table, key))
+        rewritten = "".join(texts)
+        kind = statement_kind(rewritten)
+        table = target_table(rewritten)
+        if kind == "INSERT" and table in self.primary_keys:
+            if not any(token.depth == 0 and token.text.upper() == "RETURNING" for _, token in significant(tokens)):
+                rewritten = f"{rewritten.strip().rstrip(';')} RETURNING {quote_ident(self.primary_keys[table])};"
+        if kind == "DELETE" and len(picked) == 1 and picked[0][0] == table:
+            with self._lock:
+                self._pending_deletes[rewritten] = picked[0]
+        return rewritten
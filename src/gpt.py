@@ -1,19 +1,25 @@
+import time
 import openai
-from typing import List
+from typing import Iterator, List, Optional
 import os
 from dotenv import load_dotenv
 import ast
 import logging
+from .metrics import STAGE_LATENCY
+from .response_parser import IncrementalListParser
 
 num_tokens = 4000
 load_dotenv()
 
+llm_log = logging.getLogger("synpg.llm")
+
 class GPTQueryGenerator:
     def __init__(self):
         self.api_key: str = os.getenv("OPENAI_API_KEY")
         if not self.api_key:
             raise EnvironmentError("Missing OpenAI API key in .env file.")
         openai.api_key = self.api_key
+        self.hints: List[str] = []
 
     def construct_prompt(self, ddl: List[str], num_queries: int = 10, percent_inserts: int = 50, percent_updates: int = 30, percent_deletes: int = 20) -> str:
         prompt = (
@@ -24,44 +30,133 @@ class GPTQueryGenerator:
             "- Adhere to constraints in the schema (e.g., foreign keys, primary keys, unique constraints).\n"
             "- Be idempotent when executed.\n"
             "- Include valid values for data types (e.g., strings, numbers, dates).\n"
-            "- Use subqueries to select random records for UPDATEs and DELETEs, e.g., "
-            "SELECT id FROM table_name ORDER BY RANDOM() LIMIT 1;\n"
+            "- Use subqueries to select random records for UPDATEs, DELETEs and foreign key values in INSERTs, "
+            "written exactly as (SELECT id FROM table_name ORDER BY RANDOM() LIMIT 1), where id is the primary key.\n"
             "- Be returned as a Python list of SQL strings, formatted correctly for Python syntax.\n"
             "- Make the data realistic, also creative but appropriate.\n"
-            f"- Limit the response to {num_tokens} tokens.\n\n"
-            "Here is the database schema:\n"
+            f"- Limit the response to {num_tokens} tokens.\n"
         )
+        for hint in self.hints:
+            prompt += f"- Recurring error: {hint}\n"
+        prompt += "\nHere is the database schema:\n"
         for table_ddl in ddl:
             prompt += f"{table_ddl}\n\n"
         prompt += "Generate the SQL queries now:"
         return prompt
 
     def generate_queries(self, ddl: List[str], num_queries: int = 10, percent_inserts: int = 50, percent_updates: int = 30, percent_deletes: int = 20) -> List[str]:
+        batches = self.generate_query_batches(ddl, 1, num_queries, percent_inserts, percent_updates, percent_deletes)
+        return batches[0] if batches else []
+
+    def generate_query_batches(self, ddl: List[str], n: int = 1, num_queries: int = 10, percent_inserts: int = 50, percent_updates: int = 30, percent_deletes: int = 20) -> List[List[str]]:
+        """
+        Request n completions for the same prompt in a single API call.
+
+        Returns:
+            List[List[str]]: One list of queries per well-formed completion; empty on API errors.
+        """
+        prompt = self.construct_prompt(ddl, num_queries, percent_inserts, percent_updates, percent_deletes)
+        try:
+            with STAGE_LATENCY.time(stage="llm"):
+                response = openai.ChatCompletion.create(
+                    model="gpt-4o-mini",
+                    messages=[{"role": "system", "content": prompt}],
+                    max_tokens=num_tokens,
+                    temperature=0.7,
+                    n=n
+                )
+        except Exception as e:
+            logging.error(f"Error generating queries: {e}")
+            return []
+
+        batches = []
+        for choice in response["choices"]:
+            try:
+                with STAGE_LATENCY.time(stage="parse"):
+                    batches.append(self.parse_response(choice["message"]["content"]))
+            except (SyntaxError, ValueError) as e:
+                logging.error(f"Malformed response from OpenAI: {e}")
+            except Exception as e:
+                logging.error(f"Error generating queries: {e}")
+        return batches
+
+    def stream_queries(self, ddl: List[str], num_queries: int = 10, percent_inserts: int = 50, percent_updates: int = 30, percent_deletes: int = 20) -> Iterator[str]:
+        """
+        Stream a completion and yield every SQL string as soon as it is complete.
+
+        Statements completed before an API error or a truncated tail are still yielded.
+        The time spent waiting on the API and parsing chunks is totalled and observed as
+        the "llm" and "parse" stages when the stream ends; the time the consumer spends
+        between yields is not counted.
+
+        Yields:
+            str: One SQL statement at a time.
+        """
         prompt = self.construct_prompt(ddl, num_queries, percent_inserts, percent_updates, percent_deletes)
+        parser = IncrementalListParser()
+        start = time.perf_counter()
+        llm_seconds = 0.0
+        parse_seconds = 0.0
+        waiting_since: Optional[float] = start
+        count = 0
         try:
-            response = openai.ChatCompletion.create(
+            response = iter(openai.ChatCompletion.create(
                 model="gpt-4o-mini",
                 messages=[{"role": "system", "content": prompt}],
                 max_tokens=num_tokens,
                 temperature=0.7,
-                n=1
-            )
-            raw_response = response["choices"][0]["message"]["content"].strip()
-            logging.info(f"Raw GPT response: {raw_response}")
+                stream=True
+            ))
+            while True:
+                waiting_since = waiting_since or time.perf_counter()
+                chunk = next(response, None)
+                llm_seconds += time.perf_counter() - waiting_since
+                waiting_since = None
+                if chunk is None:
+                    break
+                content = chunk["choices"][0].get("delta", {}).get("content")
+                if not content:
+                    continue
+                parse_start = time.perf_counter()
+                queries = parser.feed(content)
+                parse_seconds += time.perf_counter() - parse_start
+                for query in queries:
+                    if count == 0:
+                        logging.info(f"First streamed query after {time.perf_counter() - start:.2f}s.")
+                    count += 1
+                    yield query
+        except Exception as e:
+            logging.error(f"Error streaming queries: {e}")
+        finally:
+            if waiting_since is not None:
+                llm_seconds += time.perf_counter() - waiting_since
+            STAGE_LATENCY.observe(llm_seconds, stage="llm")
+            STAGE_LATENCY.observe(parse_seconds, stage="parse")
+        if not parser.finished:
+            logging.warning(f"Streamed response ended before the list was closed; kept {count} complete queries.")
 
-            if raw_response.startswith("```"):
-                raw_response = raw_response.strip("```").strip()
-                if "sql_queries = " in raw_response:
-                    raw_response = raw_response.split("sql_queries = ", 1)[-1].strip()
+    def parse_response(self, content: str) -> List[str]:
+        """
+        Parse a completion into a list of SQL strings.
 
-            queries = ast.literal_eval(raw_response)
-            if not isinstance(queries, list) or not all(isinstance(query, str) for query in queries):
-                raise ValueError("Response is not a valid list of SQL strings.")
-            return queries
+        Raises:
+            SyntaxError, ValueError: If the completion is not a Python list of strings.
+        """
+        raw_response = content.strip()
+        llm_log.debug("Raw GPT response: %s", raw_response)
 
-        except (SyntaxError, ValueError) as e:
-            logging.error(f"Malformed response from OpenAI: {e}")
-            return []
-        except Exception as e:
-            logging.error(f"Error generating queries: {e}")
-            return []
\ No newline at end of file
+        if raw_response.startswith("```"):
+            raw_response = raw_response.strip("```").strip()
+            if "sql_queries = " in raw_response:
+                raw_response = raw_response.split("sql_queries = ", 1)[-1].strip()
+
+        try:
+            queries = ast.literal_eval(raw_response)
+        except SyntaxError:
+            queries = IncrementalListParser().feed(raw_response)
+            if not queries:
+                raise
+            logging.warning(f"Malformed or truncated response, salvaged {len(queries)} complete queries.")
+        if not isinstance(queries, list) or not all(isinstance(query, str) for query in queries):
+            raise ValueError("Response is not a valid list of SQL strings.")
+        return queries
\ No newline at end of file
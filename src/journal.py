@@ -0,0 +1,242 @@
+import os
+import glob
+import gzip
+import json
+import time
+import queue
+import logging
+import threading
+import itertools
+from datetime import datetime, timezone
+from typing import IO, Any, Dict, Iterable, Iterator, List, Optional
+from dotenv import load_dotenv
+from .db import Database
+from .executor import QueryExecutor, QueryResult
+from .sql_parser import target_table
+from .workers import ExecutionReport
+from .metrics import STAGE_LATENCY, STATEMENTS_EXECUTED, STATEMENTS_FAILED
+
+load_dotenv()
+
+SEGMENT_PATTERN = "journal-*.jsonl.gz"
+REPLAY_QUEUE_SIZE = 1000
+
+
+class JournalWriter:
+    def __init__(self, directory: Optional[str] = None, segment_records: Optional[int] = None, segment_seconds: Optional[float] = None) -> None:
+        """
+        Append executed statements to a journal of gzip compressed JSON lines segments.
+
+        Every record holds the wall clock start time ("t"), the statement as it was sent
+        ("q"), whether it succeeded ("ok"), its latency in seconds ("l") and, for failures,
+        the error ("e"). A segment is closed and a new one started after segment_records
+        records or segment_seconds seconds, so finished segments can be shipped or pruned
+        while the generator keeps running. Segments are only ever appended to.
+
+        Args:
+            directory (Optional[str]): Journal directory, defaults to JOURNAL_DIR. Journaling is off without one.
+            segment_records (Optional[int]): Records per segment, defaults to JOURNAL_SEGMENT_RECORDS or 100000.
+            segment_seconds (Optional[float]): Maximum segment age, defaults to JOURNAL_SEGMENT_SECONDS or 3600.
+        """
+        self.directory: str = directory if directory is not None else os.getenv("JOURNAL_DIR") or ""
+        self.segment_records: int = segment_records or int(os.getenv("JOURNAL_SEGMENT_RECORDS") or "100000")
+        self.segment_seconds: float = segment_seconds or float(os.getenv("JOURNAL_SEGMENT_SECONDS") or "3600")
+        self._file: Optional[IO[str]] = None
+        self._path: Optional[str] = None
+        self._records = 0
+        self._opened_at = 0.0
+        self._sequence = itertools.count()
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.directory)
+
+    def record(self, results: Iterable[QueryResult]) -> int:
+        """
+        Append results to the current segment.
+
+        Returns:
+            int: Number of records written.
+        """
+        if not self.enabled:
+            return 0
+        written = 0
+        with self._lock:
+            for result in results:
+                if self._file is None or self._records >= self.segment_records or time.monotonic() - self._opened_at >= self.segment_seconds:
+                    self._rotate()
+                entry: Dict[str, Any] = {"t": round(result.started_at or time.time(), 6), "q": result.query, "ok": result.success, "l": round(result.latency, 6)}
+                if not result.success:
+                    entry["e"] = result.error
+                self._file.write(json.dumps(entry, separators=(",", ":")) + "\n")
+                self._records += 1
+                written += 1
+            if self._file is not None:
+                self._file.flush()
+        return written
+
+    def close(self) -> None:
+        """Close the current segment so it is a complete gzip file."""
+        with self._lock:
+            self._close_segment()
+
+    def _rotate(self) -> None:
+        self._close_segment()
+        os.makedirs(self.directory, exist_ok=True)
+        stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S")
+        self._path = os.path.join(self.directory, f"journal-{stamp}-{os.getpid()}-{next(self._sequence):05d}.jsonl.gz")
+        self._file = gzip.open(self._path, "at", encoding="utf-8")
+        self._records = 0
+        self._opened_at = time.monotonic()
+        logging.info(f"Writing journal segment {self._path}.")
+
+    def _close_segment(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+def journal_segments(source: str) -> List[str]:
+    """Segment files of a journal directory in recording order, or [source] for a single file."""
+    if os.path.isdir(source):
+        return sorted(glob.glob(os.path.join(source, SEGMENT_PATTERN)))
+    return [source]
+
+
+def read_journal(source: str) -> Iterator[Dict[str, Any]]:
+    """
+    Yield journal records from a segment file or a journal directory.
+
+    A segment cut short by a crash is read up to its last complete record.
+    """
+    for path in journal_segments(source):
+        try:
+            with gzip.open(path, "rt", encoding="utf-8") as f:
+                for line in f:
+                    if not line.endswith("\n"):
+                        break
+                    yield json.loads(line)
+        except (EOFError, OSError) as e:
+            logging.warning(f"Journal segment {path} is truncated, replaying the records before the cut: {e}")
+
+
+def parse_speed(value: str) -> Optional[float]:
+    """
+    Parse a replay speed such as "1", "10x" or "max".
+
+    Returns:
+        Optional[float]: The speed multiplier, or None to replay as fast as possible.
+    """
+    value = value.strip().lower()
+    if value == "max":
+        return None
+    speed = float(value.rstrip("x"))
+    if speed <= 0:
+        raise ValueError(f"Replay speed must be positive or 'max', got '{value}'.")
+    return speed
+
+
+class JournalReplayer:
+    def __init__(self, db: Database, executor: Optional[QueryExecutor] = None, speed: Optional[str] = None,
+                 concurrency: Optional[int] = None, include_failed: bool = False) -> None:
+        """
+        Re-execute a recorded journal against the configured database without any LLM calls.
+
+        Statements are released at their recorded offsets divided by the speed, and spread
+        over concurrency worker connections by target table, so statements for one table
+        keep their recorded order.
+
+        Args:
+            db (Database): Target database.
+            executor (Optional[QueryExecutor]): Executor for every statement, defaults to EXECUTION_MODE.
+            speed (Optional[str]): "1" for real time, "N" or "Nx" for N times faster, "max" for no pacing.
+                Defaults to REPLAY_SPEED or "1".
+            concurrency (Optional[int]): Worker connections, defaults to REPLAY_CONCURRENCY or 1.
+            include_failed (bool): Also replay statements that failed when they were recorded.
+        """
+        self.db = db
+        self.executor = executor or QueryExecutor()
+        self.speed = parse_speed(speed or os.getenv("REPLAY_SPEED") or "1")
+        self.concurrency: int = concurrency or int(os.getenv("REPLAY_CONCURRENCY") or "1")
+        if self.concurrency < 1:
+            raise EnvironmentError(f"Invalid REPLAY_CONCURRENCY '{self.concurrency}', expected at least 1.")
+        if self.db.pool_max < self.concurrency:
+            logging.warning(f"Raising POSTGRES_POOL_MAX to {self.concurrency} to fit the replay workers.")
+            self.db.pool_max = self.concurrency
+        self.include_failed = include_failed
+        self.max_lag = 0.0
+
+    def replay(self, source: str, stop_event: Optional[threading.Event] = None) -> ExecutionReport:
+        """
+        Replay a journal file or directory until it ends or stop_event is set.
+
+        Returns:
+            ExecutionReport: Statements replayed, how many succeeded, and their latencies.
+        """
+        stop_event = stop_event or threading.Event()
+        queues: List[queue.Queue] = [queue.Queue(maxsize=REPLAY_QUEUE_SIZE) for _ in range(self.concurrency)]
+        results: List[QueryResult] = []
+        lock = threading.Lock()
+        threads = [
+            threading.Thread(target=self._work, args=(q, results, lock, stop_event), name=f"replay-worker-{i}", daemon=True)
+            for i, q in enumerate(queues)
+        ]
+        for thread in threads:
+            thread.start()
+        round_robin = itertools.cycle(range(self.concurrency))
+        start = time.monotonic()
+        first: Optional[float] = None
+        try:
+            for record in read_journal(source):
+                if stop_event.is_set():
+                    break
+                if not record.get("ok") and not self.include_failed:
+                    continue
+                if first is None:
+                    first = record["t"]
+                if self.speed is not None:
+                    delay = start + (record["t"] - first) / self.speed - time.monotonic()
+                    if delay > 0 and stop_event.wait(delay):
+                        break
+                    self.max_lag = max(self.max_lag, -delay)
+                table = target_table(record["q"])
+                worker = hash(table) % self.concurrency if table else next(round_robin)
+                queues[worker].put(record["q"])
+        finally:
+            for q in queues:
+                q.put(None)
+            for thread in threads:
+                thread.join()
+        elapsed = time.monotonic() - start
+        report = ExecutionReport(
+            statements=len(results),
+            succeeded=sum(1 for result in results if result.success),
+            elapsed=elapsed,
+            workers=self.concurrency,
+            latencies=[result.latency for result in results],
+        )
+        logging.info(f"Replayed {report.summary()}, at most {self.max_lag:.2f}s behind schedule.")
+        return report
+
+    def _work(self, statements: queue.Queue, results: List[QueryResult], lock: threading.Lock, stop_event: threading.Event) -> None:
+        try:
+            with self.db.borrow() as conn:
+                while True:
+                    query = statements.get()
+                    if query is None:
+                        return
+                    if stop_event.is_set():
+                        continue
+                    with STAGE_LATENCY.time(stage="replay"):
+                        executed = self.executor.execute(conn, [query])
+                    for result in executed:
+                        table = target_table(result.query) or "unknown"
+                        (STATEMENTS_EXECUTED if result.success else STATEMENTS_FAILED).inc(table=table)
+                    with lock:
+                        results.extend(executed)
+        except Exception as e:
+            logging.error(f"Replay worker failed, stopping the replay: {e}")
+            stop_event.set()
+            while statements.get() is not None:
+                pass
@@ -0,0 +1,179 @@
+import os
+import time
+import logging
+import threading
+from dataclasses import dataclass
+from typing import Callable, Optional
+from dotenv import load_dotenv
+
+load_dotenv()
+
+IDLE_BACKOFF_SECONDS = 1.0
+
+
+class TokenBucket:
+    def __init__(self, rate: float, max_catch_up: float = 1.0, clock: Callable[[], float] = time.monotonic) -> None:
+        """
+        Token bucket pacer.
+
+        Tokens accrue at rate per second up to rate * max_catch_up. When execution falls
+        behind, the backlog it may work off in a burst is bounded by that capacity, so a
+        slow database is not hammered with everything it missed once it recovers.
+
+        Args:
+            rate (float): Tokens per second.
+            max_catch_up (float): Seconds of tokens the bucket can hold.
+            clock (Callable[[], float]): Monotonic clock, injectable for tests.
+        """
+        self.max_catch_up = max_catch_up
+        self.clock = clock
+        self.rate = 0.0
+        self.capacity = 1.0
+        self.tokens = 0.0
+        self._updated = clock()
+        self.set_rate(rate)
+
+    def set_rate(self, rate: float) -> None:
+        self._refill()
+        self.rate = max(rate, 0.0)
+        self.capacity = max(self.rate * self.max_catch_up, 1.0)
+        self.tokens = min(self.tokens, self.capacity)
+
+    def wait_time(self, n: float) -> float:
+        """Seconds until n tokens are available, 0.0 if they are available now."""
+        self._refill()
+        n = min(n, self.capacity)
+        if self.tokens >= n:
+            return 0.0
+        if self.rate <= 0:
+            return float("inf")
+        return (n - self.tokens) / self.rate
+
+    def try_acquire(self, n: float) -> bool:
+        """Take n tokens (at most the capacity) if they are available."""
+        if self.wait_time(n) > 0:
+            return False
+        self.tokens -= min(n, self.capacity)
+        return True
+
+    def _refill(self) -> None:
+        now = self.clock()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+
+@dataclass
+class LoadProfile:
+    """
+    Target rate over time: linear ramp up, hold, linear ramp down, with optional bursts.
+
+    A hold of 0 holds the target rate until stopped. Bursts raise the rate to burst_rate
+    for the last burst_seconds of every burst_interval seconds once the ramp up is over.
+    """
+
+    target_rate: float
+    ramp_up: float = 0.0
+    hold: float = 0.0
+    ramp_down: float = 0.0
+    burst_rate: float = 0.0
+    burst_interval: float = 0.0
+    burst_seconds: float = 0.0
+
+    @classmethod
+    def from_env(cls) -> "LoadProfile":
+        target_rate = float(os.getenv("LOAD_TARGET_RATE") or "10")
+        if target_rate <= 0:
+            raise EnvironmentError("LOAD_TARGET_RATE must be positive.")
+        return cls(
+            target_rate=target_rate,
+            ramp_up=float(os.getenv("LOAD_RAMP_UP_SECONDS") or "0"),
+            hold=float(os.getenv("LOAD_HOLD_SECONDS") or "0"),
+            ramp_down=float(os.getenv("LOAD_RAMP_DOWN_SECONDS") or "0"),
+            burst_rate=float(os.getenv("LOAD_BURST_RATE") or "0"),
+            burst_interval=float(os.getenv("LOAD_BURST_INTERVAL_SECONDS") or "0"),
+            burst_seconds=float(os.getenv("LOAD_BURST_SECONDS") or "0"),
+        )
+
+    @property
+    def duration(self) -> Optional[float]:
+        """Total length of the profile in seconds, or None if it holds until stopped."""
+        if self.hold <= 0:
+            return None
+        return self.ramp_up + self.hold + self.ramp_down
+
+    def rate_at(self, elapsed: float) -> Optional[float]:
+        """
+        Target rate at elapsed seconds into the profile.
+
+        Returns:
+            Optional[float]: Units per second, or None once the profile is over.
+        """
+        duration = self.duration
+        if duration is not None and elapsed >= duration:
+            return None
+        if elapsed < self.ramp_up:
+            return self.target_rate * elapsed / self.ramp_up
+        if duration is not None and elapsed >= self.ramp_up + self.hold:
+            return self.target_rate * (duration - elapsed) / self.ramp_down
+        if self.burst_rate > 0 and self.burst_interval > 0 and self.burst_seconds > 0:
+            if (elapsed - self.ramp_up) % self.burst_interval >= self.burst_interval - self.burst_seconds:
+                return self.burst_rate
+        return self.target_rate
+
+
+class RateRunner:
+    def __init__(self, profile: LoadProfile, work: Callable[[int], int]) -> None:
+        """
+        Drive work at the rate a LoadProfile asks for.
+
+        Args:
+            profile (LoadProfile): Target rate over time.
+            work (Callable[[int], int]): Performs up to the given number of units
+                (statements or rows) and returns how many it performed.
+        """
+        self.profile = profile
+        self.work = work
+        self.chunk_seconds: float = float(os.getenv("LOAD_CHUNK_SECONDS") or "0.1")
+        self.report_seconds: float = float(os.getenv("LOAD_REPORT_SECONDS") or "10")
+        self.bucket = TokenBucket(0.0, float(os.getenv("LOAD_MAX_CATCH_UP_SECONDS") or "1"))
+        self.completed = 0
+
+    def chunk_size(self) -> int:
+        """Units requested per work call: chunk_seconds worth of the current rate, at least one."""
+        return max(1, min(int(self.bucket.rate * self.chunk_seconds), int(self.bucket.capacity)))
+
+    def run(self, stop: threading.Event) -> int:
+        """
+        Pace work until the profile ends or stop is set.
+
+        Returns:
+            int: Units completed.
+        """
+        start = time.monotonic()
+        window_start, window_done = start, 0
+        while not stop.is_set():
+            now = time.monotonic()
+            rate = self.profile.rate_at(now - start)
+            if rate is None:
+                break
+            self.bucket.set_rate(rate)
+            chunk = self.chunk_size()
+            wait = self.bucket.wait_time(chunk)
+            if wait > 0:
+                stop.wait(min(wait, self.chunk_seconds))
+                continue
+            self.bucket.try_acquire(chunk)
+            done = self.work(chunk)
+            self.completed += done
+            window_done += done
+            if done == 0:
+                stop.wait(IDLE_BACKOFF_SECONDS)
+            now = time.monotonic()
+            if now - window_start >= self.report_seconds:
+                achieved = window_done / (now - window_start)
+                logging.info(f"Load rate: {achieved:.1f}/s achieved, {rate:.1f}/s target.")
+                if achieved < 0.9 * rate:
+                    logging.warning("Database is falling behind the target rate; catch-up is capped by LOAD_MAX_CATCH_UP_SECONDS.")
+                window_start, window_done = now, 0
+        logging.info(f"Rate-controlled load finished after {self.completed} units.")
+        return self.completed
@@ -0,0 +1,158 @@
+import os
+import queue
+import atexit
+import random
+import logging
+import threading
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from typing import Dict, List, Optional, Sequence
+from dotenv import load_dotenv
+from .metrics import LOG_RECORDS_DROPPED
+
+load_dotenv()
+
+LOG_FORMAT = "%(asctime)s - %(levelname)s - %(message)s"
+# Loggers for the high-volume categories; everything else logs through the root logger.
+CATEGORIES = {
+    "query": "synpg.query",
+    "llm": "synpg.llm",
+    "schema": "synpg.schema",
+}
+
+# How long warnings, errors and summaries wait for room in a full log queue.
+BLOCK_SECONDS = 1.0
+
+_listener: Optional[QueueListener] = None
+_lock = threading.Lock()
+
+
+class SampleFilter(logging.Filter):
+    def __init__(self, rate: float, rng: Optional[random.Random] = None) -> None:
+        """
+        Keep a random share of records below WARNING; warnings and errors always pass.
+
+        Args:
+            rate (float): Share of INFO and DEBUG records kept, between 0 and 1.
+            rng (Optional[random.Random]): Random source, mainly for tests.
+        """
+        super().__init__()
+        self.rate = rate
+        self.random = (rng or random.Random()).random
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        return record.levelno >= logging.WARNING or self.rate >= 1.0 or self.random() < self.rate
+
+
+class DroppingQueueHandler(QueueHandler):
+    """
+    QueueHandler for an in-process queue that leaves formatting to the listener thread.
+
+    When the queue is full, INFO and DEBUG records of the high-volume categories (and DEBUG
+    records of any logger) are dropped and counted instead of blocking the caller. Warnings,
+    errors and the per-batch summaries on other loggers wait up to block_seconds for room,
+    and are then written straight to the fallback handlers, so they are never lost.
+    """
+
+    def __init__(self, log_queue: queue.Queue, fallback: Sequence[logging.Handler] = (), block_seconds: float = BLOCK_SECONDS) -> None:
+        super().__init__(log_queue)
+        self.fallback = list(fallback)
+        self.block_seconds = block_seconds
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+            return
+        except queue.Full:
+            if droppable(record):
+                LOG_RECORDS_DROPPED.inc()
+                return
+        try:
+            self.queue.put(record, timeout=self.block_seconds)
+        except queue.Full:
+            for handler in self.fallback:
+                if record.levelno >= handler.level:
+                    handler.handle(record)
+
+
+def droppable(record: logging.LogRecord) -> bool:
+    """Whether a record may be dropped under backpressure: high-volume category chatter and debug output."""
+    if record.levelno >= logging.WARNING:
+        return False
+    return record.levelno < logging.INFO or record.name in CATEGORIES.values()
+
+
+def parse_levels(value: str) -> Dict[str, int]:
+    """
+    Parse per-category levels such as "query=WARNING,llm=DEBUG".
+
+    Returns:
+        Dict[str, int]: Logger name to level. Unknown categories are taken as logger names.
+    """
+    levels = {}
+    for item in filter(None, (part.strip() for part in value.split(","))):
+        name, _, level = item.partition("=")
+        if not level or not isinstance(logging.getLevelName(level.strip().upper()), int):
+            raise EnvironmentError(f"Invalid LOG_LEVELS entry '{item}', expected category=LEVEL.")
+        levels[CATEGORIES.get(name.strip(), name.strip())] = logging.getLevelName(level.strip().upper())
+    return levels
+
+
+def configure_logging() -> None:
+    """
+    Route all logging through a queue drained by a background writer thread.
+
+    Callers only enqueue records; formatting and I/O happen on the listener thread,
+    which writes to stderr and to a size-rotated LOG_FILE. Per-statement success logs
+    on the query category are sampled with LOG_QUERY_SAMPLE_RATE, while failures and
+    the per-batch summaries on the root logger are always kept, also when the queue is
+    full (see DroppingQueueHandler). Safe to call repeatedly.
+
+    Settings:
+        LOG_LEVEL (INFO), LOG_LEVELS (per category, e.g. "query=WARNING,llm=DEBUG"),
+        LOG_FILE (data_generator.log, empty to disable), LOG_MAX_BYTES (10 MB),
+        LOG_BACKUP_COUNT (5), LOG_QUEUE_SIZE (10000), LOG_QUERY_SAMPLE_RATE (0.01).
+    """
+    global _listener
+    with _lock:
+        if _listener is not None:
+            return
+        formatter = logging.Formatter(LOG_FORMAT)
+        handlers: List[logging.Handler] = [logging.StreamHandler()]
+        path = os.getenv("LOG_FILE", "data_generator.log")
+        if path:
+            handlers.append(RotatingFileHandler(
+                path,
+                maxBytes=int(os.getenv("LOG_MAX_BYTES") or str(10 * 2 ** 20)),
+                backupCount=int(os.getenv("LOG_BACKUP_COUNT") or "5"),
+            ))
+        for handler in handlers:
+            handler.setFormatter(formatter)
+        log_queue: queue.Queue = queue.Queue(int(os.getenv("LOG_QUEUE_SIZE") or "10000"))
+        root = logging.getLogger()
+        for handler in list(root.handlers):
+            root.removeHandler(handler)
+        root.addHandler(DroppingQueueHandler(log_queue, handlers))
+        root.setLevel(os.getenv("LOG_LEVEL", "INFO").upper())
+        for name, level in parse_levels(os.getenv("LOG_LEVELS") or "").items():
+            logging.getLogger(name).setLevel(level)
+        query_logger = logging.getLogger(CATEGORIES["query"])
+        for existing in [f for f in query_logger.filters if isinstance(f, SampleFilter)]:
+            query_logger.removeFilter(existing)
+        query_logger.addFilter(SampleFilter(float(os.getenv("LOG_QUERY_SAMPLE_RATE") or "0.01")))
+        _listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+        _listener.start()
+    atexit.register(shutdown_logging)
+
+
+def shutdown_logging() -> None:
+    """Flush queued records and stop the writer thread."""
+    global _listener
+    with _lock:
+        listener, _listener = _listener, None
+    if listener is not None:
+        listener.stop()
+        for handler in listener.handlers:
+            handler.close()
@@ -0,0 +1,136 @@
+import os
+import queue
+import logging
+import threading
+from typing import List, Optional, Tuple
+from dotenv import load_dotenv
+from .gpt import GPTQueryGenerator
+from .schema_cache import ddl_signature
+
+load_dotenv()
+
+ERROR_BACKOFF_SECONDS = 5.0
+
+
+class QueryPrefetcher:
+    def __init__(self, gpt: GPTQueryGenerator, depth: Optional[int] = None) -> None:
+        """
+        Keep a bounded queue of LLM-generated query batches filled ahead of demand.
+
+        Producer threads call the LLM while the executor is busy with the previous batch,
+        so LLM latency is hidden from per-run throughput.
+
+        Args:
+            gpt (GPTQueryGenerator): Generator used by the producer threads.
+            depth (Optional[int]): Maximum number of ready batches, defaults to PREFETCH_DEPTH.
+        """
+        self.gpt = gpt
+        self.depth: int = depth if depth is not None else int(os.getenv("PREFETCH_DEPTH") or "0")
+        self.concurrency: int = int(os.getenv("PREFETCH_CONCURRENCY") or "2")
+        self.completions: int = int(os.getenv("PREFETCH_COMPLETIONS") or "1")
+        self.timeout: float = float(os.getenv("PREFETCH_TIMEOUT_SECONDS") or "120")
+        self.batches: "queue.Queue[Tuple[str, List[str]]]" = queue.Queue(maxsize=max(self.depth, 1))
+        self._shards: List[List[str]] = []
+        self._cursor = 0
+        self._signature: Optional[str] = None
+        self._ddl_ready = threading.Event()
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._threads: List[threading.Thread] = []
+
+    @property
+    def enabled(self) -> bool:
+        return self.depth > 0
+
+    def start(self) -> None:
+        """Start the producer threads if they are not running yet and the prefetcher was not stopped."""
+        with self._lock:
+            if self._threads or self._stop.is_set():
+                return
+            for i in range(max(self.concurrency, 1)):
+                thread = threading.Thread(target=self._produce, name=f"query-prefetch-{i}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+        logging.info(f"Query prefetcher started (depth={self.depth}, concurrency={self.concurrency}, n={self.completions}).")
+
+    def update_ddl(self, ddl: List[str], shards: Optional[List[List[str]]] = None) -> None:
+        """
+        Set the schema the producers generate for; batches for an older schema are dropped.
+
+        Args:
+            ddl (List[str]): Full schema DDL, identifies the schema version.
+            shards (Optional[List[List[str]]]): Prompt schema shards, which producers take
+                in rotation. Defaults to the whole DDL as a single shard.
+        """
+        signature = ddl_signature(ddl)
+        with self._lock:
+            if signature == self._signature:
+                return
+            self._shards = shards or [ddl]
+            self._cursor = 0
+            self._signature = signature
+        self._ddl_ready.set()
+
+    def get(self, timeout: Optional[float] = None) -> Optional[List[str]]:
+        """
+        Take the next ready batch, waiting up to timeout seconds (PREFETCH_TIMEOUT_SECONDS by default).
+
+        Returns:
+            Optional[List[str]]: The batch, or None if nothing was produced in time or the prefetcher was stopped.
+        """
+        self.start()
+        remaining = self.timeout if timeout is None else timeout
+        while True:
+            try:
+                if self._stop.is_set():
+                    signature, batch = self.batches.get_nowait()
+                else:
+                    signature, batch = self.batches.get(timeout=remaining)
+            except queue.Empty:
+                if not self._stop.is_set():
+                    logging.warning("No prefetched query batch was ready in time.")
+                return None
+            if signature is None:
+                return None
+            if signature == self._signature:
+                return batch
+            logging.info("Discarding query batch generated for an outdated schema.")
+
+    def queue_depth(self) -> int:
+        return self.batches.qsize()
+
+    def stop(self) -> None:
+        """
+        Stop the producer threads for good and wake up a waiting get. In-flight LLM calls
+        finish but their batches are dropped.
+        """
+        self._stop.set()
+        self._ddl_ready.set()
+        try:
+            self.batches.put_nowait((None, []))
+        except queue.Full:
+            pass
+        with self._lock:
+            threads, self._threads = self._threads, []
+        for thread in threads:
+            thread.join(timeout=1)
+
+    def _produce(self) -> None:
+        while not self._stop.is_set():
+            self._ddl_ready.wait()
+            if self._stop.is_set():
+                return
+            with self._lock:
+                shard = self._shards[self._cursor % len(self._shards)]
+                self._cursor += 1
+                signature = self._signature
+            batches = [batch for batch in self.gpt.generate_query_batches(shard, n=self.completions) if batch]
+            if not batches:
+                self._stop.wait(ERROR_BACKOFF_SECONDS)
+            for batch in batches:
+                while not self._stop.is_set():
+                    try:
+                        self.batches.put((signature, batch), timeout=0.5)
+                        break
+                    except queue.Full:
+                        continue
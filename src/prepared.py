@@ -0,0 +1,134 @@
+import os
+import hashlib
+import logging
+import threading
+from decimal import Decimal
+from collections import OrderedDict
+from weakref import WeakKeyDictionary
+from typing import List, NamedTuple, Optional
+from psycopg2.extensions import connection, cursor
+from dotenv import load_dotenv
+from .sql_parser import Literal, lift_literals, significant, tokenize
+
+load_dotenv()
+
+STATEMENT_PREFIX = "synpg_"
+PREPARE_SAVEPOINT = "synpg_prepare"
+# SQLSTATEs of "prepared statement ... does not exist" and "... already exists".
+INVALID_STATEMENT_NAME = "26000"
+DUPLICATE_STATEMENT = "42P05"
+
+query_log = logging.getLogger("synpg.query")
+
+
+class BoundStatement(NamedTuple):
+    query: str
+    text: str
+    values: List[object]
+    returning: bool
+
+
+def bind_value(literal: Literal) -> object:
+    """
+    Convert a lifted literal into the parameter value sent to EXECUTE.
+
+    Integers and booleans are bound as typed values and other numbers as Decimal, so no
+    precision is lost. Everything else stays a string, which the server coerces to the
+    parameter type it inferred at PREPARE time, just as it would coerce the original literal.
+    """
+    if literal.type == "float" and literal.text:
+        return Decimal(literal.text)
+    return literal.value
+
+
+def bind(query: str) -> Optional[BoundStatement]:
+    """
+    Lift the data literals of a statement into numbered parameters.
+
+    Returns:
+        Optional[BoundStatement]: The statement text with $1..$n placeholders and the bound values,
+        or None when the statement has no liftable literals.
+    """
+    parts, literals = lift_literals(query.strip().rstrip(";"))
+    if not literals:
+        return None
+    text = parts[0] + "".join(f"${i + 1}{part}" for i, part in enumerate(parts[1:]))
+    returning = any(token.depth == 0 and token.text.upper() == "RETURNING" for _, token in significant(tokenize(text)))
+    return BoundStatement(query, text, [bind_value(literal) for literal in literals], returning)
+
+
+def statement_name(text: str) -> str:
+    return STATEMENT_PREFIX + hashlib.sha1(text.encode()).hexdigest()[:16]
+
+
+def execute_template(name: str, parameters: int) -> str:
+    """EXECUTE of a prepared statement with psycopg2 placeholders for its parameters."""
+    return f"EXECUTE {name} ({', '.join(['%s'] * parameters)})"
+
+
+class PreparedStatementCache:
+    def __init__(self, capacity: Optional[int] = None) -> None:
+        """
+        Keep named prepared statements per connection, one per statement shape.
+
+        A shape is prepared on a connection the first time it runs there, so Postgres parses
+        and plans it once instead of for every literal statement. Each connection keeps its
+        most recently used shapes; the least recently used one is deallocated when the cache
+        is full. Shapes the server refuses to prepare are remembered and run as literal SQL.
+
+        Args:
+            capacity (Optional[int]): Prepared statements per connection, defaults to PREPARED_CACHE_SIZE or 100.
+        """
+        self.capacity: int = capacity or int(os.getenv("PREPARED_CACHE_SIZE") or "100")
+        if self.capacity < 1:
+            raise EnvironmentError(f"Invalid PREPARED_CACHE_SIZE '{self.capacity}', expected at least 1.")
+        self._connections: "WeakKeyDictionary[connection, OrderedDict[str, Optional[str]]]" = WeakKeyDictionary()
+        self._lock = threading.Lock()
+
+    def prepare(self, conn: connection, cur: cursor, text: str) -> Optional[str]:
+        """
+        Return the name of the statement prepared for text on conn, preparing it if needed.
+
+        Must run inside a transaction; the PREPARE gets its own savepoint so a refusal does
+        not abort it.
+
+        Returns:
+            Optional[str]: The statement name, or None if the shape cannot be prepared.
+        """
+        with self._lock:
+            statements = self._connections.setdefault(conn, OrderedDict())
+        if text in statements:
+            statements.move_to_end(text)
+            return statements[text]
+        name: Optional[str] = statement_name(text)
+        try:
+            cur.execute(f"SAVEPOINT {PREPARE_SAVEPOINT}; PREPARE {name} AS {text}; RELEASE SAVEPOINT {PREPARE_SAVEPOINT};")
+        except Exception as e:
+            cur.execute(f"ROLLBACK TO SAVEPOINT {PREPARE_SAVEPOINT}; RELEASE SAVEPOINT {PREPARE_SAVEPOINT};")
+            if getattr(e, "pgcode", None) != DUPLICATE_STATEMENT:
+                query_log.debug("Could not prepare %s, running it as literal SQL: %s", text, e)
+                name = None
+        statements[text] = name
+        if len(statements) > self.capacity:
+            _, evicted = statements.popitem(last=False)
+            if evicted is not None:
+                cur.execute(f"DEALLOCATE {evicted};")
+        return name
+
+    def render(self, conn: connection, cur: cursor, query: str) -> str:
+        """Return an EXECUTE of the prepared shape of query with its literals bound, or query itself."""
+        bound = bind(query)
+        if bound is None:
+            return query
+        name = self.prepare(conn, cur, bound.text)
+        if name is None:
+            return query
+        return cur.mogrify(execute_template(name, len(bound.values)), bound.values).decode()
+
+    def forget(self, conn: connection) -> None:
+        """Drop what is known about conn, e.g. after the server reported a missing prepared statement."""
+        with self._lock:
+            self._connections.pop(conn, None)
+
+    def size(self, conn: connection) -> int:
+        return len(self._connections.get(conn, ()))
@@ -0,0 +1,103 @@
+import ast
+import logging
+from typing import List, Optional
+
+
+class IncrementalListParser:
+    """
+    Incremental parser for an LLM completion holding a Python list of SQL strings.
+
+    Text is fed in arbitrary chunks as it streams in, and every string literal is
+    returned as soon as its closing quote arrives. Anything before the opening
+    bracket (code fences, "sql_queries = ") is ignored, and a completion cut off
+    mid-list still yields every string that was completed before the cut.
+    """
+
+    def __init__(self) -> None:
+        self.started = False
+        self.finished = False
+        self._pending = ""
+        self._depth = 0
+        self._quote: Optional[str] = None
+        self._literal: List[str] = []
+        self._escaped = False
+        self._comment = False
+
+    def feed(self, text: str) -> List[str]:
+        """
+        Consume the next chunk of the completion.
+
+        Returns:
+            List[str]: The strings completed by this chunk, in order.
+        """
+        completed = []
+        data = self._pending + text
+        self._pending = ""
+        i = 0
+        while i < len(data) and not self.finished:
+            char = data[i]
+            if self._quote is not None:
+                i = self._consume_string(data, i, completed)
+                continue
+            if not self.started:
+                if char == "[":
+                    self.started = True
+                    self._depth = 1
+                i += 1
+                continue
+            if self._comment:
+                self._comment = char != "\n"
+                i += 1
+                continue
+            if char in ("'", '"'):
+                if len(data) - i < 3:
+                    self._pending = data[i:]
+                    break
+                quote = char * 3 if data[i:i + 3] == char * 3 else char
+                self._quote = quote
+                self._literal = [quote]
+                i += len(quote)
+                continue
+            if char == "#":
+                self._comment = True
+            elif char in "([{":
+                self._depth += 1
+            elif char in ")]}":
+                self._depth -= 1
+                if self._depth == 0:
+                    self.finished = True
+            i += 1
+        return completed
+
+    def _consume_string(self, data: str, i: int, completed: List[str]) -> int:
+        char = data[i]
+        if self._escaped:
+            self._escaped = False
+            self._literal.append(char)
+            return i + 1
+        if char == "\\":
+            self._escaped = True
+            self._literal.append(char)
+            return i + 1
+        quote = self._quote
+        if len(quote) == 3 and data[i:i + 3] != quote:
+            if char == quote[0] and len(data) - i < 3:
+                self._pending = data[i:]
+                return len(data)
+            self._literal.append(char)
+            return i + 1
+        if char != quote[0]:
+            self._literal.append(char)
+            return i + 1
+        self._literal.append(quote)
+        self._quote = None
+        literal = "".join(self._literal)
+        self._literal = []
+        try:
+            value = ast.literal_eval(literal)
+        except (SyntaxError, ValueError) as e:
+            logging.warning(f"Skipping malformed string in LLM response: {e}")
+        else:
+            if self._depth == 1 and isinstance(value, str) and value.strip():
+                completed.append(value)
+        return i + len(quote)
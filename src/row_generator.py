@@ -0,0 +1,407 @@
+import io
+import csv
+import os
+import uuid
+import random
+import itertools
+import string
+import logging
+from datetime import date, datetime, timedelta
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+from psycopg2.extensions import connection
+from dotenv import load_dotenv
+from .sql_parser import quote_ident
+
+load_dotenv()
+
+ColumnArray = List[Optional[str]]
+
+WORD_POOL_SIZE = 4096
+COPY_BUFFER_SIZE = 1 << 16
+INTEGER_RANGES = {
+    "smallint": (1, 32767),
+    "integer": (1, 2 ** 31 - 1),
+    "bigint": (1, 2 ** 53),
+}
+FLOAT_TYPES = ("numeric", "real", "double precision")
+MAX_DISTINCT_POOL = 10000
+
+
+class CsvCopyStream:
+    """
+    File-like object that renders generated batches as CSV on demand.
+
+    psycopg2's copy_expert pulls from it with read(size), so rows are generated
+    while COPY streams and never materialized for the whole table at once.
+    """
+
+    def __init__(self, batches: Iterator[List[ColumnArray]]) -> None:
+        self._batches = batches
+        self._buffer = ""
+        self._offset = 0
+        self.rows = 0
+
+    def read(self, size: int = -1) -> str:
+        if self._offset >= len(self._buffer):
+            batch = next(self._batches, None)
+            if batch is None:
+                return ""
+            out = io.StringIO()
+            rows = list(zip(*batch))
+            csv.writer(out, lineterminator="\n").writerows(rows)
+            self.rows += len(rows)
+            self._buffer = out.getvalue()
+            self._offset = 0
+        end = len(self._buffer) if size < 0 else self._offset + size
+        chunk = self._buffer[self._offset:end]
+        self._offset += len(chunk)
+        return chunk
+
+    def readline(self, size: int = -1) -> str:
+        return self.read(size)
+
+
+class ColumnSampler:
+    def __init__(self, column: Dict[str, Any], stats: Dict[str, Any], fallback: Callable[[Dict[str, Any], int], ColumnArray],
+                 rng: random.Random) -> None:
+        """
+        Sample values for one column from its pg_stats entry (see Database.get_column_stats).
+
+        A row is NULL with probability null_frac, otherwise one of the most common values
+        with their frequencies, otherwise a value from a uniformly chosen bucket of the
+        equi-depth histogram, interpolated inside the bucket for numeric and date types.
+        Other types, and columns without a histogram, keep the column's cardinality instead:
+        a pool of n_distinct values (starting with the histogram bounds) filled by the type
+        generator, or fresh values when the column has more distinct values than the pool holds.
+        Without n_distinct the histogram bounds or the most common values are used alone.
+
+        Args:
+            column (Dict[str, Any]): Column metadata.
+            stats (Dict[str, Any]): null_frac, n_distinct, most_common_vals, most_common_freqs, histogram_bounds
+                and the table's reltuples.
+            fallback (Callable[[Dict[str, Any], int], ColumnArray]): Type generator for values the stats do not cover.
+            rng (random.Random): Random source shared with the row generator.
+        """
+        self.column = column
+        self.fallback = fallback
+        self.rng = rng
+        self.null_frac: float = (stats.get("null_frac") or 0.0) if column["nullable"] else 0.0
+        self.mcv: List[str] = list(stats.get("most_common_vals") or [])
+        freqs = list(stats.get("most_common_freqs") or [])[:len(self.mcv)]
+        self.mcv = self.mcv[:len(freqs)]
+        self.mcv_cum = list(itertools.accumulate(freqs))
+        self.bounds: List[str] = list(stats.get("histogram_bounds") or [])
+        if len(self.bounds) < 2:
+            self.bounds = []
+        self.n_distinct: float = stats.get("n_distinct") or 0.0
+        self.reltuples: float = stats.get("reltuples") or 0.0
+        self.mcv_total: float = self.mcv_cum[-1] if self.mcv_cum else 0.0
+        if not self.bounds and self.mcv:
+            self.mcv_total = 1.0 - self.null_frac
+        self._points = self._parse_bounds()
+        self._pool: Optional[ColumnArray] = None
+
+    def sample(self, n: int) -> ColumnArray:
+        rnd = self.rng.random
+        null_cut = self.null_frac
+        mcv_cut = null_cut + self.mcv_total
+        draws = [rnd() for _ in range(n)]
+        n_mcv = sum(1 for u in draws if null_cut <= u < mcv_cut)
+        n_rest = sum(1 for u in draws if u >= mcv_cut)
+        common = iter(self.rng.choices(self.mcv, cum_weights=self.mcv_cum, k=n_mcv) if n_mcv else ())
+        rest = iter(self._rest(n_rest) if n_rest else ())
+        return [None if u < null_cut else next(common) if u < mcv_cut else next(rest) for u in draws]
+
+    def _rest(self, n: int) -> ColumnArray:
+        if self.bounds and self._points is not None:
+            points, render = self._points
+            rnd = self.rng.random
+            buckets = self.rng.choices(range(len(self.bounds) - 1), k=n)
+            return [render(points[b] + rnd() * (points[b + 1] - points[b])) for b in buckets]
+        size = self._distinct_rest()
+        if size is None:
+            if self.bounds:
+                buckets = self.rng.choices(range(len(self.bounds) - 1), k=n)
+                return [self.bounds[b + (self.rng.random() < 0.5)] for b in buckets]
+            return self.fallback(self.column, n)
+        if size > MAX_DISTINCT_POOL and self.n_distinct < 0:
+            return self.fallback(self.column, n)
+        if self._pool is None:
+            size = min(size, MAX_DISTINCT_POOL)
+            self._pool = self.bounds[:size] + self.fallback(self.column, max(size - len(self.bounds), 0))
+        return self.rng.choices(self._pool, k=n)
+
+    def _distinct_rest(self) -> Optional[float]:
+        """
+        Estimated distinct values outside the most common ones, or None when pg_stats does not know.
+
+        A negative n_distinct is a fraction of the row count (reltuples); without a row count
+        such a column is taken to have unbounded distinct values.
+        """
+        if self.n_distinct > 0:
+            distinct = self.n_distinct
+        elif self.n_distinct < 0:
+            distinct = -self.n_distinct * self.reltuples if self.reltuples > 0 else float("inf")
+        else:
+            return None
+        return max(distinct - len(self.mcv), 1)
+
+    def _parse_bounds(self) -> Optional[Tuple[List[float], Callable[[float], str]]]:
+        """Histogram bounds as numbers plus a function rendering a number back to text, when the type allows it."""
+        data_type = self.column["type"]
+        try:
+            if data_type in INTEGER_RANGES:
+                return [float(b) for b in self.bounds], lambda x: str(int(x))
+            if data_type in FLOAT_TYPES:
+                scale = self.column.get("scale")
+                if data_type == "numeric" and scale is not None:
+                    return [float(b) for b in self.bounds], lambda x: f"{x:.{scale}f}"
+                return [float(b) for b in self.bounds], repr
+            if data_type == "date":
+                return [float(date.fromisoformat(b).toordinal()) for b in self.bounds], lambda x: date.fromordinal(int(x)).isoformat()
+            if data_type == "timestamp without time zone":
+                return [datetime.fromisoformat(b).timestamp() for b in self.bounds], lambda x: datetime.fromtimestamp(int(x)).isoformat(" ")
+        except ValueError:
+            return None
+        return None
+
+
+class RowGenerator:
+    def __init__(self, columns: Dict[str, List[Dict[str, Any]]], seed: Optional[int] = None, sequence_start: int = 0) -> None:
+        """
+        Initialize the native row generator.
+
+        Args:
+            columns (Dict[str, List[Dict[str, Any]]]): Column metadata from Database.get_table_columns.
+            seed (Optional[int]): Seed for reproducible output.
+            sequence_start (int): First value of the counter that keeps text values unique, so
+                generators loading the same table in parallel do not collide.
+        """
+        self.columns = columns
+        self.key_sources: Dict[Tuple[str, str], Any] = {}
+        self.samplers: Dict[Tuple[str, str], ColumnSampler] = {}
+        self.batch_size: int = int(os.getenv("NATIVE_BATCH_SIZE") or "10000")
+        self.rng = random.Random(seed)
+        self.words = [
+            "".join(self.rng.choices(string.ascii_lowercase, k=self.rng.randint(4, 10)))
+            for _ in range(WORD_POOL_SIZE)
+        ]
+        self._sequence = sequence_start
+        self._days: List[str] = []
+        end = datetime.now().replace(microsecond=0)
+        self.set_time_range(end - timedelta(days=365), end)
+        self.generators: Dict[str, Callable[[Dict[str, Any], int], ColumnArray]] = {
+            "smallint": self._integers,
+            "integer": self._integers,
+            "bigint": self._integers,
+            "numeric": self._numerics,
+            "money": self._numerics,
+            "real": self._floats,
+            "double precision": self._floats,
+            "boolean": self._booleans,
+            "text": self._texts,
+            "character varying": self._texts,
+            "character": self._texts,
+            "date": self._dates,
+            "timestamp without time zone": self._timestamps,
+            "timestamp with time zone": self._timestamps,
+            "time without time zone": self._times,
+            "time with time zone": self._times,
+            "interval": self._intervals,
+            "uuid": self._uuids,
+            "json": self._jsons,
+            "jsonb": self._jsons,
+            "bytea": self._byteas,
+            "inet": self._inets,
+            "cidr": self._inets,
+        }
+
+    def set_time_range(self, start: datetime, end: datetime) -> None:
+        """
+        Set the window [start, end) that date and timestamp columns are drawn from.
+
+        Dates are the days that start before end, and at least the day of start when the
+        window is shorter than a day.
+        """
+        self.start = start
+        self.end = end
+        last = (end - timedelta(microseconds=1)).date()
+        days = max((last - start.date()).days, 0) + 1
+        self._days = [(start.date() + timedelta(days=offset)).isoformat() for offset in range(days)]
+
+    def insertable_columns(self, table: str) -> Optional[List[Dict[str, Any]]]:
+        """
+        Return the columns the generator fills for a table.
+
+        Generated, identity and defaulted columns are left to the database.
+
+        Returns:
+            Optional[List[Dict[str, Any]]]: The columns, or None if a required column has an
+            unsupported type and the table cannot be loaded.
+        """
+        result = []
+        for column in self.columns.get(table, []):
+            if column["generated"] or column["has_default"]:
+                continue
+            if column["type"] not in self.generators:
+                if column["nullable"]:
+                    continue
+                return None
+            result.append(column)
+        return result
+
+    def set_key_source(self, table: str, column: str, pool: Any) -> None:
+        """
+        Draw a foreign key column's values from a pool of existing parent keys (see KeyPool).
+        """
+        self.key_sources[(table, column)] = pool
+
+    def set_column_stats(self, stats: Dict[str, Dict[str, Dict[str, Any]]], skip: Iterable[Tuple[str, str]] = ()) -> None:
+        """
+        Sample columns from their pg_stats distribution instead of uniformly (see ColumnSampler).
+
+        Columns in skip, and columns whose values are all distinct (n_distinct = -1), keep
+        the type generators so unique columns do not collide.
+
+        Args:
+            stats (Dict[str, Dict[str, Dict[str, Any]]]): Stats per table and column from Database.get_column_stats.
+            skip (Iterable[Tuple[str, str]]): (table, column) pairs to leave to the type generators.
+        """
+        skip = set(skip)
+        self.samplers = {}
+        for table, columns in self.columns.items():
+            for column in columns:
+                column_stats = stats.get(table, {}).get(column["name"])
+                if not column_stats or (table, column["name"]) in skip or column["type"] not in self.generators:
+                    continue
+                if column_stats.get("n_distinct") == -1:
+                    continue
+                self.samplers[(table, column["name"])] = ColumnSampler(column, column_stats, self._generate, self.rng)
+
+    def generate_column(self, column: Dict[str, Any], n: int, table: Optional[str] = None) -> ColumnArray:
+        """Generate n values for a column as COPY-ready strings."""
+        pool = self.key_sources.get((table, column["name"]))
+        if pool is not None:
+            if len(pool):
+                return [str(key) for key in pool.sample(n)]
+            if column["nullable"]:
+                return [None] * n
+        sampler = self.samplers.get((table, column["name"]))
+        if sampler is not None:
+            return sampler.sample(n)
+        return self._generate(column, n)
+
+    def _generate(self, column: Dict[str, Any], n: int) -> ColumnArray:
+        return self.generators[column["type"]](column, n)
+
+    def generate_batch(self, table: str, n: int, columns: Optional[List[Dict[str, Any]]] = None) -> List[ColumnArray]:
+        """
+        Generate n rows for a table as column arrays, one list per column.
+        """
+        columns = columns if columns is not None else self.insertable_columns(table) or []
+        return [self.generate_column(column, n, table) for column in columns]
+
+    def iter_batches(self, table: str, rows: int, columns: List[Dict[str, Any]]) -> Iterator[List[ColumnArray]]:
+        remaining = rows
+        while remaining > 0:
+            n = min(self.batch_size, remaining)
+            yield self.generate_batch(table, n, columns)
+            remaining -= n
+
+    def copy_rows(self, conn: connection, table: str, rows: int) -> int:
+        """
+        Stream rows generated for a table into Postgres with COPY ... FROM STDIN (FORMAT csv).
+
+        The caller owns the transaction and must commit or roll back.
+
+        Returns:
+            int: Number of rows sent.
+        """
+        columns = self.insertable_columns(table)
+        if columns is None:
+            logging.warning(f"Skipping {table}: it has required columns of unsupported types.")
+            return 0
+        if not columns:
+            logging.warning(f"Skipping {table}: it has no columns to fill.")
+            return 0
+        column_list = ", ".join(quote_ident(column["name"]) for column in columns)
+        stream = CsvCopyStream(self.iter_batches(table, rows, columns))
+        with conn.cursor() as cur:
+            cur.copy_expert(
+                f"COPY {quote_ident(table)} ({column_list}) FROM STDIN WITH (FORMAT csv)",
+                stream,
+                size=COPY_BUFFER_SIZE,
+            )
+        return stream.rows
+
+    def _next_ids(self, n: int) -> int:
+        base = self._sequence
+        self._sequence += n
+        return base
+
+    def _integers(self, column: Dict[str, Any], n: int) -> ColumnArray:
+        low, high = INTEGER_RANGES[column["type"]]
+        span = high - low
+        rnd = self.rng.random
+        return [str(low + int(rnd() * span)) for _ in range(n)]
+
+    def _numerics(self, column: Dict[str, Any], n: int) -> ColumnArray:
+        precision = column.get("precision") or 10
+        scale = column.get("scale")
+        scale = 2 if scale is None else scale
+        upper = 10 ** min(max(precision - scale, 0), 6)
+        rnd = self.rng.random
+        return [f"{rnd() * upper:.{scale}f}" for _ in range(n)]
+
+    def _floats(self, column: Dict[str, Any], n: int) -> ColumnArray:
+        rnd = self.rng.random
+        return [repr(rnd() * 1000) for _ in range(n)]
+
+    def _booleans(self, column: Dict[str, Any], n: int) -> ColumnArray:
+        return self.rng.choices(("t", "f"), k=n)
+
+    def _texts(self, column: Dict[str, Any], n: int) -> ColumnArray:
+        max_length = column.get("max_length")
+        words = self.rng.choices(self.words, k=n)
+        if max_length is not None and max_length < 16:
+            return [word[:max_length] for word in words]
+        base = self._next_ids(n)
+        values = [f"{word}{base + i:x}" for i, word in enumerate(words)]
+        if max_length is not None:
+            return [value[:max_length] for value in values]
+        return values
+
+    def _dates(self, column: Dict[str, Any], n: int) -> ColumnArray:
+        return self.rng.choices(self._days, k=n)
+
+    def _timestamps(self, column: Dict[str, Any], n: int) -> ColumnArray:
+        start = self.start
+        span = max((self.end - start).total_seconds(), 0.0)
+        rnd = self.rng.random
+        suffix = "+00" if column["type"] == "timestamp with time zone" else ""
+        return [f"{(start + timedelta(seconds=int(rnd() * span))).isoformat(' ')}{suffix}" for _ in range(n)]
+
+    def _times(self, column: Dict[str, Any], n: int) -> ColumnArray:
+        rnd = self.rng.random
+        seconds = [int(rnd() * 86400) for _ in range(n)]
+        return [f"{s // 3600:02d}:{s // 60 % 60:02d}:{s % 60:02d}" for s in seconds]
+
+    def _intervals(self, column: Dict[str, Any], n: int) -> ColumnArray:
+        rnd = self.rng.random
+        return [f"{int(rnd() * 86400)} seconds" for _ in range(n)]
+
+    def _uuids(self, column: Dict[str, Any], n: int) -> ColumnArray:
+        bits = self.rng.getrandbits
+        return [str(uuid.UUID(int=bits(128), version=4)) for _ in range(n)]
+
+    def _jsons(self, column: Dict[str, Any], n: int) -> ColumnArray:
+        words = self.rng.choices(self.words, k=n)
+        return [f'{{"value": "{word}"}}' for word in words]
+
+    def _byteas(self, column: Dict[str, Any], n: int) -> ColumnArray:
+        bits = self.rng.getrandbits
+        return [f"\\x{bits(64):016x}" for _ in range(n)]
+
+    def _inets(self, column: Dict[str, Any], n: int) -> ColumnArray:
+        bits = self.rng.getrandbits
+        return [f"10.{bits(8)}.{bits(8)}.{bits(8)}" for _ in range(n)]
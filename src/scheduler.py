@@ -1,27 +1,38 @@
 import os
-from typing import Callable
+import threading
+from typing import Callable, Optional
 from dotenv import load_dotenv
 from apscheduler.schedulers.background import BackgroundScheduler
 from .db import Database
 from .gpt import GPTQueryGenerator
 from .data_generator import DataGenerator
+from .load_profile import LoadProfile, RateRunner
+from .targets import TargetFleet, load_targets
 import logging
 
 load_dotenv()
 
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s - %(levelname)s - %(message)s"
-)
+LOAD_MODES = ("cron", "rate")
 
 class Scheduler:
     def __init__(self):
         self.schedule = os.getenv("SCHEDULE_CRON")
         if not self.schedule:
             raise EnvironmentError("Missing SCHEDULE_CRON in .env file.")
-        self.db = Database()
-        self.data_generator = DataGenerator(self.db)
+        targets = load_targets()
+        if targets:
+            self.data_generator = TargetFleet(targets)
+            self.databases = self.data_generator.databases
+        else:
+            self.data_generator = DataGenerator(Database())
+            self.databases = [self.data_generator.db]
+        self.db = self.databases[0]
         self.scheduler = BackgroundScheduler()
+        self.load_mode = (os.getenv("LOAD_MODE") or "cron").lower()
+        if self.load_mode not in LOAD_MODES:
+            raise EnvironmentError(f"Invalid LOAD_MODE '{self.load_mode}', expected one of {LOAD_MODES}.")
+        self._stop_event = threading.Event()
+        self._rate_thread: Optional[threading.Thread] = None
 
     def execute_process(self) -> None:
         """
@@ -35,10 +46,37 @@ class Scheduler:
         finally:
             logging.info("Process execution completed.")
 
+    def execute_rate_process(self) -> None:
+        """
+        Runs generated statements continuously at the rate of the LOAD_* profile until stopped.
+
+        The session connection is reopened after an unexpected error so a database
+        restart does not end the run.
+        """
+        runner = RateRunner(LoadProfile.from_env(), self.data_generator.run_chunk)
+        logging.info(f"Rate-controlled load started with profile {runner.profile}.")
+        while not self._stop_event.is_set():
+            try:
+                self.data_generator.open_session()
+                runner.run(self._stop_event)
+                break
+            except Exception as e:
+                logging.error(f"An error occurred during rate-controlled load: {e}")
+                self._stop_event.wait(1.0)
+            finally:
+                self.data_generator.close_session()
+        logging.info("Rate-controlled load stopped.")
+
     def start(self) -> None:
         """
-        Starts the scheduler with the CRON schedule provided in the environment.
+        Starts the scheduler with the CRON schedule provided in the environment,
+        or the rate-controlled load thread when LOAD_MODE is "rate".
         """
+        if self.load_mode == "rate":
+            self._stop_event.clear()
+            self._rate_thread = threading.Thread(target=self.execute_rate_process, name="rate-load", daemon=True)
+            self._rate_thread.start()
+            return
         cron_params = self.parse_cron(self.schedule)
         self.scheduler.add_job(self.execute_process, "cron", **cron_params)
         self.scheduler.start()
@@ -61,7 +99,17 @@ class Scheduler:
 
     def stop(self) -> None:
         """
-        Stops the scheduler gracefully.
+        Stops the scheduler gracefully. A running job is woken from throttle pauses and
+        prefetcher waits first, so the join below does not wait for them.
         """
-        self.scheduler.shutdown()
+        self._stop_event.set()
+        self.data_generator.interrupt()
+        if self._rate_thread is not None:
+            self._rate_thread.join()
+            self._rate_thread = None
+        if self.scheduler.running:
+            self.scheduler.shutdown()
+        self.data_generator.stop()
+        for db in self.databases:
+            db.close_pool()
         logging.info("Scheduler stopped successfully.")
\ No newline at end of file
@@ -0,0 +1,99 @@
+import os
+import json
+import hashlib
+import logging
+import threading
+from typing import Any, Callable, Dict, List, Optional
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+def ddl_signature(ddl: List[str]) -> str:
+    """
+    Hash the content of the introspected DDL.
+
+    Unlike the catalog fingerprint, this only changes when the schema structure
+    does, and it is identical for databases that share the same schema.
+    """
+    return hashlib.md5("\n".join(sorted(ddl)).encode("utf-8")).hexdigest()
+
+
+class SchemaCache:
+    def __init__(self, path: Optional[str] = None) -> None:
+        """
+        Initialize the schema cache.
+
+        Args:
+            path (Optional[str]): JSON file used to persist the cache between runs.
+                Defaults to SCHEMA_CACHE_PATH; when unset the cache lives in memory only.
+        """
+        self.path: Optional[str] = path if path is not None else os.getenv("SCHEMA_CACHE_PATH")
+        self.fingerprint: Optional[str] = None
+        self.entries: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+        self._load()
+
+    def refresh(self, db) -> bool:
+        """
+        Compare the catalog fingerprint of the database against the cached one.
+
+        Cached entries are dropped when the fingerprint changed, so the next
+        call to get() runs the full introspection again.
+
+        Returns:
+            bool: True if the cache was invalidated.
+        """
+        fingerprint = db.get_catalog_fingerprint()
+        with self._lock:
+            if fingerprint == self.fingerprint:
+                return False
+            if self.fingerprint is not None:
+                logging.info("Schema fingerprint changed, invalidating schema cache.")
+            self.fingerprint = fingerprint
+            self.entries = {}
+        return True
+
+    def get(self, key: str, loader: Callable[[], Any]) -> Any:
+        """
+        Return the cached value for key, calling loader on a cache miss.
+
+        Values must be JSON serializable when the cache is persisted to disk.
+        """
+        with self._lock:
+            if key in self.entries:
+                return self.entries[key]
+        value = loader()
+        with self._lock:
+            self.entries[key] = value
+            self._save()
+        return value
+
+    def clear(self) -> None:
+        with self._lock:
+            self.fingerprint = None
+            self.entries = {}
+            self._save()
+
+    def _load(self) -> None:
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            self.fingerprint = data.get("fingerprint")
+            self.entries = data.get("entries", {})
+            logging.info(f"Loaded schema cache from {self.path}.")
+        except (OSError, ValueError) as e:
+            logging.warning(f"Ignoring unreadable schema cache {self.path}: {e}")
+
+    def _save(self) -> None:
+        if not self.path or not isinstance(self.fingerprint, str):
+            return
+        tmp_path = f"{self.path}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"fingerprint": self.fingerprint, "entries": self.entries}, f)
+            os.replace(tmp_path, self.path)
+        except (OSError, TypeError) as e:
+            logging.warning(f"Failed to persist schema cache to {self.path}: {e}")
@@ -0,0 +1,136 @@
+import math
+from typing import Any, Dict, List, Optional
+from .foreign_keys import ForeignKeyGraph
+
+SCHEMA_LEGEND = (
+    "-- Schema notation: table(column type flags, ...). Flags: PK primary key, "
+    "FK>t.c references column c of table t, ? nullable, = has a default, ~ generated (never insert it)."
+)
+
+TYPE_ABBREVIATIONS = {
+    "smallint": "int2",
+    "integer": "int",
+    "bigint": "int8",
+    "real": "float4",
+    "double precision": "float8",
+    "boolean": "bool",
+    "character varying": "varchar",
+    "character": "char",
+    "timestamp without time zone": "ts",
+    "timestamp with time zone": "tstz",
+    "time without time zone": "time",
+    "time with time zone": "timetz",
+    "USER-DEFINED": "enum",
+    "ARRAY": "array",
+}
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count for budgeting prompts: about four characters per token."""
+    return math.ceil(len(text) / 4)
+
+
+def abbreviate_type(column: Dict[str, Any]) -> str:
+    """Short form of a column's type, keeping length, precision and scale where they matter."""
+    data_type = column["type"]
+    short = TYPE_ABBREVIATIONS.get(data_type, data_type)
+    if data_type in ("character varying", "character") and column.get("max_length"):
+        return f"{short}({column['max_length']})"
+    if data_type == "numeric" and column.get("precision"):
+        scale = column.get("scale") or 0
+        return f"numeric({column['precision']},{scale})"
+    return short
+
+
+def compact_table(table: str, columns: List[Dict[str, Any]], primary_key: List[str], foreign_keys: List[Dict[str, Any]]) -> str:
+    """
+    Encode one table as a single line, e.g. orders(id int PK=, customer_id int FK>customers.id, note text?).
+    """
+    references = {}
+    for fk in foreign_keys:
+        for column, ref_column in zip(fk["columns"], fk["ref_columns"]):
+            references[column] = f"{fk['ref_table']}.{ref_column}"
+    parts = []
+    for column in columns:
+        flags = ""
+        if column["name"] in primary_key:
+            flags += " PK"
+        if column["name"] in references:
+            flags += f" FK>{references[column['name']]}"
+        flags += "?" if column["nullable"] else ""
+        flags += "~" if column["generated"] else "=" if column["has_default"] else ""
+        parts.append(f"{column['name']} {abbreviate_type(column)}{flags}")
+    return f"{table}({', '.join(parts)})"
+
+
+def compact_schema(columns: Dict[str, List[Dict[str, Any]]], primary_keys: Dict[str, List[str]], foreign_keys: List[Dict[str, Any]]) -> Dict[str, str]:
+    """
+    Encode every base table on one line each, in foreign key insert order. Views are left out.
+
+    Args:
+        columns: Column metadata from Database.get_table_columns.
+        primary_keys: Primary keys from Database.get_primary_keys.
+        foreign_keys: Constraints from Database.get_foreign_keys.
+
+    Returns:
+        Dict[str, str]: Encoded line per table name.
+    """
+    graph = ForeignKeyGraph(columns, foreign_keys)
+    return {
+        table: compact_table(table, columns[table], primary_keys.get(table, []), graph.references(table))
+        for table in graph.insert_order()
+        if table in columns
+    }
+
+
+def shard_schema(tables: Dict[str, str], budget: int, overhead: int = 0, legend: Optional[str] = SCHEMA_LEGEND) -> List[List[str]]:
+    """
+    Split encoded tables into shards whose estimated prompt size stays within budget tokens.
+
+    Tables keep their insert order, so parents tend to land in the same shard as their
+    children. A single table larger than the budget gets a shard of its own.
+
+    Args:
+        tables: Encoded line per table, as returned by compact_schema.
+        budget: Token budget of a whole prompt.
+        overhead: Estimated tokens of the prompt around the schema.
+        legend: Line prepended to every shard, None for raw DDL.
+
+    Returns:
+        List[List[str]]: Schema lines per shard.
+    """
+    header = [legend] if legend else []
+    available = max(budget - overhead - sum(estimate_tokens(line) + 1 for line in header), 1)
+    shards: List[List[str]] = []
+    current: List[str] = []
+    used = 0
+    for line in tables.values():
+        cost = estimate_tokens(line) + 1
+        if current and used + cost > available:
+            shards.append(current)
+            current, used = [], 0
+        current.append(line)
+        used += cost
+    if current:
+        shards.append(current)
+    return [header + shard for shard in shards]
+
+
+class SchemaShards:
+    def __init__(self, shards: List[List[str]]) -> None:
+        """
+        Hand out prompt schema shards in rotation, one per tick.
+        """
+        self.shards = shards
+        self._cursor = 0
+
+    def __len__(self) -> int:
+        return len(self.shards)
+
+    def next(self) -> List[str]:
+        """Return the next shard, or an empty list when the schema has no tables."""
+        if not self.shards:
+            return []
+        shard = self.shards[self._cursor % len(self.shards)]
+        self._cursor += 1
+        return shard
@@ -0,0 +1,52 @@
+import signal
+import logging
+import threading
+from typing import Optional
+from .scheduler import Scheduler
+from .metrics import MetricsServer
+
+
+class Service:
+    def __init__(self, scheduler: Scheduler, metrics: Optional[MetricsServer] = None) -> None:
+        """
+        Process runtime: starts the scheduler and the metrics endpoint, then blocks until shutdown.
+
+        Args:
+            scheduler (Scheduler): Scheduler driving the load.
+            metrics (Optional[MetricsServer]): Metrics endpoint, defaults to one on METRICS_PORT.
+        """
+        self.scheduler = scheduler
+        self.metrics = metrics or MetricsServer()
+        self.shutdown = threading.Event()
+
+    def handle_signal(self, signum: int, frame) -> None:
+        logging.info(f"Received {signal.Signals(signum).name}, shutting down.")
+        self.shutdown.set()
+
+    def install_signal_handlers(self) -> None:
+        """Set the shutdown event on SIGINT and SIGTERM. Must be called from the main thread."""
+        signal.signal(signal.SIGINT, self.handle_signal)
+        signal.signal(signal.SIGTERM, self.handle_signal)
+
+    def run(self) -> int:
+        """
+        Run until the shutdown event is set, then drain in-flight work.
+
+        Scheduler.stop waits for the running job to finish before the pool is closed.
+
+        Returns:
+            int: Process exit code.
+        """
+        try:
+            self.metrics.start()
+            self.scheduler.start()
+            logging.info("Service is running.")
+            self.shutdown.wait()
+            logging.info("Draining in-flight work...")
+            self.scheduler.stop()
+            return 0
+        except Exception as e:
+            logging.critical(f"Service failed: {e}")
+            return 1
+        finally:
+            self.metrics.stop()
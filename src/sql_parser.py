@@ -0,0 +1,266 @@
+import re
+from typing import List, NamedTuple, Optional, Tuple
+
+DATE_PATTERN = re.compile(r"^\d{4}-\d{2}-\d{2}$")
+TIMESTAMP_PATTERN = re.compile(r"^\d{4}-\d{2}-\d{2}[ T]\d{2}:\d{2}(:\d{2}(\.\d+)?)?([+-]\d{2}(:?\d{2})?|Z)?$")
+EMAIL_PATTERN = re.compile(r"^[^@\s']+@[^@\s']+\.[A-Za-z]{2,}$")
+WORD_PATTERN = re.compile(r"[A-Za-z_][A-Za-z0-9_$]*")
+NUMBER_PATTERN = re.compile(r"\d+(\.\d*)?([eE][+-]?\d+)?|\.\d+([eE][+-]?\d+)?")
+DOLLAR_TAG_PATTERN = re.compile(r"\$([A-Za-z_][A-Za-z0-9_]*)?\$")
+
+DML_KINDS = ("INSERT", "UPDATE", "DELETE")
+
+
+class Token(NamedTuple):
+    kind: str
+    text: str
+    depth: int
+
+
+class Literal(NamedTuple):
+    type: str
+    value: object
+    index: int
+    text: str = ""
+
+
+def tokenize(sql: str) -> List[Token]:
+    """
+    Split a SQL statement into tokens annotated with their parenthesis depth.
+
+    Token kinds are "string", "number", "word", "ident" (double-quoted), "dollar"
+    (dollar-quoted body), "comment", "space", "open", "close" and "punct".
+    Concatenating the token texts reproduces the input exactly.
+    """
+    tokens = []
+    depth = 0
+    i = 0
+    length = len(sql)
+    while i < length:
+        char = sql[i]
+        if char.isspace():
+            j = i
+            while j < length and sql[j].isspace():
+                j += 1
+            tokens.append(Token("space", sql[i:j], depth))
+        elif char == "'" or (char in "eE" and sql[i + 1:i + 2] == "'"):
+            j = i + (2 if char != "'" else 1)
+            while j < length:
+                if sql[j] == "\\" and char != "'":
+                    j += 2
+                    continue
+                if sql[j] == "'":
+                    if sql[j + 1:j + 2] == "'":
+                        j += 2
+                        continue
+                    j += 1
+                    break
+                j += 1
+            tokens.append(Token("string", sql[i:j], depth))
+        elif char == '"':
+            j = sql.find('"', i + 1)
+            while j != -1 and sql[j + 1:j + 2] == '"':
+                j = sql.find('"', j + 2)
+            j = length if j == -1 else j + 1
+            tokens.append(Token("ident", sql[i:j], depth))
+        elif sql.startswith("--", i):
+            j = sql.find("\n", i)
+            j = length if j == -1 else j
+            tokens.append(Token("comment", sql[i:j], depth))
+        elif sql.startswith("/*", i):
+            j = sql.find("*/", i + 2)
+            j = length if j == -1 else j + 2
+            tokens.append(Token("comment", sql[i:j], depth))
+        elif char == "$" and DOLLAR_TAG_PATTERN.match(sql, i):
+            tag = DOLLAR_TAG_PATTERN.match(sql, i).group(0)
+            j = sql.find(tag, i + len(tag))
+            j = length if j == -1 else j + len(tag)
+            tokens.append(Token("dollar", sql[i:j], depth))
+        elif char.isdigit() or (char == "." and sql[i + 1:i + 2].isdigit()):
+            j = NUMBER_PATTERN.match(sql, i).end()
+            tokens.append(Token("number", sql[i:j], depth))
+        elif WORD_PATTERN.match(sql, i):
+            j = WORD_PATTERN.match(sql, i).end()
+            tokens.append(Token("word", sql[i:j], depth))
+        elif char == "(":
+            j = i + 1
+            tokens.append(Token("open", char, depth))
+            depth += 1
+        elif char == ")":
+            j = i + 1
+            depth = max(depth - 1, 0)
+            tokens.append(Token("close", char, depth))
+        else:
+            j = i + 1
+            tokens.append(Token("punct", char, depth))
+        i = j
+    return tokens
+
+
+def significant(tokens: List[Token]) -> List[Tuple[int, Token]]:
+    """Return (position, token) pairs for tokens that are not whitespace or comments."""
+    return [(i, token) for i, token in enumerate(tokens) if token.kind not in ("space", "comment")]
+
+
+def statement_kind(sql: str) -> str:
+    """
+    Classify a statement by its leading keyword, e.g. INSERT, UPDATE, DELETE or SELECT.
+
+    For statements starting with WITH the first top-level DML keyword is returned.
+    """
+    return _statement_kind([token for _, token in significant(tokenize(sql))])
+
+
+def _statement_kind(words: List[Token]) -> str:
+    if not words or words[0].kind != "word":
+        return "UNKNOWN"
+    first = words[0].text.upper()
+    if first != "WITH":
+        return first
+    for token in words[1:]:
+        if token.depth == 0 and token.kind == "word" and token.text.upper() in DML_KINDS + ("SELECT",):
+            return token.text.upper()
+    return "WITH"
+
+
+def _identifier(text: str) -> str:
+    if text.startswith('"'):
+        return text[1:-1].replace('""', '"')
+    return text.lower()
+
+
+def _qualified_name(tokens: List[Tuple[int, Token]], start: int) -> Optional[str]:
+    parts = []
+    k = start
+    while k < len(tokens) and tokens[k][1].kind in ("word", "ident"):
+        parts.append(_identifier(tokens[k][1].text))
+        if k + 1 < len(tokens) and tokens[k + 1][1].text == ".":
+            k += 2
+            continue
+        break
+    return parts[-1] if parts else None
+
+
+def target_table(sql: str) -> Optional[str]:
+    """
+    Return the unqualified name of the table an INSERT, UPDATE or DELETE writes to.
+    """
+    tokens = significant(tokenize(sql))
+    for k, (_, token) in enumerate(tokens):
+        if token.depth != 0 or token.kind != "word":
+            continue
+        word = token.text.upper()
+        if word == "INTO" or (word == "FROM" and k > 0 and tokens[k - 1][1].text.upper() == "DELETE"):
+            return _qualified_name(tokens, k + 1)
+        if word == "UPDATE":
+            start = k + 1
+            if start < len(tokens) and tokens[start][1].text.upper() == "ONLY":
+                start += 1
+            return _qualified_name(tokens, start)
+    return None
+
+
+def literal_type(token: Token) -> Tuple[str, object]:
+    """
+    Infer a parameter type and Python value for a literal token.
+
+    Returns:
+        Tuple[str, object]: One of "int", "float", "bool", "date", "timestamp", "email" or "text",
+        and the decoded value.
+    """
+    if token.kind == "number":
+        if re.fullmatch(r"\d+", token.text):
+            return "int", int(token.text)
+        return "float", float(token.text)
+    if token.kind == "word":
+        return "bool", token.text.upper() == "TRUE"
+    value = token.text[1:-1].replace("''", "'")
+    if DATE_PATTERN.match(value):
+        return "date", value
+    if TIMESTAMP_PATTERN.match(value):
+        return "timestamp", value
+    if EMAIL_PATTERN.match(value):
+        return "email", value
+    return "text", value
+
+
+def _liftable_positions(tokens: List[Token]) -> List[int]:
+    sig = significant(tokens)
+    if not sig:
+        return []
+    kind = _statement_kind([token for _, token in sig])
+    positions = []
+    in_scope = False
+    previous = None
+    for i, token in sig:
+        upper = token.text.upper() if token.kind == "word" else None
+        if kind == "INSERT" and token.depth == 0 and upper in ("VALUES", "SELECT", "ON", "RETURNING"):
+            in_scope = upper == "VALUES"
+        elif kind == "UPDATE" and token.depth == 0 and upper in ("SET", "FROM", "WHERE", "RETURNING"):
+            in_scope = upper == "SET"
+        elif in_scope:
+            wanted_depth = 1 if kind == "INSERT" else 0
+            is_literal = token.kind in ("string", "number") or upper in ("TRUE", "FALSE")
+            previous_word = previous.text.upper() if previous is not None and previous.kind == "word" else None
+            if (
+                is_literal
+                and token.depth == wanted_depth
+                and not (token.kind == "string" and token.text[0] in "eE")
+                and previous_word not in ("LIMIT", "OFFSET", "INTERVAL")
+            ):
+                positions.append(i)
+        previous = token
+    return positions
+
+
+def lift_literals(sql: str) -> Tuple[List[str], List[Literal]]:
+    """
+    Lift the data literals out of an INSERT ... VALUES or UPDATE ... SET statement.
+
+    Only literals that are plain column values are lifted: row values of an INSERT
+    and SET assignments of an UPDATE outside any subquery. Literals in WHERE clauses,
+    subqueries, LIMIT/OFFSET and INTERVAL expressions stay part of the statement shape.
+
+    Returns:
+        Tuple[List[str], List[Literal]]: The statement split around the lifted literals
+        (one more part than literals) and the typed literals in order.
+    """
+    tokens = tokenize(sql)
+    parts = []
+    literals = []
+    current = []
+    positions = set(_liftable_positions(tokens))
+    for i, token in enumerate(tokens):
+        if i in positions:
+            param_type, value = literal_type(token)
+            literals.append(Literal(param_type, value, len(literals), token.text))
+            parts.append("".join(current))
+            current = []
+        else:
+            current.append(token.text)
+    parts.append("".join(current))
+    return parts, literals
+
+
+def statement_shape(sql: str) -> str:
+    """
+    Return a normalized statement shape with lifted literals replaced by "?" and whitespace collapsed.
+    """
+    parts, _ = lift_literals(sql.strip().rstrip(";"))
+    return re.sub(r"\s+", " ", "?".join(parts)).strip()
+
+
+def quote_literal(param_type: str, value: object) -> str:
+    """Render a typed value back into a SQL literal."""
+    if value is None:
+        return "NULL"
+    if param_type == "bool":
+        return "TRUE" if value else "FALSE"
+    if param_type in ("int", "float"):
+        return repr(value) if isinstance(value, float) else str(value)
+    return "'" + str(value).replace("'", "''") + "'"
+
+
+def quote_ident(name: str) -> str:
+    """Quote an identifier for safe interpolation into SQL."""
+    return '"' + name.replace('"', '""') + '"'
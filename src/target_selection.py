@@ -0,0 +1,189 @@
+import os
+import time
+import random
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+from psycopg2.extensions import connection
+from dotenv import load_dotenv
+from .sql_parser import quote_ident, quote_literal
+
+load_dotenv()
+
+TARGET_STRATEGIES = ("auto", "random", "reservoir", "key_range", "tablesample")
+TABLESAMPLE_TARGET_ROWS = 100
+
+
+def tablesample_percent(row_estimate: Optional[float], target_rows: int) -> float:
+    """Percentage of pages TABLESAMPLE SYSTEM has to read to return roughly target_rows rows."""
+    if not row_estimate or row_estimate <= 0:
+        return 1.0
+    return min(100.0, max(0.0001, 100.0 * target_rows / row_estimate))
+
+
+def sample_keys(conn: connection, table: str, column: str, limit: int, row_estimate: Optional[float], small_table_rows: int) -> List[Any]:
+    """
+    Sample up to limit key values from a table, picking the query from the table's size.
+
+    Small tables are sorted by random(). Large or never analyzed tables are sampled with
+    TABLESAMPLE SYSTEM, falling back to an unordered LIMIT when the sample comes back empty.
+    """
+    key = quote_ident(column)
+    relation = quote_ident(table)
+    with conn.cursor() as cur:
+        if row_estimate is not None and row_estimate <= small_table_rows:
+            cur.execute(f"SELECT {key} FROM {relation} ORDER BY random() LIMIT %s;", (limit,))
+            return [row[0] for row in cur.fetchall()]
+        percent = tablesample_percent(row_estimate, limit * 2)
+        cur.execute(f"SELECT {key} FROM {relation} TABLESAMPLE SYSTEM ({percent:.4f}) LIMIT %s;", (limit,))
+        keys = [row[0] for row in cur.fetchall()]
+        if not keys:
+            cur.execute(f"SELECT {key} FROM {relation} LIMIT %s;", (limit,))
+            keys = [row[0] for row in cur.fetchall()]
+        return keys
+
+
+class TargetStrategy:
+    """
+    Base class for the ways a random UPDATE/DELETE target row can be selected.
+
+    Strategies replace a (SELECT <pk> FROM <table> ORDER BY RANDOM() LIMIT 1) subquery.
+    """
+
+    name = "random"
+
+    def prepare(self, conn: connection, registry, table: str) -> None:
+        """Load whatever state the strategy needs before rewriting statements for a table."""
+
+    def replacement(self, registry, table: str) -> Optional[Tuple[str, Optional[Any]]]:
+        """
+        Return the SQL that replaces the random-row subquery and the key it pins, if any.
+
+        Returns:
+            Optional[Tuple[str, Optional[Any]]]: None keeps the original subquery.
+        """
+        return None
+
+
+class RandomSortStrategy(TargetStrategy):
+    """Keep ORDER BY RANDOM() LIMIT 1. Only sensible for tiny tables."""
+
+    name = "random"
+
+
+class ReservoirStrategy(TargetStrategy):
+    """Pick a key from the table's periodically refreshed pool of sampled ids."""
+
+    name = "reservoir"
+
+    def prepare(self, conn: connection, registry, table: str) -> None:
+        if registry.is_stale(table):
+            registry.load(conn, table)
+
+    def replacement(self, registry, table: str) -> Optional[Tuple[str, Optional[Any]]]:
+        key = registry.pick(table)
+        if key is None:
+            return None
+        return quote_literal("int" if isinstance(key, int) else "text", key), key
+
+
+class KeyRangeStrategy(TargetStrategy):
+    """Probe the primary key index at a random point inside the cached min/max key range."""
+
+    name = "key_range"
+
+    def __init__(self, selector: "TargetSelector", seed: Optional[int] = None) -> None:
+        self.selector = selector
+        self._ranges: Dict[str, Tuple[Optional[int], Optional[int], float]] = {}
+        self._rng = random.Random(seed)
+
+    def prepare(self, conn: connection, registry, table: str) -> None:
+        """Load the table's min/max key, again once it is older than TARGET_STATS_REFRESH_SECONDS."""
+        cached = self._ranges.get(table)
+        if cached is not None and time.monotonic() - cached[2] <= self.selector.refresh_seconds:
+            return
+        key = quote_ident(registry.primary_keys[table])
+        with conn.cursor() as cur:
+            cur.execute(f"SELECT min({key}), max({key}) FROM {quote_ident(table)};")
+            low, high = cur.fetchone()
+        self._ranges[table] = (low, high, time.monotonic())
+
+    def replacement(self, registry, table: str) -> Optional[Tuple[str, Optional[Any]]]:
+        low, high, _ = self._ranges.get(table, (None, None, 0.0))
+        if low is None or high is None:
+            return None
+        key = quote_ident(registry.primary_keys[table])
+        probe = self._rng.randint(int(low), int(high))
+        return f"(SELECT {key} FROM {quote_ident(table)} WHERE {key} >= {probe} ORDER BY {key} LIMIT 1)", None
+
+
+class TableSampleStrategy(TargetStrategy):
+    """
+    Read a small random set of pages with TABLESAMPLE SYSTEM instead of sorting the table.
+
+    A sample can come back empty on small or skewed tables, so any row is used then,
+    as in sample_keys, rather than letting the statement silently match nothing.
+    """
+
+    name = "tablesample"
+
+    def __init__(self, selector: "TargetSelector") -> None:
+        self.selector = selector
+
+    def replacement(self, registry, table: str) -> Optional[Tuple[str, Optional[Any]]]:
+        key = quote_ident(registry.primary_keys[table])
+        percent = tablesample_percent(self.selector.row_estimate(table), TABLESAMPLE_TARGET_ROWS)
+        relation = quote_ident(table)
+        sampled = f"(SELECT {key} FROM {relation} TABLESAMPLE SYSTEM ({percent:.4f}) LIMIT 1)"
+        return f"COALESCE({sampled}, (SELECT {key} FROM {relation} LIMIT 1))", None
+
+
+class TargetSelector:
+    def __init__(self, integer_keys: Iterable[str] = (), mode: Optional[str] = None) -> None:
+        """
+        Choose a target selection strategy per table from its estimated row count (pg_class.reltuples).
+
+        Args:
+            integer_keys (Iterable[str]): Tables whose primary key is a single integer column,
+                which makes them eligible for key range probes.
+            mode (Optional[str]): Force one strategy for every table, defaults to TARGET_STRATEGY or "auto".
+        """
+        self.mode: str = (mode or os.getenv("TARGET_STRATEGY") or "auto").lower()
+        if self.mode not in TARGET_STRATEGIES:
+            raise EnvironmentError(f"Invalid TARGET_STRATEGY '{self.mode}', expected one of {TARGET_STRATEGIES}.")
+        self.small_table_rows: int = int(os.getenv("TARGET_SMALL_TABLE_ROWS") or "100000")
+        self.refresh_seconds: float = float(os.getenv("TARGET_STATS_REFRESH_SECONDS") or "600")
+        self.integer_keys = set(integer_keys)
+        self.row_estimates: Dict[str, float] = {}
+        self.loaded_at: Optional[float] = None
+        self.strategies: Dict[str, TargetStrategy] = {
+            "random": RandomSortStrategy(),
+            "reservoir": ReservoirStrategy(),
+            "key_range": KeyRangeStrategy(self),
+            "tablesample": TableSampleStrategy(self),
+        }
+
+    def refresh(self, loader: Callable[[], Dict[str, float]]) -> None:
+        """Reload the row estimates with loader (e.g. Database.get_table_row_estimates) once they are stale."""
+        if self.loaded_at is not None and time.monotonic() - self.loaded_at <= self.refresh_seconds:
+            return
+        self.row_estimates = loader()
+        self.loaded_at = time.monotonic()
+
+    def row_estimate(self, table: str) -> Optional[float]:
+        """Estimated row count of a table, or None when the table was never analyzed."""
+        estimate = self.row_estimates.get(table)
+        if estimate is None or estimate < 0:
+            return None
+        return estimate
+
+    def strategy_for(self, table: str) -> TargetStrategy:
+        if self.mode != "auto":
+            strategy = self.strategies[self.mode]
+            if strategy.name == "key_range" and table not in self.integer_keys:
+                return self.strategies["tablesample"]
+            return strategy
+        estimate = self.row_estimate(table)
+        if estimate is None or estimate <= self.small_table_rows:
+            return self.strategies["reservoir"]
+        if table in self.integer_keys:
+            return self.strategies["key_range"]
+        return self.strategies["tablesample"]
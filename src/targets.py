@@ -0,0 +1,227 @@
+import os
+import json
+import logging
+from dataclasses import dataclass
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+from dotenv import load_dotenv
+from .db import Database
+from .data_generator import DataGenerator
+from .schema_cache import SchemaCache, ddl_signature
+from .templates import TemplateLibrary
+from .journal import JournalWriter
+
+load_dotenv()
+
+
+@dataclass
+class Target:
+    name: str
+    dsn: Optional[str] = None
+    schema: str = "public"
+
+
+def load_targets(path: Optional[str] = None) -> List[Target]:
+    """
+    Read the target list from a JSON file.
+
+    The file holds a list of objects (or {"targets": [...]}) with an optional "dsn"
+    (defaults to the POSTGRES_* settings), "schema" or "schemas" and "name". An entry
+    with "schemas" expands to one target per schema on the same database.
+
+    Args:
+        path (Optional[str]): Targets file, defaults to TARGETS_FILE.
+
+    Returns:
+        List[Target]: The configured targets, empty when no file is configured.
+    """
+    path = path if path is not None else os.getenv("TARGETS_FILE")
+    if not path:
+        return []
+    try:
+        with open(path) as f:
+            config = json.load(f)
+    except (OSError, ValueError) as e:
+        raise EnvironmentError(f"Could not read TARGETS_FILE '{path}': {e}")
+    entries = config.get("targets", []) if isinstance(config, dict) else config
+    targets: List[Target] = []
+    for i, entry in enumerate(entries):
+        schemas = entry.get("schemas") or [entry.get("schema") or "public"]
+        for schema in schemas:
+            name = entry.get("name") or f"target{i}"
+            if len(schemas) > 1 or entry.get("schemas"):
+                name = f"{name}/{schema}"
+            targets.append(Target(name=name, dsn=entry.get("dsn"), schema=schema))
+    names = [target.name for target in targets]
+    if len(set(names)) != len(names):
+        raise EnvironmentError(f"Duplicate target names in TARGETS_FILE '{path}'.")
+    if not targets:
+        raise EnvironmentError(f"TARGETS_FILE '{path}' does not define any targets.")
+    return targets
+
+
+def _per_target_path(path: Optional[str], name: str) -> Optional[str]:
+    """Derive a file name per target from a shared setting, e.g. cache.json -> cache.tenant1.json."""
+    if not path:
+        return path
+    root, ext = os.path.splitext(path)
+    return f"{root}.{name.replace('/', '_')}{ext}"
+
+
+class TargetFleet:
+    def __init__(self, targets: List[Target], concurrency: Optional[int] = None,
+                 generator_factory: Callable[[Database], DataGenerator] = DataGenerator) -> None:
+        """
+        Drive several databases and schemas from one process.
+
+        Every target gets its own DataGenerator, connection pool, key pools and executor.
+        On each run the targets are grouped by the signature of their DDL and one batch
+        is produced per group, by the group's first target, then executed on every member
+        concurrently. Tenants that share a schema therefore share LLM calls.
+
+        It offers the DataGenerator methods the Scheduler uses, so it can stand in for one.
+
+        Args:
+            targets (List[Target]): Targets to drive.
+            concurrency (Optional[int]): Targets worked on at once, defaults to TARGET_CONCURRENCY or all of them.
+            generator_factory (Callable[[Database], DataGenerator]): Builds the generator of a target.
+        """
+        self.targets = targets
+        self.concurrency: int = concurrency or int(os.getenv("TARGET_CONCURRENCY") or "0") or len(targets)
+        self.generators: Dict[str, DataGenerator] = {}
+        for target in targets:
+            generator = generator_factory(Database(target.dsn, target.schema, target.name))
+            self._separate_state(generator, target.name)
+            self.generators[target.name] = generator
+        self.mode = next(iter(self.generators.values())).mode
+        self._open: List[str] = []
+        self._groups: Dict[str, List[str]] = {}
+        self._pending: Dict[str, List[str]] = {}
+        self._pending_from_llm: Dict[str, bool] = {}
+        self._threads = ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="target")
+
+    @property
+    def databases(self) -> List[Database]:
+        return [generator.db for generator in self.generators.values()]
+
+    def generate_and_run_queries(self) -> None:
+        """Run one batch on every target, sharing generated batches between targets with the same schema."""
+        try:
+            self.open_session()
+            if self.mode == "native":
+                self._each(self._open, lambda generator: generator.load_native_rows())
+                return
+            for signature, members in self._groups.items():
+                leader = self.generators[members[0]]
+                try:
+                    queries, from_llm = leader.produce_queries(leader.schema_cache.get("ddl", leader.db.get_all_ddl))
+                    queries = list(queries)
+                except Exception as e:
+                    logging.error(f"Failed to produce queries for {', '.join(members)}: {e}")
+                    continue
+                logging.info(f"Running {len(queries)} queries on {len(members)} targets with schema {signature[:8]}.")
+                self._each(members, lambda generator: generator.run_queries(queries, from_llm))
+        except Exception as e:
+            logging.critical(f"An unexpected error occurred: {e}")
+        finally:
+            self.close_session()
+
+    def open_session(self) -> List[str]:
+        """
+        Open a session on every target and group the targets by schema signature.
+
+        Targets that cannot be reached are logged and left out until the next session.
+
+        Returns:
+            List[str]: DDL of the first reachable target.
+        """
+        ddls = self._each([target.name for target in self.targets], lambda generator: generator.open_session())
+        self._open = list(ddls)
+        if not self._open:
+            raise ConnectionError("None of the configured targets could be reached.")
+        self._regroup(ddls)
+        return ddls[self._open[0]]
+
+    def close_session(self) -> None:
+        self._each([target.name for target in self.targets], lambda generator: generator.close_session())
+        self._open = []
+
+    def run_chunk(self, limit: int) -> int:
+        """
+        Run up to limit statements (rows in native mode) on every open target. Used by rate mode,
+        where the LOAD_* rates therefore apply per target.
+
+        Returns:
+            int: Number of statements (or rows) run per target, at most limit.
+        """
+        if self.mode == "native":
+            loaded = self._each(self._open, lambda generator: generator.load_next_table(limit))
+            return max(loaded.values(), default=0)
+        if any(not self._pending.get(signature) for signature in self._groups):
+            self._regroup(self._each(self._open, self._refresh))
+        done = 0
+        for signature, members in self._groups.items():
+            pending = self._pending.get(signature)
+            if not pending:
+                leader = self.generators[members[0]]
+                queries, from_llm = leader.produce_queries(leader.schema_cache.get("ddl", leader.db.get_all_ddl))
+                pending = self._pending[signature] = list(queries)
+                self._pending_from_llm[signature] = from_llm
+            chunk, self._pending[signature] = pending[:limit], pending[limit:]
+            if chunk:
+                from_llm = self._pending_from_llm[signature]
+                self._each(members, lambda generator: generator.run_queries(chunk, from_llm))
+            done = max(done, len(chunk))
+        return done
+
+    def interrupt(self) -> None:
+        """Wake up the running jobs of every target, see DataGenerator.interrupt."""
+        for generator in self.generators.values():
+            generator.interrupt()
+
+    def stop(self) -> None:
+        """Stop every target's background work and close their connection pools."""
+        self._threads.shutdown(wait=True)
+        for generator in self.generators.values():
+            generator.stop()
+            generator.db.close_pool()
+
+    def _regroup(self, ddls: Dict[str, List[str]]) -> None:
+        groups: Dict[str, List[str]] = {}
+        for name, ddl in ddls.items():
+            groups.setdefault(ddl_signature(ddl), []).append(name)
+        if groups.keys() != self._groups.keys():
+            logging.info(f"{len(ddls)} targets share {len(groups)} distinct schemas.")
+        self._pending = {signature: self._pending.get(signature, []) for signature in groups}
+        self._groups = groups
+
+    @staticmethod
+    def _refresh(generator: DataGenerator) -> List[str]:
+        generator.refresh_schema()
+        return generator.schema_cache.get("ddl", generator.db.get_all_ddl)
+
+    def _each(self, names: List[str], work: Callable[[DataGenerator], Any]) -> Dict[str, Any]:
+        """
+        Apply work to the generators of the named targets concurrently.
+
+        Returns:
+            Dict[str, Any]: Results of the targets that succeeded, in the order of names.
+        """
+        futures = {name: self._threads.submit(work, self.generators[name]) for name in names}
+        results = {}
+        for name, future in futures.items():
+            try:
+                results[name] = future.result()
+            except Exception as e:
+                logging.error(f"Target {name} failed: {e}")
+        return results
+
+    @staticmethod
+    def _separate_state(generator: DataGenerator, name: str) -> None:
+        """Give each target its own schema cache, template library and journal files."""
+        if generator.schema_cache.path:
+            generator.schema_cache = SchemaCache(_per_target_path(generator.schema_cache.path, name))
+        if generator.templates is not None and generator.templates.path:
+            generator.templates = TemplateLibrary(_per_target_path(generator.templates.path, name))
+        if generator.journal.enabled:
+            generator.journal = JournalWriter(os.path.join(generator.journal.directory, name.replace("/", "_")))
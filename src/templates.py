@@ -0,0 +1,260 @@
+import os
+import re
+import json
+import random
+import logging
+import threading
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional
+from dotenv import load_dotenv
+from .sql_parser import lift_literals, quote_literal, statement_kind, target_table
+
+load_dotenv()
+
+MAX_SAMPLES = 20
+TIMESTAMP_PREFIX = re.compile(r"^(\d{4}-\d{2}-\d{2})[ T](\d{2}):(\d{2})(?::(\d{2}))?(\.\d+)?(.*)$")
+
+
+def generate_value(param_type: str, samples: List[Any], rng: random.Random) -> Any:
+    """
+    Generate a fresh value for a template parameter, shaped after the literals it was lifted from.
+    """
+    sample = rng.choice(samples)
+    if param_type == "int":
+        return rng.randint(1, max(10, max(samples) * 2))
+    if param_type == "float":
+        decimals = max((len(repr(value).split(".")[1]) for value in samples if "." in repr(value)), default=2)
+        return round(rng.uniform(0, max(max(samples) * 2, 1.0)), min(decimals, 6))
+    if param_type == "bool":
+        return rng.random() < 0.5
+    if param_type == "date":
+        shifted = date.fromisoformat(sample) + timedelta(days=rng.randint(-365, 365))
+        return shifted.isoformat()
+    if param_type == "timestamp":
+        match = TIMESTAMP_PREFIX.match(sample)
+        day, hour, minute, second, _, suffix = match.groups()
+        base = datetime.fromisoformat(f"{day} {hour}:{minute}:{second or '00'}")
+        shifted = base + timedelta(seconds=rng.randint(-365 * 86400, 365 * 86400))
+        return shifted.strftime("%Y-%m-%d %H:%M:%S") + suffix
+    if param_type == "email":
+        local, domain = sample.rsplit("@", 1)
+        return f"{local}{rng.randint(1, 99999)}@{domain}"
+    return re.sub(r"\d", lambda _: str(rng.randint(0, 9)), sample)
+
+
+class QueryTemplate:
+    def __init__(
+        self,
+        kind: str,
+        table: Optional[str],
+        parts: List[str],
+        param_types: List[str],
+        samples: List[List[Any]],
+        uses: int = 0,
+        failures: int = 0,
+    ) -> None:
+        self.kind = kind
+        self.table = table
+        self.parts = parts
+        self.param_types = param_types
+        self.samples = samples
+        self.uses = uses
+        self.failures = failures
+
+    @classmethod
+    def from_query(cls, query: str) -> Optional["QueryTemplate"]:
+        """
+        Build a template from a generated statement, lifting its literals out as typed parameters.
+
+        Returns:
+            Optional[QueryTemplate]: None for statements that are not INSERT, UPDATE or DELETE.
+        """
+        kind = statement_kind(query)
+        if kind not in ("INSERT", "UPDATE", "DELETE"):
+            return None
+        parts, literals = lift_literals(query)
+        return cls(
+            kind,
+            target_table(query),
+            parts,
+            [literal.type for literal in literals],
+            [[literal.value] for literal in literals],
+        )
+
+    @property
+    def shape(self) -> str:
+        """The statement with each literal replaced by its type, e.g. VALUES ({int}, {text})."""
+        pieces = [self.parts[0]]
+        for param_type, part in zip(self.param_types, self.parts[1:]):
+            pieces.append(f"{{{param_type}}}{part}")
+        return "".join(pieces)
+
+    def merge(self, other: "QueryTemplate") -> None:
+        """Fold the literal samples of a template with the same shape into this one."""
+        for samples, other_samples in zip(self.samples, other.samples):
+            for value in other_samples:
+                if value not in samples:
+                    samples.append(value)
+            del samples[:-MAX_SAMPLES]
+
+    def render(self, rng: random.Random) -> str:
+        """Fill the template with freshly generated values."""
+        pieces = [self.parts[0]]
+        for param_type, samples, part in zip(self.param_types, self.samples, self.parts[1:]):
+            pieces.append(quote_literal(param_type, generate_value(param_type, samples, rng)))
+            pieces.append(part)
+        return "".join(pieces)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "kind": self.kind,
+            "table": self.table,
+            "parts": self.parts,
+            "param_types": self.param_types,
+            "samples": self.samples,
+            "uses": self.uses,
+            "failures": self.failures,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "QueryTemplate":
+        return cls(**data)
+
+
+class TemplateLibrary:
+    def __init__(self, path: Optional[str] = None, seed: Optional[int] = None) -> None:
+        """
+        Initialize the template library.
+
+        Args:
+            path (Optional[str]): JSON file used to persist templates, defaults to TEMPLATE_LIBRARY_PATH.
+            seed (Optional[int]): Seed for the value generator, mainly for tests.
+        """
+        self.path: Optional[str] = path if path is not None else os.getenv("TEMPLATE_LIBRARY_PATH")
+        self.min_templates: int = int(os.getenv("TEMPLATE_MIN_SIZE") or "10")
+        self.refresh_ticks: int = int(os.getenv("TEMPLATE_REFRESH_TICKS") or "30")
+        self.max_failure_ratio: float = 0.8
+        self.templates: Dict[str, QueryTemplate] = {}
+        self.signature: Optional[str] = None
+        self.ticks_since_refresh: int = 0
+        self._rendered: Dict[str, str] = {}
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._load()
+
+    def __len__(self) -> int:
+        return len(self.templates)
+
+    def bind_schema(self, signature: str) -> None:
+        """Drop all templates when they were learned against a different schema."""
+        with self._lock:
+            if self.signature is not None and signature != self.signature and self.templates:
+                logging.info("Schema changed, discarding query templates.")
+                self.templates = {}
+            self.signature = signature
+
+    def needs_refresh(self) -> bool:
+        """Return True when the LLM should be called to refresh or extend the library."""
+        return len(self.templates) < self.min_templates or self.ticks_since_refresh >= self.refresh_ticks
+
+    def learn(self, results: Iterable) -> int:
+        """
+        Store successfully executed statements as templates.
+
+        Returns:
+            int: Number of new template shapes added.
+        """
+        added = 0
+        with self._lock:
+            for result in results:
+                if not result.success:
+                    continue
+                template = QueryTemplate.from_query(result.query)
+                if template is None:
+                    continue
+                if template.shape in self.templates:
+                    self.templates[template.shape].merge(template)
+                else:
+                    self.templates[template.shape] = template
+                    added += 1
+            self.ticks_since_refresh = 0
+            self._save()
+        logging.info(f"Learned {added} new query templates ({len(self.templates)} total).")
+        return added
+
+    def generate(
+        self,
+        num_queries: int,
+        percent_inserts: int = 50,
+        percent_updates: int = 30,
+        percent_deletes: int = 20,
+    ) -> List[str]:
+        """
+        Render num_queries statements from the library, following the requested operation mix.
+        """
+        with self._lock:
+            self.ticks_since_refresh += 1
+            by_kind: Dict[str, List[QueryTemplate]] = {}
+            for template in self.templates.values():
+                by_kind.setdefault(template.kind, []).append(template)
+            weights = {"INSERT": percent_inserts, "UPDATE": percent_updates, "DELETE": percent_deletes}
+            kinds = [kind for kind in by_kind if weights.get(kind, 0) > 0]
+            if not kinds:
+                return []
+            chosen_kinds = self._rng.choices(kinds, weights=[weights[kind] for kind in kinds], k=num_queries)
+            queries = []
+            self._rendered = {}
+            for kind in chosen_kinds:
+                template = self._rng.choice(by_kind[kind])
+                query = template.render(self._rng)
+                self._rendered[query] = template.shape
+                queries.append(query)
+            return queries
+
+    def record_results(self, results: Iterable) -> None:
+        """
+        Track template success rates and drop templates that keep failing.
+
+        Each rendered statement is counted once, so the results of a batch may be recorded
+        in several calls, e.g. chunk by chunk in rate mode.
+        """
+        with self._lock:
+            for result in results:
+                template = self.templates.get(self._rendered.pop(result.query, None))
+                if template is None:
+                    continue
+                template.uses += 1
+                if not result.success:
+                    template.failures += 1
+                if template.uses >= 5 and template.failures / template.uses > self.max_failure_ratio:
+                    logging.info(f"Dropping failing query template: {template.shape}")
+                    del self.templates[template.shape]
+            self._save()
+
+    def _load(self) -> None:
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            self.signature = data.get("signature")
+            for item in data.get("templates", []):
+                template = QueryTemplate.from_dict(item)
+                self.templates[template.shape] = template
+            logging.info(f"Loaded {len(self.templates)} query templates from {self.path}.")
+        except (OSError, ValueError, TypeError) as e:
+            logging.warning(f"Ignoring unreadable template library {self.path}: {e}")
+
+    def _save(self) -> None:
+        if not self.path:
+            return
+        tmp_path = f"{self.path}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({
+                    "signature": self.signature,
+                    "templates": [template.to_dict() for template in self.templates.values()],
+                }, f)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logging.warning(f"Failed to persist template library to {self.path}: {e}")
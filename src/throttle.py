@@ -0,0 +1,196 @@
+import os
+import time
+import logging
+import threading
+from collections import deque
+from dataclasses import dataclass
+from typing import Callable, Deque, Iterable, Optional
+from psycopg2.extensions import connection
+from dotenv import load_dotenv
+from .executor import QueryResult
+from .workers import percentile
+from .metrics import THROTTLE_LIMIT, THROTTLE_UTILIZATION
+
+load_dotenv()
+
+LATENCY_WINDOW = 1000
+
+
+@dataclass
+class HealthSample:
+    active: int
+    lock_waits: int
+    replicas: int
+    replication_lag: float
+    p95_latency: float
+
+
+class AimdController:
+    def __init__(self, minimum: int, maximum: int, increase: int, decrease: float) -> None:
+        """
+        Additive-increase, multiplicative-decrease limit, starting at maximum.
+
+        Args:
+            minimum (int): Lowest value.
+            maximum (int): Highest value.
+            increase (int): Added after every healthy sample.
+            decrease (float): Factor applied after every overloaded sample, between 0 and 1.
+        """
+        self.minimum = max(minimum, 1)
+        self.maximum = max(maximum, self.minimum)
+        self.increase = max(increase, 1)
+        self.decrease = decrease
+        self.value = self.maximum
+
+    def update(self, overloaded: bool) -> int:
+        if overloaded:
+            self.value = max(self.minimum, int(self.value * self.decrease))
+        else:
+            self.value = min(self.maximum, self.value + self.increase)
+        return self.value
+
+
+class HealthMonitor:
+    def __init__(self) -> None:
+        """
+        Sample how the target database is coping: sessions waiting on locks in
+        pg_stat_activity, replay lag in pg_stat_replication, and the p95 latency of the
+        statements executed since the previous sample.
+
+        Each signal is divided by its limit (THROTTLE_MAX_LOCK_WAITS,
+        THROTTLE_MAX_REPLICATION_LAG_SECONDS, THROTTLE_MAX_LATENCY_SECONDS); the largest
+        ratio is the utilization, where 1.0 means a limit is reached.
+        """
+        self.max_lock_waits: float = float(os.getenv("THROTTLE_MAX_LOCK_WAITS") or "5")
+        self.max_replication_lag: float = float(os.getenv("THROTTLE_MAX_REPLICATION_LAG_SECONDS") or "10")
+        self.max_latency: float = float(os.getenv("THROTTLE_MAX_LATENCY_SECONDS") or "0.5")
+        self._latencies: Deque[float] = deque(maxlen=LATENCY_WINDOW)
+        self._lock = threading.Lock()
+
+    def observe(self, results: Iterable[QueryResult]) -> None:
+        with self._lock:
+            self._latencies.extend(result.latency for result in results)
+
+    def sample(self, conn: connection) -> HealthSample:
+        """Read the health signals. Other sessions' wait events need the pg_monitor role to be visible."""
+        with conn.cursor() as cur:
+            cur.execute("""
+                SELECT count(*) FILTER (WHERE state <> 'idle'),
+                    count(*) FILTER (WHERE wait_event_type = 'Lock')
+                FROM pg_stat_activity
+                WHERE backend_type = 'client backend' AND pid <> pg_backend_pid();
+            """)
+            active, lock_waits = cur.fetchone()
+            cur.execute("SELECT count(*), coalesce(extract(epoch FROM max(replay_lag)), 0)::float8 FROM pg_stat_replication;")
+            replicas, lag = cur.fetchone()
+        conn.rollback()
+        with self._lock:
+            latencies = list(self._latencies)
+            self._latencies.clear()
+        return HealthSample(active, lock_waits, replicas, lag, percentile(latencies, 95))
+
+    def utilization(self, sample: HealthSample) -> float:
+        return max(
+            sample.lock_waits / self.max_lock_waits if self.max_lock_waits > 0 else 0.0,
+            sample.replication_lag / self.max_replication_lag if self.max_replication_lag > 0 else 0.0,
+            sample.p95_latency / self.max_latency if self.max_latency > 0 else 0.0,
+        )
+
+
+class AdaptiveThrottle:
+    def __init__(self, max_concurrency: int, monitor: Optional[HealthMonitor] = None,
+                 clock: Callable[[], float] = time.monotonic) -> None:
+        """
+        Adjust batch size and worker concurrency from the target's health, AIMD-style.
+
+        Every THROTTLE_SAMPLE_SECONDS the monitor's utilization is compared with
+        THROTTLE_CEILING: above it both limits are multiplied by THROTTLE_DECREASE_FACTOR,
+        otherwise the batch size grows by THROTTLE_BATCH_STEP and concurrency by one.
+        While utilization is above 1.0 with both limits at their minimum the target is
+        saturated and execution pauses, for at most THROTTLE_MAX_PAUSE_SECONDS at a time.
+
+        Args:
+            max_concurrency (int): Upper bound for concurrency, normally WORKER_COUNT.
+            monitor (Optional[HealthMonitor]): Source of health samples.
+            clock (Callable[[], float]): Time source, mainly for tests.
+        """
+        self.enabled: bool = (os.getenv("THROTTLE_ENABLED") or "false").lower() in ("1", "true", "yes")
+        self.monitor = monitor or HealthMonitor()
+        self.clock = clock
+        self.ceiling: float = float(os.getenv("THROTTLE_CEILING") or "0.8")
+        self.interval: float = float(os.getenv("THROTTLE_SAMPLE_SECONDS") or "5")
+        self.max_pause: float = float(os.getenv("THROTTLE_MAX_PAUSE_SECONDS") or "60")
+        decrease = float(os.getenv("THROTTLE_DECREASE_FACTOR") or "0.5")
+        if not 0 < decrease < 1:
+            raise EnvironmentError(f"Invalid THROTTLE_DECREASE_FACTOR '{decrease}', expected a value between 0 and 1.")
+        self.batch = AimdController(
+            int(os.getenv("THROTTLE_MIN_BATCH") or "1"),
+            int(os.getenv("THROTTLE_MAX_BATCH") or "1000"),
+            int(os.getenv("THROTTLE_BATCH_STEP") or "10"),
+            decrease,
+        )
+        self.concurrency = AimdController(1, max_concurrency, 1, decrease)
+        self.utilization = 0.0
+        self.last_sample: Optional[HealthSample] = None
+        self._sampled_at: Optional[float] = None
+        self._stop = threading.Event()
+
+    @property
+    def batch_size(self) -> int:
+        return self.batch.value
+
+    @property
+    def workers(self) -> int:
+        return self.concurrency.value
+
+    @property
+    def saturated(self) -> bool:
+        return self.utilization > 1.0 and self.batch.value == self.batch.minimum and self.concurrency.value == self.concurrency.minimum
+
+    def observe(self, results: Iterable[QueryResult]) -> None:
+        self.monitor.observe(results)
+
+    def update(self, conn: connection) -> None:
+        """Take a health sample and adjust the limits if the sample interval has passed."""
+        now = self.clock()
+        if self._sampled_at is not None and now - self._sampled_at < self.interval:
+            return
+        self._sampled_at = now
+        try:
+            sample = self.monitor.sample(conn)
+        except Exception as e:
+            logging.warning(f"Could not sample target health, keeping the current limits: {e}")
+            return
+        self.last_sample = sample
+        self.utilization = self.monitor.utilization(sample)
+        overloaded = self.utilization > self.ceiling
+        previous = (self.batch.value, self.concurrency.value)
+        self.batch.update(overloaded)
+        self.concurrency.update(overloaded)
+        THROTTLE_UTILIZATION.set(self.utilization)
+        THROTTLE_LIMIT.set(self.batch.value, limit="batch_size")
+        THROTTLE_LIMIT.set(self.concurrency.value, limit="concurrency")
+        if (self.batch.value, self.concurrency.value) != previous:
+            log = logging.warning if overloaded else logging.info
+            log(
+                f"Target utilization {self.utilization:.2f} (lock waits {sample.lock_waits}, replication lag "
+                f"{sample.replication_lag:.1f}s, p95 {sample.p95_latency * 1000:.0f}ms): batch size "
+                f"{self.batch.value}, concurrency {self.concurrency.value}."
+            )
+
+    def wait_until_healthy(self, conn: connection) -> None:
+        """Pause while the target is saturated, re-sampling every interval, up to max_pause seconds."""
+        deadline = self.clock() + self.max_pause
+        while self.saturated and self.clock() < deadline:
+            logging.warning(f"Target is saturated (utilization {self.utilization:.2f}), pausing execution.")
+            if self._stop.wait(self.interval):
+                return
+            self.update(conn)
+
+    @property
+    def stopped(self) -> bool:
+        return self._stop.is_set()
+
+    def stop(self) -> None:
+        """Interrupt a pause and any later one, e.g. on shutdown."""
+        self._stop.set()
@@ -0,0 +1,231 @@
+import os
+import re
+import logging
+from collections import Counter, OrderedDict, deque
+from typing import Deque, Iterable, Iterator, List, Optional, Set, Tuple
+from psycopg2.extensions import connection
+from dotenv import load_dotenv
+from .sql_parser import DML_KINDS, significant, statement_kind, statement_shape, target_table, tokenize
+from .metrics import REGISTRY
+
+load_dotenv()
+
+VALIDATION_MODES = ("off", "parse", "explain")
+VALIDATION_SAVEPOINT = "synpg_validate"
+
+STATEMENTS_REJECTED = REGISTRY.counter(
+    "synpg_statements_rejected_total", "Statements rejected before execution, by target table and reason.", ("table", "reason")
+)
+
+ERROR_PATTERNS = (
+    ("undefined_column", re.compile(r'column "(?P<column>[^"]+)"(?: of relation "(?P<table>[^"]+)")? does not exist')),
+    ("undefined_table", re.compile(r'relation "(?P<table>[^"]+)" does not exist')),
+    ("not_null_violation", re.compile(r'null value in column "(?P<column>[^"]+)"(?: of relation "(?P<table>[^"]+)")?')),
+    ("foreign_key_violation", re.compile(r"violates foreign key constraint")),
+    ("unique_violation", re.compile(r"duplicate key value violates unique constraint")),
+    ("check_violation", re.compile(r"violates check constraint")),
+    ("invalid_input", re.compile(r"invalid input|out of range|value too long")),
+    ("syntax_error", re.compile(r"syntax error")),
+)
+
+# Error classes that fail the same way every time, so matching statements can be dropped early.
+DETERMINISTIC_ERRORS = ("undefined_column", "undefined_table")
+
+FailureKey = Tuple[Optional[str], Optional[str], str]
+
+
+def classify_error(message: str) -> Tuple[str, Optional[str], Optional[str]]:
+    """
+    Map a Postgres error message to an error class and the table and column it names.
+
+    Returns:
+        Tuple[str, Optional[str], Optional[str]]: (error class, table, column).
+    """
+    for error_class, pattern in ERROR_PATTERNS:
+        match = pattern.search(message)
+        if match:
+            groups = match.groupdict()
+            return error_class, groups.get("table"), groups.get("column")
+    return "other", None, None
+
+
+def precheck(sql: str) -> Optional[str]:
+    """
+    Classify a statement without the database.
+
+    Returns:
+        Optional[str]: Reason to reject the statement, or None if it is a single INSERT, UPDATE or DELETE.
+    """
+    tokens = significant(tokenize(sql))
+    if not tokens:
+        return "empty"
+    semicolons = [k for k, (_, token) in enumerate(tokens) if token.depth == 0 and token.text == ";"]
+    if any(k != len(tokens) - 1 for k in semicolons):
+        return "multiple_statements"
+    if statement_kind(sql) not in DML_KINDS:
+        return "not_dml"
+    return None
+
+
+class FailureCache:
+    def __init__(self, size: Optional[int] = None, threshold: Optional[int] = None) -> None:
+        """
+        Rolling window of recent statement failures keyed by table, column and error class.
+
+        Args:
+            size (Optional[int]): Failures kept, defaults to FAILURE_CACHE_SIZE or 500.
+            threshold (Optional[int]): Occurrences within the window that make a failure
+                recurring, defaults to FAILURE_THRESHOLD or 3.
+        """
+        self.size: int = size if size is not None else int(os.getenv("FAILURE_CACHE_SIZE") or "500")
+        self.threshold: int = threshold if threshold is not None else int(os.getenv("FAILURE_THRESHOLD") or "3")
+        self._window: Deque[FailureKey] = deque()
+        self._counts: Counter = Counter()
+
+    def __len__(self) -> int:
+        return len(self._window)
+
+    def record(self, query: str, error: str) -> FailureKey:
+        error_class, table, column = classify_error(error)
+        key = (table or target_table(query), column, error_class)
+        self._window.append(key)
+        self._counts[key] += 1
+        while len(self._window) > self.size:
+            old = self._window.popleft()
+            self._counts[old] -= 1
+            if self._counts[old] <= 0:
+                del self._counts[old]
+        return key
+
+    def clear(self) -> None:
+        self._window.clear()
+        self._counts.clear()
+
+    def recurring(self) -> List[Tuple[FailureKey, int]]:
+        """Failures seen at least threshold times in the window, most frequent first."""
+        return [(key, count) for key, count in self._counts.most_common() if count >= self.threshold]
+
+    def blocked(self, query: str) -> Optional[FailureKey]:
+        """
+        Return the recurring deterministic failure a statement would hit, if any.
+
+        A statement is blocked when it writes to a table that keeps failing as undefined,
+        or mentions a column of its target table that keeps failing as undefined.
+        """
+        table = target_table(query)
+        words: Optional[Set[str]] = None
+        for key, _ in self.recurring():
+            failed_table, column, error_class = key
+            if error_class not in DETERMINISTIC_ERRORS or failed_table != table:
+                continue
+            if column is None:
+                return key
+            if words is None:
+                words = {
+                    token.text.strip('"') if token.kind == "ident" else token.text.lower()
+                    for _, token in significant(tokenize(query))
+                    if token.kind in ("word", "ident")
+                }
+            if column in words:
+                return key
+        return None
+
+    def prompt_hints(self, limit: int = 5) -> List[str]:
+        """Describe the most frequent recurring failures as instructions for the LLM prompt."""
+        hints = []
+        for (table, column, error_class), count in self.recurring()[:limit]:
+            subject = f'column "{column}" of table "{table}"' if column else f'table "{table}"' if table else "statements"
+            hints.append(f"{subject} failed {count} times recently with {error_class.replace('_', ' ')}; avoid repeating it.")
+        return hints
+
+
+class StatementValidator:
+    def __init__(self, mode: Optional[str] = None) -> None:
+        """
+        Check generated statements before they reach the executor.
+
+        Args:
+            mode (Optional[str]): One of VALIDATION_MODES, defaults to VALIDATION_MODE or "parse".
+                "parse" rejects anything that is not a single INSERT, UPDATE or DELETE and
+                statements that hit a recurring undefined table or column. "explain" also
+                plans each new statement shape with EXPLAIN, which does not execute it.
+        """
+        self.mode: str = (mode or os.getenv("VALIDATION_MODE") or "parse").lower()
+        if self.mode not in VALIDATION_MODES:
+            raise EnvironmentError(f"Invalid VALIDATION_MODE '{self.mode}', expected one of {VALIDATION_MODES}.")
+        self.cache_size: int = int(os.getenv("VALIDATION_CACHE_SIZE") or "1000")
+        self.failures = FailureCache()
+        self._shapes: "OrderedDict[str, Optional[str]]" = OrderedDict()
+
+    def filter(self, conn: connection, queries: Iterable[str]) -> Iterator[str]:
+        """
+        Lazily yield the statements that pass validation; rejected ones are logged and recorded.
+        """
+        for query in queries:
+            reason = self.check(conn, query)
+            if reason is None:
+                yield query
+                continue
+            STATEMENTS_REJECTED.inc(table=target_table(query) or "unknown", reason=reason)
+            logging.warning(f"Rejected query before execution ({reason}): {query}")
+
+    def check(self, conn: connection, query: str) -> Optional[str]:
+        """
+        Validate one statement. EXPLAIN results are cached per statement shape.
+
+        Returns:
+            Optional[str]: Reason the statement was rejected, or None if it may run.
+        """
+        if self.mode == "off":
+            return None
+        reason = precheck(query)
+        if reason is not None:
+            return reason
+        blocked = self.failures.blocked(query)
+        if blocked is not None:
+            return f"recurring_{blocked[2]}"
+        if self.mode != "explain":
+            return None
+        shape = statement_shape(query)
+        if shape in self._shapes:
+            self._shapes.move_to_end(shape)
+            error = self._shapes[shape]
+        else:
+            error = self._explain(conn, query)
+            self._shapes[shape] = error
+            if len(self._shapes) > self.cache_size:
+                self._shapes.popitem(last=False)
+            if error is not None:
+                self.failures.record(query, error)
+        if error is None:
+            return None
+        return classify_error(error)[0]
+
+    def observe(self, results: Iterable) -> None:
+        """Record the failures of executed statements in the failure cache."""
+        for result in results:
+            if not result.success and result.error:
+                self.failures.record(result.query, result.error)
+
+    def prompt_hints(self) -> List[str]:
+        return self.failures.prompt_hints()
+
+    def reset(self) -> None:
+        """
+        Forget recorded failures and cached EXPLAIN results, e.g. after the schema changed.
+
+        Blocked statements never run, so an undefined table or column would otherwise stay
+        blocked after it has been created.
+        """
+        self.failures.clear()
+        self._shapes.clear()
+
+    def _explain(self, conn: connection, query: str) -> Optional[str]:
+        with conn.cursor() as cur:
+            try:
+                cur.execute(f"SAVEPOINT {VALIDATION_SAVEPOINT}; EXPLAIN {query.strip().rstrip(';')};")
+                cur.execute(f"RELEASE SAVEPOINT {VALIDATION_SAVEPOINT};")
+                return None
+            except Exception as e:
+                cur.execute(f"ROLLBACK TO SAVEPOINT {VALIDATION_SAVEPOINT};")
+                return str(e).strip()
@@ -0,0 +1,161 @@
+import os
+import time
+import math
+import logging
+from dataclasses import dataclass, field
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Sequence, Tuple
+from dotenv import load_dotenv
+from .db import Database
+from .executor import QueryExecutor, QueryResult
+from .sql_parser import target_table
+
+load_dotenv()
+
+
+def percentile(values: Sequence[float], pct: float) -> float:
+    """Nearest-rank percentile of values, 0.0 for an empty sequence."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(math.ceil(pct / 100.0 * len(ordered)), 1)
+    return ordered[rank - 1]
+
+
+@dataclass
+class ExecutionReport:
+    statements: int
+    succeeded: int
+    elapsed: float
+    workers: int
+    latencies: List[float] = field(default_factory=list, repr=False)
+
+    @property
+    def throughput(self) -> float:
+        """Statements per second across all workers."""
+        return self.statements / self.elapsed if self.elapsed > 0 else 0.0
+
+    @property
+    def p50(self) -> float:
+        return percentile(self.latencies, 50)
+
+    @property
+    def p95(self) -> float:
+        return percentile(self.latencies, 95)
+
+    @property
+    def p99(self) -> float:
+        return percentile(self.latencies, 99)
+
+    def summary(self) -> str:
+        return (
+            f"{self.succeeded}/{self.statements} statements on {self.workers} workers in {self.elapsed:.2f}s "
+            f"({self.throughput:.1f} stmt/s, p50={self.p50 * 1000:.1f}ms, "
+            f"p95={self.p95 * 1000:.1f}ms, p99={self.p99 * 1000:.1f}ms)"
+        )
+
+
+def partition_by_table(queries: Sequence[str], workers: int,
+                       components: Optional[Dict[str, str]] = None) -> List[List[int]]:
+    """
+    Split statement indexes into per-worker lists so that each table is handled by one worker.
+
+    Keeping all statements for a table on one connection preserves their relative order and
+    avoids row lock contention between workers. Tables linked by foreign keys are kept on the
+    same worker too, since a child row can only be inserted in the transaction that sees its
+    parent. Groups are assigned largest first to the least loaded worker; statements without a
+    recognizable target table are spread evenly.
+
+    Args:
+        queries (Sequence[str]): Statements to split.
+        workers (int): Number of workers.
+        components (Optional[Dict[str, str]]): Table to group mapping, see ForeignKeyGraph.components.
+
+    Returns:
+        List[List[int]]: One list of indexes into queries per worker, each in input order.
+    """
+    groups: Dict[Optional[str], List[int]] = {}
+    components = components or {}
+    for i, query in enumerate(queries):
+        table = target_table(query)
+        groups.setdefault(components.get(table, table) if table is not None else None, []).append(i)
+    unassigned = groups.pop(None, [])
+    parts: List[List[int]] = [[] for _ in range(max(workers, 1))]
+    for _, indexes in sorted(groups.items(), key=lambda item: (-len(item[1]), item[0])):
+        min(parts, key=len).extend(indexes)
+    for i in unassigned:
+        min(parts, key=len).append(i)
+    return [sorted(part) for part in parts if part]
+
+
+class WorkerPool:
+    def __init__(self, db: Database, executor: QueryExecutor, workers: Optional[int] = None) -> None:
+        """
+        Execute a batch of statements in parallel on several pooled connections.
+
+        Each worker thread borrows its own connection and runs its partition with the
+        shared executor, so the executor's transaction mode applies per worker.
+        psycopg2 releases the GIL while waiting on the server, so threads scale with
+        the number of connections.
+
+        Args:
+            db (Database): Database whose pool the workers borrow from.
+            executor (QueryExecutor): Executor used by every worker.
+            workers (Optional[int]): Number of workers, defaults to WORKER_COUNT or 1.
+        """
+        self.db = db
+        self.executor = executor
+        self.workers: int = workers if workers is not None else int(os.getenv("WORKER_COUNT") or "1")
+        if self.workers < 1:
+            raise EnvironmentError(f"Invalid WORKER_COUNT '{self.workers}', expected at least 1.")
+        self._threads: Optional[ThreadPoolExecutor] = None
+
+    def execute(self, queries: Sequence[str], workers: Optional[int] = None,
+                components: Optional[Dict[str, str]] = None) -> Tuple[List[QueryResult], ExecutionReport]:
+        """
+        Run the statements across the workers.
+
+        Args:
+            queries (Sequence[str]): Statements to run.
+            workers (Optional[int]): Use at most this many of the workers, e.g. when throttled.
+            components (Optional[Dict[str, str]]): Tables that must share a worker, see partition_by_table.
+
+        Returns:
+            Tuple[List[QueryResult], ExecutionReport]: Results in input order and the
+            aggregate throughput and latency report.
+        """
+        queries = list(queries)
+        parts = partition_by_table(queries, min(workers or self.workers, self.workers), components)
+        start = time.perf_counter()
+        if self._threads is None:
+            self._threads = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="query-worker")
+        futures = [self._threads.submit(self._run_part, [queries[i] for i in part]) for part in parts]
+        results: List[Optional[QueryResult]] = [None] * len(queries)
+        for part, future in zip(parts, futures):
+            try:
+                part_results = future.result()
+            except Exception as e:
+                logging.error(f"Worker failed to execute its statements: {e}")
+                part_results = [QueryResult(queries[i], False, str(e)) for i in part]
+            for i, result in zip(part, part_results):
+                results[i] = result
+        elapsed = time.perf_counter() - start
+        report = ExecutionReport(
+            statements=len(queries),
+            succeeded=sum(1 for result in results if result.success),
+            elapsed=elapsed,
+            workers=len(parts),
+            latencies=[result.latency for result in results],
+        )
+        logging.info(f"Executed {report.summary()}.")
+        return results, report
+
+    def shutdown(self) -> None:
+        """Wait for running workers and release their threads."""
+        if self._threads is not None:
+            self._threads.shutdown(wait=True)
+            self._threads = None
+
+    def _run_part(self, queries: List[str]) -> List[QueryResult]:
+        with self.db.borrow() as conn:
+            return self.executor.execute(conn, queries)
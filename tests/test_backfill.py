@@ -0,0 +1,110 @@
+import os
+import json
+import tempfile
+import threading
+import unittest
+from datetime import datetime
+from unittest.mock import MagicMock
+from contextlib import contextmanager
+from src.backfill import Backfill, BackfillCheckpoint, parse_time, plan_chunks
+
+COLUMNS = {
+    "users": [
+        {"name": "id", "type": "integer", "nullable": False, "has_default": True, "generated": True, "max_length": None, "precision": 32, "scale": 0},
+        {"name": "name", "type": "text", "nullable": False, "has_default": False, "generated": False, "max_length": None, "precision": None, "scale": None},
+    ],
+    "orders": [
+        {"name": "user_id", "type": "integer", "nullable": False, "has_default": False, "generated": False, "max_length": None, "precision": 32, "scale": 0},
+        {"name": "created_at", "type": "timestamp without time zone", "nullable": False, "has_default": False, "generated": False, "max_length": None, "precision": None, "scale": None},
+    ],
+}
+FOREIGN_KEYS = [{"name": "orders_user_fk", "table": "orders", "columns": ["user_id"], "ref_table": "users", "ref_columns": ["id"]}]
+
+
+def make_db(copied):
+    mock_db = MagicMock()
+    mock_db.pool_max = 10
+    mock_db.get_table_columns.return_value = COLUMNS
+    mock_db.get_primary_keys.return_value = {"users": ["id"]}
+    mock_db.get_foreign_keys.return_value = FOREIGN_KEYS
+    mock_db.get_column_stats.return_value = {"orders": {"created_at": {
+        "null_frac": 0.0, "n_distinct": -1, "most_common_vals": None, "most_common_freqs": None,
+        "histogram_bounds": ["2020-01-01 00:00:00", "2020-06-01 00:00:00"],
+    }}}
+    lock = threading.Lock()
+
+    def copy_expert(sql, stream, size):
+        data = []
+        while True:
+            chunk = stream.read(size)
+            if not chunk:
+                break
+            data.append(chunk)
+        with lock:
+            copied.append((sql, "".join(data)))
+
+    @contextmanager
+    def borrow():
+        conn = MagicMock()
+        conn.cursor.return_value.__enter__.return_value.copy_expert.side_effect = copy_expert
+        yield conn
+
+    mock_db.borrow.side_effect = borrow
+    mock_db.connection.cursor.return_value.__enter__.return_value.fetchall.return_value = [(1,), (2,), (3,)]
+    return mock_db
+
+
+class TestPlanChunks(unittest.TestCase):
+    def test_spreads_rows(self):
+        chunks = plan_chunks(datetime(2024, 1, 1), datetime(2024, 1, 3, 12), 10, 24)
+
+        self.assertEqual([chunk.rows for chunk in chunks], [4, 3, 3])
+        self.assertEqual([chunk.offset for chunk in chunks], [0, 4, 7])
+        self.assertEqual(chunks[-1].end, datetime(2024, 1, 3, 12))
+
+    def test_rejects_empty_range(self):
+        with self.assertRaises(ValueError):
+            plan_chunks(datetime(2024, 1, 2), datetime(2024, 1, 1), 10, 24)
+
+    def test_parse_time_normalizes_to_utc(self):
+        self.assertEqual(parse_time("2024-01-01T02:00:00+02:00"), datetime(2024, 1, 1))
+
+
+class TestBackfillCheckpoint(unittest.TestCase):
+    def test_resume_and_mismatch(self):
+        path = os.path.join(tempfile.mkdtemp(), "checkpoint.json")
+        plan = {"start": "2024-01-01T00:00:00", "rows": 10}
+        BackfillCheckpoint(path, plan).mark("users", 2)
+
+        self.assertTrue(BackfillCheckpoint(path, plan).is_done("users", 2))
+        with self.assertRaises(ValueError):
+            BackfillCheckpoint(path, dict(plan, rows=20))
+
+
+class TestBackfill(unittest.TestCase):
+    def test_loads_parents_first_within_chunk_windows(self):
+        copied = []
+        path = os.path.join(tempfile.mkdtemp(), "checkpoint.json")
+        backfill = Backfill(make_db(copied), datetime(2024, 1, 1), datetime(2024, 1, 3), 20, chunk_hours=24, workers=2, checkpoint_path=path)
+
+        loaded = backfill.run()
+
+        self.assertEqual(loaded, 40)
+        tables = [sql.split()[1].strip('"') for sql, _ in copied]
+        self.assertEqual(tables, ["users", "users", "orders", "orders"])
+        for sql, data in copied[2:]:
+            for line in data.splitlines():
+                user_id, created_at = line.split(",")
+                self.assertIn(user_id, ("1", "2", "3"))
+                self.assertTrue("2024-01-01" <= created_at < "2024-01-03")
+        with open(path) as f:
+            self.assertEqual(json.load(f)["done"], {"users": [0, 1], "orders": [0, 1]})
+
+        copied.clear()
+        resumed = Backfill(make_db(copied), datetime(2024, 1, 1), datetime(2024, 1, 3), 20, chunk_hours=24, workers=2, checkpoint_path=path)
+        self.assertEqual(resumed.run(), 0)
+        self.assertEqual(copied, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
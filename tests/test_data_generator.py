@@ -47,6 +47,194 @@ class TestDataGenerator(unittest.TestCase):
         mock_db.connection.rollback.assert_called_once()
         mock_db.close.assert_called_once()
 
+    @patch.dict("os.environ", {"GENERATION_MODE": "template", "TEMPLATE_LIBRARY_PATH": "", "TEMPLATE_MIN_SIZE": "1"})
+    @patch("src.data_generator.Database")
+    @patch("src.data_generator.GPTQueryGenerator")
+    def test_template_mode_skips_llm_once_learned(self, MockGPTQueryGenerator: MagicMock, MockDatabase: MagicMock):
+        """Test that template mode only calls the LLM until the library is populated."""
+        mock_db = MockDatabase.return_value
+        mock_gpt = MockGPTQueryGenerator.return_value
+        mock_cursor = MagicMock()
+        mock_db.connection.cursor.return_value.__enter__.return_value = mock_cursor
+
+        mock_db.get_all_ddl.return_value = ["CREATE TABLE test (id integer, name text);"]
+        mock_gpt.generate_queries.return_value = ["INSERT INTO test (id, name) VALUES (1, 'a');"]
+
+        generator = DataGenerator(mock_db)
+        generator.template_batch_size = 5
+        generator.generate_and_run_queries()
+        generator.generate_and_run_queries()
+
+        mock_gpt.generate_queries.assert_called_once()
+        self.assertEqual(len(generator.templates), 1)
+
+    @patch.dict("os.environ", {"GENERATION_MODE": "native", "NATIVE_ROWS_PER_TABLE": "5"})
+    @patch("src.data_generator.Database")
+    @patch("src.data_generator.GPTQueryGenerator")
+    def test_native_mode_bulk_loads_without_llm(self, MockGPTQueryGenerator: MagicMock, MockDatabase: MagicMock):
+        """Test that native mode loads rows with COPY and never calls the LLM."""
+        mock_db = MockDatabase.return_value
+        mock_gpt = MockGPTQueryGenerator.return_value
+        mock_db.get_all_ddl.return_value = ["CREATE TABLE test (name text);"]
+        mock_db.get_table_columns.return_value = {"test": [{
+            "name": "name", "type": "text", "nullable": False, "has_default": False,
+            "generated": False, "max_length": None, "precision": None, "scale": None,
+        }]}
+        mock_db.get_column_stats.return_value = {}
+        mock_cursor = mock_db.connection.cursor.return_value.__enter__.return_value
+        mock_cursor.copy_expert.side_effect = lambda sql, stream, size: stream.read()
+
+        generator = DataGenerator(mock_db)
+        generator.generate_and_run_queries()
+
+        mock_gpt.generate_queries.assert_not_called()
+        mock_cursor.copy_expert.assert_called_once()
+        mock_db.connection.commit.assert_called_once()
+        mock_db.close.assert_called_once()
+
+    @patch.dict("os.environ", {"GENERATION_MODE": "native", "NATIVE_ROWS_PER_TABLE": "200"})
+    @patch("src.data_generator.Database")
+    @patch("src.data_generator.GPTQueryGenerator")
+    def test_native_mode_samples_column_stats(self, MockGPTQueryGenerator: MagicMock, MockDatabase: MagicMock):
+        """Test that native mode draws values from pg_stats most common values."""
+        mock_db = MockDatabase.return_value
+        mock_db.get_all_ddl.return_value = ["CREATE TABLE test (flag boolean, status text);"]
+        mock_db.get_table_columns.return_value = {"test": [{
+            "name": "flag", "type": "boolean", "nullable": False, "has_default": False,
+            "generated": False, "max_length": None, "precision": None, "scale": None,
+        }, {
+            "name": "status", "type": "text", "nullable": True, "has_default": False,
+            "generated": False, "max_length": None, "precision": None, "scale": None,
+        }]}
+        mock_db.get_primary_keys.return_value = {}
+        mock_db.get_column_stats.return_value = {"test": {"status": {
+            "null_frac": 0.25, "n_distinct": 2, "most_common_vals": ["open", "closed"],
+            "most_common_freqs": [0.6, 0.15], "histogram_bounds": None,
+        }}}
+        copied = []
+        mock_cursor = mock_db.connection.cursor.return_value.__enter__.return_value
+        mock_cursor.copy_expert.side_effect = lambda sql, stream, size: copied.append(stream.read())
+
+        generator = DataGenerator(mock_db)
+        generator.generate_and_run_queries()
+
+        values = [line.split(",")[1] for line in copied[0].splitlines()]
+        self.assertEqual(len(values), 200)
+        self.assertEqual(set(values), {"open", "closed", ""})
+
+    @patch("src.data_generator.Database")
+    @patch("src.data_generator.GPTQueryGenerator")
+    def test_run_chunk_drains_buffered_batch(self, MockGPTQueryGenerator: MagicMock, MockDatabase: MagicMock):
+        """Test that rate mode chunks run from one buffered batch before generating another."""
+        mock_db = MockDatabase.return_value
+        mock_gpt = MockGPTQueryGenerator.return_value
+        mock_cursor = MagicMock()
+        mock_db.connection.cursor.return_value.__enter__.return_value = mock_cursor
+
+        mock_db.get_all_ddl.return_value = ["CREATE TABLE test (id integer);"]
+        mock_gpt.generate_queries.return_value = [
+            "INSERT INTO test (id) VALUES (1);",
+            "INSERT INTO test (id) VALUES (2);",
+            "INSERT INTO test (id) VALUES (3);",
+        ]
+
+        generator = DataGenerator(mock_db)
+        self.assertEqual(generator.run_chunk(2), 2)
+        self.assertEqual(generator.run_chunk(2), 1)
+        mock_gpt.generate_queries.assert_called_once()
+        self.assertEqual(generator.run_chunk(2), 2)
+        self.assertEqual(mock_gpt.generate_queries.call_count, 2)
+
+    @patch("src.data_generator.Database")
+    @patch("src.data_generator.GPTQueryGenerator")
+    def test_schema_change_unblocks_failed_statements(self, MockGPTQueryGenerator: MagicMock, MockDatabase: MagicMock):
+        """Test that statements blocked as undefined run again once the schema changed."""
+        mock_db = MockDatabase.return_value
+        mock_gpt = MockGPTQueryGenerator.return_value
+        mock_db.get_catalog_fingerprint.side_effect = ["a", "b"]
+        mock_db.get_all_ddl.return_value = ["CREATE TABLE audit (id integer);"]
+        query = "INSERT INTO audit (id) VALUES (1);"
+        mock_gpt.generate_queries.return_value = [query]
+
+        generator = DataGenerator(mock_db)
+        generator.open_session()
+        for _ in range(generator.validator.failures.threshold):
+            generator.validator.failures.record(query, 'relation "audit" does not exist')
+        self.assertEqual(generator.validator.check(mock_db.connection, query), "recurring_undefined_table")
+
+        self.assertEqual(generator.run_chunk(1), 1)
+
+        self.assertEqual(generator.validator.prompt_hints(), [])
+        self.assertIsNone(generator.validator.check(mock_db.connection, query))
+
+    @patch.dict("os.environ", {"SCHEMA_ENCODING": "compact", "PROMPT_TOKEN_BUDGET": "1", "SHARD_MODE": "parallel"})
+    @patch("src.data_generator.Database")
+    @patch("src.data_generator.GPTQueryGenerator")
+    def test_compact_schema_shards_requested_in_parallel(self, MockGPTQueryGenerator: MagicMock, MockDatabase: MagicMock):
+        """Test that a compact schema over budget is split into one LLM request per shard."""
+        mock_db = MockDatabase.return_value
+        mock_gpt = MockGPTQueryGenerator.return_value
+        mock_gpt.construct_prompt.return_value = "prompt"
+        mock_gpt.generate_queries.side_effect = lambda shard: [f"-- {len(shard)}"]
+        mock_db.get_table_columns.return_value = {
+            table: [{
+                "name": "id", "type": "integer", "nullable": False, "has_default": True,
+                "generated": False, "max_length": None, "precision": None, "scale": None,
+            }]
+            for table in ("a", "b")
+        }
+        mock_db.get_primary_keys.return_value = {"a": ["id"], "b": ["id"]}
+        mock_db.get_foreign_keys.return_value = []
+
+        generator = DataGenerator(mock_db)
+        queries, from_llm = generator.produce_queries(["CREATE VIEW v AS SELECT 1;"])
+
+        self.assertTrue(from_llm)
+        self.assertEqual(queries, ["-- 2", "-- 2"])
+        prompts = sorted(call.args[0][1] for call in mock_gpt.generate_queries.call_args_list)
+        self.assertEqual(prompts, ["a(id int PK=)", "b(id int PK=)"])
+
+    @patch.dict("os.environ", {"LLM_STREAMING": "true"})
+    @patch("src.data_generator.Database")
+    @patch("src.data_generator.GPTQueryGenerator")
+    def test_streamed_queries_execute_as_they_arrive(self, MockGPTQueryGenerator: MagicMock, MockDatabase: MagicMock):
+        """Test that streamed statements run before the rest of the response arrives."""
+        mock_db = MockDatabase.return_value
+        mock_gpt = MockGPTQueryGenerator.return_value
+        mock_cursor = MagicMock()
+        mock_db.connection.cursor.return_value.__enter__.return_value = mock_cursor
+        mock_db.get_all_ddl.return_value = ["CREATE TABLE test (id integer);"]
+        executed_before_second = []
+
+        def stream(shard):
+            yield "INSERT INTO test (id) VALUES (1);"
+            executed_before_second.extend(call.args[0] for call in mock_cursor.execute.call_args_list)
+            yield "INSERT INTO test (id) VALUES (2);"
+
+        mock_gpt.stream_queries.side_effect = stream
+
+        generator = DataGenerator(mock_db)
+        generator.generate_and_run_queries()
+
+        mock_gpt.generate_queries.assert_not_called()
+        self.assertIn("INSERT INTO test (id) VALUES (1);", executed_before_second)
+        mock_cursor.execute.assert_any_call("INSERT INTO test (id) VALUES (2);")
+
+    @patch("src.data_generator.Database")
+    @patch("src.data_generator.GPTQueryGenerator")
+    def test_empty_schema_skips_generation(self, MockGPTQueryGenerator: MagicMock, MockDatabase: MagicMock):
+        """Test that a schema without tables does not call the LLM."""
+        mock_db = MockDatabase.return_value
+        mock_gpt = MockGPTQueryGenerator.return_value
+
+        generator = DataGenerator(mock_db)
+        queries, from_llm = generator.produce_queries([])
+
+        self.assertEqual(list(queries), [])
+        self.assertFalse(from_llm)
+        mock_gpt.generate_queries.assert_not_called()
+        mock_gpt.stream_queries.assert_not_called()
+
 
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
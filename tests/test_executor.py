@@ -0,0 +1,72 @@
+import unittest
+from unittest.mock import MagicMock, call
+from src.executor import QueryExecutor
+
+
+class TestQueryExecutor(unittest.TestCase):
+    def setUp(self):
+        self.mock_conn = MagicMock()
+        self.mock_cursor = MagicMock()
+        self.mock_conn.cursor.return_value.__enter__.return_value = self.mock_cursor
+
+    def test_statement_mode(self):
+        executor = QueryExecutor("statement")
+        results = executor.execute(self.mock_conn, ["INSERT INTO test (id) VALUES (1);"])
+
+        self.assertTrue(results[0].success)
+        self.mock_cursor.execute.assert_has_calls([
+            call("BEGIN;"),
+            call("INSERT INTO test (id) VALUES (1);"),
+            call("COMMIT;"),
+        ])
+
+    def test_batch_mode_uses_savepoints(self):
+        executor = QueryExecutor("batch")
+        queries = ["INSERT INTO test (id) VALUES (1);", "INSERT INTO test (id) VALUES (2);"]
+        results = executor.execute(self.mock_conn, queries)
+
+        self.assertEqual([result.success for result in results], [True, True])
+        self.assertEqual(self.mock_cursor.execute.call_args_list, [
+            call("SAVEPOINT synpg_stmt; INSERT INTO test (id) VALUES (1);"),
+            call("RELEASE SAVEPOINT synpg_stmt; SAVEPOINT synpg_stmt; INSERT INTO test (id) VALUES (2);"),
+        ])
+        self.mock_conn.commit.assert_called_once()
+
+    def test_batch_mode_isolates_failure(self):
+        executor = QueryExecutor("batch")
+        self.mock_cursor.execute.side_effect = [Exception("duplicate key"), None, None]
+        queries = ["INSERT INTO test (id) VALUES (1);", "INSERT INTO test (id) VALUES (2);"]
+        results = executor.execute(self.mock_conn, queries)
+
+        self.assertEqual([result.success for result in results], [False, True])
+        self.assertEqual(results[0].error, "duplicate key")
+        self.mock_cursor.execute.assert_any_call("ROLLBACK TO SAVEPOINT synpg_stmt;")
+        self.mock_conn.rollback.assert_not_called()
+        self.mock_conn.commit.assert_called_once()
+
+    def test_multi_mode_single_round_trip(self):
+        executor = QueryExecutor("multi")
+        queries = ["INSERT INTO test (id) VALUES (1);", "INSERT INTO test (id) VALUES (2)"]
+        results = executor.execute(self.mock_conn, queries)
+
+        self.assertEqual(len(results), 2)
+        self.mock_cursor.execute.assert_called_once_with(
+            "INSERT INTO test (id) VALUES (1);\nINSERT INTO test (id) VALUES (2);"
+        )
+
+    def test_multi_mode_falls_back_to_savepoints(self):
+        executor = QueryExecutor("multi")
+        self.mock_cursor.execute.side_effect = [Exception("batch failed"), Exception("bad query"), None, None]
+        queries = ["INSERT INTO test (id) VALUES ('x');", "INSERT INTO test (id) VALUES (2);"]
+        results = executor.execute(self.mock_conn, queries)
+
+        self.assertEqual([result.success for result in results], [False, True])
+        self.mock_conn.rollback.assert_called_once()
+
+    def test_invalid_mode(self):
+        with self.assertRaises(EnvironmentError):
+            QueryExecutor("parallel")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,137 @@
+import unittest
+from unittest.mock import MagicMock
+from src.executor import QueryResult
+from src.foreign_keys import ForeignKeyGraph, KeyPool, KeyPoolRegistry
+
+FOREIGN_KEYS = [
+    {"name": "orders_customer_fk", "table": "orders", "columns": ["customer_id"], "ref_table": "customers", "ref_columns": ["id"]},
+    {"name": "items_order_fk", "table": "order_items", "columns": ["order_id"], "ref_table": "orders", "ref_columns": ["id"]},
+    {"name": "employees_manager_fk", "table": "employees", "columns": ["manager_id"], "ref_table": "employees", "ref_columns": ["id"]},
+]
+
+
+class TestForeignKeyGraph(unittest.TestCase):
+    def test_insert_order(self):
+        graph = ForeignKeyGraph(["order_items", "orders", "customers", "employees"], FOREIGN_KEYS)
+        order = graph.insert_order()
+        self.assertLess(order.index("customers"), order.index("orders"))
+        self.assertLess(order.index("orders"), order.index("order_items"))
+        self.assertIn("employees", order)
+        self.assertEqual(graph.parents("employees"), set())
+
+    def test_cycle_is_appended(self):
+        cyclic = [
+            {"name": "a_fk", "table": "a", "columns": ["b_id"], "ref_table": "b", "ref_columns": ["id"]},
+            {"name": "b_fk", "table": "b", "columns": ["a_id"], "ref_table": "a", "ref_columns": ["id"]},
+        ]
+        graph = ForeignKeyGraph(["a", "b", "c"], cyclic)
+        self.assertEqual(graph.insert_order(), ["c", "a", "b"])
+
+    def test_components(self):
+        graph = ForeignKeyGraph(["order_items", "orders", "customers", "employees", "products"], FOREIGN_KEYS)
+
+        self.assertEqual(graph.components(), {
+            "customers": "customers", "orders": "customers", "order_items": "customers",
+            "employees": "employees", "products": "products",
+        })
+
+    def test_sort_inserts(self):
+        graph = ForeignKeyGraph(["order_items", "orders", "customers", "employees"], FOREIGN_KEYS)
+        queries = [
+            "INSERT INTO order_items (order_id) VALUES (1);",
+            "UPDATE customers SET name = 'x' WHERE id = 1;",
+            "INSERT INTO orders (id, customer_id) VALUES (1, 1);",
+            "INSERT INTO unknown (id) VALUES (1);",
+            "INSERT INTO customers (id) VALUES (1);",
+            "INSERT INTO orders (id, customer_id) VALUES (2, 1);",
+        ]
+
+        self.assertEqual(graph.sort_inserts(queries), [
+            "INSERT INTO customers (id) VALUES (1);",
+            "INSERT INTO orders (id, customer_id) VALUES (1, 1);",
+            "INSERT INTO orders (id, customer_id) VALUES (2, 1);",
+            "INSERT INTO order_items (order_id) VALUES (1);",
+            "UPDATE customers SET name = 'x' WHERE id = 1;",
+            "INSERT INTO unknown (id) VALUES (1);",
+        ])
+
+    def test_sort_inserts_keeps_updates_after_their_rows(self):
+        graph = ForeignKeyGraph(["order_items", "orders", "customers", "employees"], FOREIGN_KEYS)
+        queries = [
+            "INSERT INTO customers (id) VALUES (1);",
+            "INSERT INTO orders (id, customer_id) VALUES (1, 1);",
+            "UPDATE orders SET customer_id = 2 WHERE id = 1;",
+            "INSERT INTO customers (id) VALUES (2);",
+        ]
+
+        self.assertEqual(graph.sort_inserts(queries), [
+            "INSERT INTO customers (id) VALUES (1);",
+            "INSERT INTO customers (id) VALUES (2);",
+            "INSERT INTO orders (id, customer_id) VALUES (1, 1);",
+            "UPDATE orders SET customer_id = 2 WHERE id = 1;",
+        ])
+        self.assertEqual(graph.sort_inserts(queries[:3]), queries[:3])
+
+    def test_sort_inserts_follows_insert_order_in_cycles(self):
+        cyclic = [
+            {"name": "a_fk", "table": "a", "columns": ["b_id"], "ref_table": "b", "ref_columns": ["id"]},
+            {"name": "b_fk", "table": "b", "columns": ["a_id"], "ref_table": "a", "ref_columns": ["id"]},
+        ]
+        queries = ["INSERT INTO b (id) VALUES (1);", "INSERT INTO a (id) VALUES (1);", "INSERT INTO b (id) VALUES (2);"]
+
+        self.assertEqual(ForeignKeyGraph(["a", "b"], cyclic).sort_inserts(queries), [queries[1], queries[0], queries[2]])
+
+
+class TestKeyPool(unittest.TestCase):
+    def test_add_discard_pick(self):
+        pool = KeyPool(capacity=3)
+        for key in [1, 2, 3, 4]:
+            pool.add(key)
+        self.assertEqual(len(pool), 3)
+        present = [key for key in [1, 2, 3, 4] if key in pool]
+        pool.discard(present[0])
+        self.assertEqual(len(pool), 2)
+        self.assertIn(pool.pick(), present[1:])
+
+
+class TestKeyPoolRegistry(unittest.TestCase):
+    def setUp(self):
+        self.mock_conn = MagicMock()
+        self.mock_cursor = self.mock_conn.cursor.return_value.__enter__.return_value
+        self.mock_cursor.fetchall.return_value = [(7,)]
+        self.registry = KeyPoolRegistry({"customers": ["id"], "order_items": ["order_id", "line"]}, seed=1)
+
+    def test_rewrite_random_subquery(self):
+        queries = self.registry.rewrite(self.mock_conn, [
+            "UPDATE customers SET name = 'x' WHERE id = (SELECT id FROM customers ORDER BY RANDOM() LIMIT 1);",
+        ])
+        self.assertEqual(queries, ["UPDATE customers SET name = 'x' WHERE id = 7;"])
+        self.mock_cursor.execute.assert_called_once()
+
+    def test_insert_gets_returning_and_feeds_pool(self):
+        queries = self.registry.rewrite(self.mock_conn, ["INSERT INTO customers (name) VALUES ('a');"])
+        self.assertEqual(queries, ['INSERT INTO customers (name) VALUES (\'a\') RETURNING "id";'])
+        self.registry.observe([QueryResult(queries[0], True, rows=[(42,)])])
+        self.assertIn(42, self.registry.pool("customers"))
+
+    def test_delete_discards_key(self):
+        queries = self.registry.rewrite(self.mock_conn, [
+            "DELETE FROM customers WHERE id = (SELECT id FROM customers ORDER BY RANDOM() LIMIT 1);",
+        ])
+        self.registry.observe([QueryResult(queries[0], True)])
+        self.assertEqual(len(self.registry.pool("customers")), 0)
+
+    def test_rewrite_stream_is_lazy(self):
+        def queries():
+            yield "UPDATE customers SET name = 'x' WHERE id = (SELECT id FROM customers ORDER BY RANDOM() LIMIT 1);"
+            raise AssertionError("consumed ahead of the executor")
+
+        stream = self.registry.rewrite_stream(self.mock_conn, queries())
+        self.assertEqual(next(stream), "UPDATE customers SET name = 'x' WHERE id = 7;")
+
+    def test_composite_keys_have_no_pool(self):
+        self.assertIsNone(self.registry.pool("order_items"))
+
+
+if __name__ == "__main__":
+    unittest.main()
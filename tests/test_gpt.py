@@ -1,6 +1,8 @@
+import time
 import unittest
 from unittest.mock import patch, MagicMock
 from src.gpt import GPTQueryGenerator
+from src.metrics import STAGE_LATENCY
 
 
 class TestGPTQueryGenerator(unittest.TestCase):
@@ -55,6 +57,67 @@ class TestGPTQueryGenerator(unittest.TestCase):
 
         self.assertEqual(len(queries), 0)
 
+    @patch("src.gpt.openai.ChatCompletion.create")
+    def test_generate_query_batches(self, mock_openai):
+        mock_openai.return_value = {
+            "choices": [
+                {"message": {"content": "['INSERT INTO test_table (id) VALUES (1);']"}},
+                {"message": {"content": "not a list"}},
+                {"message": {"content": "['DELETE FROM test_table WHERE id = 1;']"}},
+            ]
+        }
+
+        gpt_generator = GPTQueryGenerator()
+        ddl = ["CREATE TABLE test_table (id INT PRIMARY KEY, name TEXT);"]
+        batches = gpt_generator.generate_query_batches(ddl, n=3)
+
+        self.assertEqual(batches, [
+            ["INSERT INTO test_table (id) VALUES (1);"],
+            ["DELETE FROM test_table WHERE id = 1;"],
+        ])
+        self.assertEqual(mock_openai.call_args.kwargs["n"], 3)
+
+    @patch("src.gpt.openai.ChatCompletion.create")
+    def test_stream_queries_yields_complete_statements(self, mock_openai):
+        content = "['INSERT INTO test_table (id) VALUES (1);', 'DELETE FROM test_table WHERE id = 1;', 'UPDATE test_ta"
+        mock_openai.return_value = iter(
+            [{"choices": [{"delta": {"role": "assistant"}}]}]
+            + [{"choices": [{"delta": {"content": content[i:i + 5]}}]} for i in range(0, len(content), 5)]
+        )
+
+        gpt_generator = GPTQueryGenerator()
+        parses = STAGE_LATENCY.count(stage="parse")
+        stream = gpt_generator.stream_queries(["CREATE TABLE test_table (id INT PRIMARY KEY);"])
+
+        self.assertEqual(next(stream), "INSERT INTO test_table (id) VALUES (1);")
+        self.assertEqual(list(stream), ["DELETE FROM test_table WHERE id = 1;"])
+        self.assertTrue(mock_openai.call_args.kwargs["stream"])
+        self.assertEqual(STAGE_LATENCY.count(stage="parse"), parses + 1)
+
+    @patch("src.gpt.STAGE_LATENCY")
+    @patch("src.gpt.openai.ChatCompletion.create")
+    def test_stream_llm_latency_excludes_consumer_time(self, mock_openai, mock_latency):
+        content = "['DELETE FROM test_table WHERE id = 1;', 'DELETE FROM test_table WHERE id = 2;']"
+        mock_openai.return_value = iter([{"choices": [{"delta": {"content": content[i:i + 20]}}]} for i in range(0, len(content), 20)])
+
+        for _ in GPTQueryGenerator().stream_queries(["CREATE TABLE test_table (id INT PRIMARY KEY);"]):
+            time.sleep(0.1)
+
+        llm = [c.args[0] for c in mock_latency.observe.call_args_list if c.kwargs == {"stage": "llm"}]
+        self.assertEqual(len(llm), 1)
+        self.assertLess(llm[0], 0.1)
+
+    @patch("src.gpt.openai.ChatCompletion.create")
+    def test_truncated_response_is_salvaged(self, mock_openai):
+        mock_openai.return_value = {
+            "choices": [{"message": {"content": "['DELETE FROM test_table WHERE id = 1;', 'INSERT INTO test_table (id) VALUES ("}}]
+        }
+
+        gpt_generator = GPTQueryGenerator()
+        queries = gpt_generator.generate_queries(["CREATE TABLE test_table (id INT PRIMARY KEY);"])
+
+        self.assertEqual(queries, ["DELETE FROM test_table WHERE id = 1;"])
+
     def test_construct_prompt(self):
         gpt_generator = GPTQueryGenerator()
         ddl = ["CREATE TABLE test_table (id INT PRIMARY KEY, name TEXT);"]
@@ -64,6 +127,13 @@ class TestGPTQueryGenerator(unittest.TestCase):
         self.assertIn("generate 3 SQL queries", prompt)
         self.assertIn("50% INSERTs, 30% UPDATEs, and 20% DELETEs", prompt)
 
+    def test_construct_prompt_includes_failure_hints(self):
+        gpt_generator = GPTQueryGenerator()
+        gpt_generator.hints = ['table "clients" failed 3 times recently with undefined table; avoid repeating it.']
+        prompt = gpt_generator.construct_prompt(["CREATE TABLE test_table (id INT);"])
+
+        self.assertIn('- Recurring error: table "clients" failed 3 times', prompt)
+
 
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,140 @@
+import os
+import gzip
+import shutil
+import tempfile
+import threading
+import unittest
+from unittest.mock import MagicMock
+from contextlib import contextmanager
+from src.executor import QueryResult
+from src.journal import JournalReplayer, JournalWriter, journal_segments, parse_speed, read_journal
+
+
+def make_db(executed):
+    mock_db = MagicMock()
+    mock_db.pool_max = 5
+
+    @contextmanager
+    def borrow():
+        yield MagicMock()
+
+    mock_db.borrow.side_effect = borrow
+    return mock_db
+
+
+def make_executor(executed, lock):
+    mock_executor = MagicMock()
+
+    def execute(conn, queries):
+        with lock:
+            executed.extend(queries)
+        return [QueryResult(query, True, latency=0.001) for query in queries]
+
+    mock_executor.execute.side_effect = execute
+    return mock_executor
+
+
+class TestJournalWriter(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_disabled_without_directory(self):
+        writer = JournalWriter(directory="")
+
+        self.assertFalse(writer.enabled)
+        self.assertEqual(writer.record([QueryResult("INSERT INTO a VALUES (1);", True)]), 0)
+
+    def test_records_round_trip_and_rotate(self):
+        writer = JournalWriter(self.directory, segment_records=2)
+        results = [
+            QueryResult("INSERT INTO a VALUES (1);", True, latency=0.5, started_at=100.0),
+            QueryResult("INSERT INTO a VALUES (2);", False, "boom", 0.25, started_at=101.0),
+            QueryResult("INSERT INTO b VALUES (1);", True, latency=0.1, started_at=102.0),
+        ]
+        self.assertEqual(writer.record(results), 3)
+        writer.close()
+
+        self.assertEqual(len(journal_segments(self.directory)), 2)
+        records = list(read_journal(self.directory))
+        self.assertEqual([record["q"] for record in records], [result.query for result in results])
+        self.assertEqual(records[1], {"t": 101.0, "q": "INSERT INTO a VALUES (2);", "ok": False, "l": 0.25, "e": "boom"})
+        self.assertNotIn("e", records[0])
+
+    def test_reads_truncated_segment(self):
+        path = os.path.join(self.directory, "journal-20240101T000000-1-00000.jsonl.gz")
+        data = gzip.compress(b'{"t":1,"q":"INSERT INTO a VALUES (1);","ok":true,"l":0}\n{"t":2,"q":"INSERT')
+        with open(path, "wb") as f:
+            f.write(data[:-12])
+
+        records = list(read_journal(path))
+
+        self.assertEqual([record["t"] for record in records], [1])
+
+
+class TestParseSpeed(unittest.TestCase):
+    def test_values(self):
+        self.assertEqual(parse_speed("1"), 1.0)
+        self.assertEqual(parse_speed("10x"), 10.0)
+        self.assertIsNone(parse_speed("max"))
+        with self.assertRaises(ValueError):
+            parse_speed("0")
+
+
+class TestJournalReplayer(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        writer = JournalWriter(self.directory)
+        writer.record([
+            QueryResult("INSERT INTO a VALUES (1);", True, started_at=1000.0),
+            QueryResult("INSERT INTO b VALUES (1);", False, "boom", started_at=1000.1),
+            QueryResult("UPDATE a SET x = 1 WHERE id = 1;", True, started_at=1000.2),
+            QueryResult("INSERT INTO c VALUES (1);", True, started_at=1000.3),
+        ])
+        writer.close()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_replays_successful_statements_at_max_speed(self):
+        executed = []
+        replayer = JournalReplayer(make_db(executed), make_executor(executed, threading.Lock()), speed="max", concurrency=2)
+
+        report = replayer.replay(self.directory)
+
+        self.assertEqual(report.statements, 3)
+        self.assertEqual(report.succeeded, 3)
+        self.assertEqual(report.workers, 2)
+        self.assertNotIn("INSERT INTO b VALUES (1);", executed)
+        self.assertLess(executed.index("INSERT INTO a VALUES (1);"), executed.index("UPDATE a SET x = 1 WHERE id = 1;"))
+
+    def test_include_failed_and_pacing(self):
+        executed = []
+        replayer = JournalReplayer(make_db(executed), make_executor(executed, threading.Lock()), speed="10", include_failed=True)
+
+        report = replayer.replay(self.directory)
+
+        self.assertEqual(report.statements, 4)
+        self.assertGreaterEqual(report.elapsed, 0.03)
+
+    def test_raises_pool_max_to_fit_workers(self):
+        mock_db = make_db([])
+        JournalReplayer(mock_db, MagicMock(), concurrency=8)
+
+        self.assertEqual(mock_db.pool_max, 8)
+
+    def test_stop_event_ends_replay(self):
+        executed = []
+        stop_event = threading.Event()
+        stop_event.set()
+        replayer = JournalReplayer(make_db(executed), make_executor(executed, threading.Lock()), speed="max")
+
+        report = replayer.replay(self.directory, stop_event)
+
+        self.assertEqual(report.statements, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
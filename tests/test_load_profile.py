@@ -0,0 +1,86 @@
+import threading
+import unittest
+from src.load_profile import LoadProfile, RateRunner, TokenBucket
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestTokenBucket(unittest.TestCase):
+    def test_paces_at_rate(self):
+        clock = FakeClock()
+        bucket = TokenBucket(10, clock=clock)
+
+        self.assertFalse(bucket.try_acquire(5))
+        self.assertAlmostEqual(bucket.wait_time(5), 0.5)
+        clock.now = 0.5
+        self.assertTrue(bucket.try_acquire(5))
+        self.assertFalse(bucket.try_acquire(1))
+
+    def test_catch_up_is_bounded(self):
+        clock = FakeClock()
+        bucket = TokenBucket(10, max_catch_up=2, clock=clock)
+        clock.now = 60
+
+        self.assertTrue(bucket.try_acquire(20))
+        self.assertFalse(bucket.try_acquire(1))
+
+    def test_zero_rate_never_fills(self):
+        bucket = TokenBucket(0, clock=FakeClock())
+        self.assertEqual(bucket.wait_time(1), float("inf"))
+
+
+class TestLoadProfile(unittest.TestCase):
+    def test_ramp_hold_ramp_down(self):
+        profile = LoadProfile(target_rate=100, ramp_up=10, hold=20, ramp_down=10)
+
+        self.assertEqual(profile.duration, 40)
+        self.assertEqual(profile.rate_at(0), 0)
+        self.assertEqual(profile.rate_at(5), 50)
+        self.assertEqual(profile.rate_at(15), 100)
+        self.assertEqual(profile.rate_at(35), 50)
+        self.assertIsNone(profile.rate_at(40))
+
+    def test_hold_until_stopped(self):
+        profile = LoadProfile(target_rate=100)
+        self.assertIsNone(profile.duration)
+        self.assertEqual(profile.rate_at(1e6), 100)
+
+    def test_bursts(self):
+        profile = LoadProfile(target_rate=100, burst_rate=500, burst_interval=10, burst_seconds=2)
+
+        self.assertEqual(profile.rate_at(5), 100)
+        self.assertEqual(profile.rate_at(8.5), 500)
+        self.assertEqual(profile.rate_at(15), 100)
+
+
+class TestRateRunner(unittest.TestCase):
+    def test_runs_profile_to_completion(self):
+        calls = []
+
+        def work(limit):
+            calls.append(limit)
+            return limit
+
+        runner = RateRunner(LoadProfile(target_rate=200, hold=0.3), work)
+        completed = runner.run(threading.Event())
+
+        self.assertEqual(completed, sum(calls))
+        self.assertGreater(completed, 0)
+        self.assertLessEqual(completed, 200 * 0.3 + runner.bucket.capacity)
+
+    def test_stops_on_event(self):
+        stop = threading.Event()
+        stop.set()
+        runner = RateRunner(LoadProfile(target_rate=100), lambda limit: limit)
+
+        self.assertEqual(runner.run(stop), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
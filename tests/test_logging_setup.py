@@ -0,0 +1,101 @@
+import os
+import queue
+import random
+import logging
+import tempfile
+import threading
+import unittest
+from unittest.mock import MagicMock, patch
+from src import logging_setup
+from src.logging_setup import DroppingQueueHandler, SampleFilter, configure_logging, parse_levels, shutdown_logging
+from src.metrics import LOG_RECORDS_DROPPED
+
+
+def record(level: int) -> logging.LogRecord:
+    return logging.LogRecord("synpg.query", level, __file__, 1, "Executed query successfully: %s", ("SELECT 1",), None)
+
+
+class TestSampleFilter(unittest.TestCase):
+    def test_samples_successes_and_keeps_failures(self):
+        sample = SampleFilter(0.1, random.Random(0))
+
+        kept = sum(sample.filter(record(logging.INFO)) for _ in range(1000))
+
+        self.assertTrue(50 < kept < 150)
+        self.assertTrue(all(sample.filter(record(logging.ERROR)) for _ in range(100)))
+        self.assertTrue(SampleFilter(1.0).filter(record(logging.INFO)))
+
+
+class TestDroppingQueueHandler(unittest.TestCase):
+    def test_drops_when_full(self):
+        handler = DroppingQueueHandler(queue.Queue(1))
+        before = LOG_RECORDS_DROPPED.total()
+
+        handler.emit(record(logging.INFO))
+        handler.emit(record(logging.INFO))
+
+        self.assertEqual(handler.queue.qsize(), 1)
+        self.assertEqual(LOG_RECORDS_DROPPED.total() - before, 1)
+        self.assertEqual(handler.queue.get().args, ("SELECT 1",))
+
+    def test_keeps_errors_when_full(self):
+        handler = DroppingQueueHandler(queue.Queue(1), block_seconds=5)
+        handler.emit(record(logging.INFO))
+        before = LOG_RECORDS_DROPPED.total()
+        drained = []
+        timer = threading.Timer(0.1, lambda: drained.append(handler.queue.get()))
+        timer.start()
+
+        handler.emit(record(logging.ERROR))
+        timer.join()
+
+        self.assertEqual(handler.queue.get_nowait().levelno, logging.ERROR)
+        self.assertEqual(LOG_RECORDS_DROPPED.total(), before)
+
+    def test_writes_errors_directly_when_the_queue_stays_full(self):
+        fallback = MagicMock(level=logging.NOTSET)
+        handler = DroppingQueueHandler(queue.Queue(1), [fallback], block_seconds=0.01)
+        handler.emit(record(logging.INFO))
+
+        summary = logging.LogRecord("root", logging.INFO, __file__, 1, "Executed 2/2 queries successfully.", (), None)
+        handler.emit(summary)
+        handler.emit(record(logging.ERROR))
+
+        self.assertEqual([call.args[0].levelno for call in fallback.handle.call_args_list], [logging.INFO, logging.ERROR])
+
+
+class TestConfigureLogging(unittest.TestCase):
+    def test_parse_levels(self):
+        self.assertEqual(parse_levels("query=WARNING, llm=debug"), {"synpg.query": logging.WARNING, "synpg.llm": logging.DEBUG})
+        with self.assertRaises(EnvironmentError):
+            parse_levels("query")
+
+    def test_writes_through_listener(self):
+        path = os.path.join(tempfile.mkdtemp(), "test.log")
+        root = logging.getLogger()
+        handlers, level = list(root.handlers), root.level
+        query_logger = logging.getLogger("synpg.query")
+        try:
+            with patch.dict(os.environ, {"LOG_FILE": path, "LOG_QUERY_SAMPLE_RATE": "0", "LOG_LEVELS": "schema=WARNING"}):
+                configure_logging()
+                configure_logging()
+                logging.info("Executed 2/2 queries successfully.")
+                query_logger.info("Executed query successfully: %s", "INSERT INTO a VALUES (1);")
+                query_logger.error("Failed to execute query: %s", "INSERT INTO a VALUES (2);")
+                shutdown_logging()
+            with open(path) as f:
+                lines = f.read().splitlines()
+        finally:
+            shutdown_logging()
+            root.handlers, root.level = handlers, level
+            query_logger.filters = []
+            logging.getLogger("synpg.schema").setLevel(logging.NOTSET)
+
+        self.assertEqual(len(lines), 2)
+        self.assertIn("Executed 2/2 queries successfully.", lines[0])
+        self.assertIn("ERROR - Failed to execute query: INSERT INTO a VALUES (2);", lines[1])
+        self.assertIsNone(logging_setup._listener)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,71 @@
+import unittest
+import urllib.request
+from src.metrics import Counter, Gauge, Histogram, MetricsRegistry, MetricsServer
+
+
+class TestMetrics(unittest.TestCase):
+    def test_counter_render(self):
+        counter = Counter("statements_total", "Statements.", ("table",))
+        counter.inc(table="orders")
+        counter.inc(2, table='we"ird')
+
+        self.assertEqual(counter.value(table="orders"), 1)
+        self.assertEqual(counter.render(), "\n".join([
+            "# HELP statements_total Statements.",
+            "# TYPE statements_total counter",
+            'statements_total{table="orders"} 1',
+            'statements_total{table="we\\"ird"} 2',
+        ]))
+
+    def test_counter_rejects_decrease_and_bad_labels(self):
+        counter = Counter("statements_total", "Statements.", ("table",))
+        with self.assertRaises(ValueError):
+            counter.inc(-1, table="orders")
+        with self.assertRaises(ValueError):
+            counter.inc(stage="execute")
+
+    def test_gauge_set(self):
+        gauge = Gauge("queue_depth", "Depth.", ("queue",))
+        gauge.set(3, queue="batches")
+        gauge.inc(-1, queue="batches")
+
+        self.assertIn('queue_depth{queue="batches"} 2', gauge.render())
+
+    def test_histogram_buckets(self):
+        histogram = Histogram("latency_seconds", "Latency.", ("stage",), buckets=(0.1, 1.0))
+        histogram.observe(0.05, stage="llm")
+        histogram.observe(0.5, stage="llm")
+        histogram.observe(5, stage="llm")
+
+        lines = histogram.render().splitlines()
+        self.assertIn('latency_seconds_bucket{stage="llm",le="0.1"} 1', lines)
+        self.assertIn('latency_seconds_bucket{stage="llm",le="1"} 2', lines)
+        self.assertIn('latency_seconds_bucket{stage="llm",le="+Inf"} 3', lines)
+        self.assertIn('latency_seconds_sum{stage="llm"} 5.55', lines)
+        self.assertIn('latency_seconds_count{stage="llm"} 3', lines)
+        self.assertEqual(histogram.count(stage="llm"), 3)
+
+    def test_registry_rejects_duplicates(self):
+        registry = MetricsRegistry()
+        registry.counter("statements_total", "Statements.")
+        with self.assertRaises(ValueError):
+            registry.gauge("statements_total", "Statements.")
+
+    def test_server_serves_metrics(self):
+        registry = MetricsRegistry()
+        registry.counter("statements_total", "Statements.").inc()
+        server = MetricsServer(registry, port=0, host="127.0.0.1")
+        server.start()
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{server.port}/metrics", timeout=5) as response:
+                body = response.read().decode("utf-8")
+                content_type = response.headers["Content-Type"]
+        finally:
+            server.stop()
+
+        self.assertIn("statements_total 1", body)
+        self.assertTrue(content_type.startswith("text/plain"))
+
+
+if __name__ == "__main__":
+    unittest.main()
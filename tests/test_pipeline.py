@@ -0,0 +1,48 @@
+import unittest
+from unittest.mock import MagicMock
+from src.pipeline import QueryPrefetcher
+
+
+class TestQueryPrefetcher(unittest.TestCase):
+    def test_prefetches_batches(self):
+        mock_gpt = MagicMock()
+        mock_gpt.generate_query_batches.return_value = [["INSERT INTO test (id) VALUES (1);"]]
+
+        prefetcher = QueryPrefetcher(mock_gpt, depth=2)
+        prefetcher.concurrency = 1
+        prefetcher.update_ddl(["CREATE TABLE test (id integer);"])
+        try:
+            batch = prefetcher.get(timeout=5)
+        finally:
+            prefetcher.stop()
+
+        self.assertEqual(batch, ["INSERT INTO test (id) VALUES (1);"])
+        mock_gpt.generate_query_batches.assert_called_with(["CREATE TABLE test (id integer);"], n=1)
+
+    def test_get_times_out(self):
+        mock_gpt = MagicMock()
+        prefetcher = QueryPrefetcher(mock_gpt, depth=1)
+        try:
+            self.assertIsNone(prefetcher.get(timeout=0.1))
+        finally:
+            prefetcher.stop()
+        mock_gpt.generate_query_batches.assert_not_called()
+
+    def test_outdated_batches_are_discarded(self):
+        prefetcher = QueryPrefetcher(MagicMock(), depth=2)
+        prefetcher.concurrency = 0
+        prefetcher.update_ddl(["CREATE TABLE old (id integer);"])
+        prefetcher.batches.put((prefetcher._signature, ["old"]))
+        prefetcher.update_ddl(["CREATE TABLE new (id integer);"])
+        prefetcher.batches.put((prefetcher._signature, ["new"]))
+        prefetcher._stop.set()
+        prefetcher._threads = [MagicMock()]
+
+        self.assertEqual(prefetcher.get(timeout=0.1), ["new"])
+
+    def test_disabled_by_default(self):
+        self.assertFalse(QueryPrefetcher(MagicMock(), depth=0).enabled)
+
+
+if __name__ == "__main__":
+    unittest.main()
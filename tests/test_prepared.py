@@ -0,0 +1,189 @@
+import unittest
+from decimal import Decimal
+from unittest.mock import call, patch, MagicMock
+from src.executor import QueryExecutor
+from src.prepared import PreparedStatementCache, bind, statement_name
+
+
+class PgError(Exception):
+    def __init__(self, message, pgcode):
+        super().__init__(message)
+        self.pgcode = pgcode
+
+
+def mock_connection():
+    conn = MagicMock()
+    cur = conn.cursor.return_value.__enter__.return_value
+    cur.mogrify.side_effect = lambda sql, params: (sql % tuple(repr(param) for param in params)).encode()
+    cur.description = None
+    return conn, cur
+
+
+class TestBind(unittest.TestCase):
+    def test_lifts_literals_into_parameters(self):
+        bound = bind("INSERT INTO orders (id, total, note, paid) VALUES (7, 12.50, 'it''s', TRUE);")
+
+        self.assertEqual(bound.text, "INSERT INTO orders (id, total, note, paid) VALUES ($1, $2, $3, $4)")
+        self.assertEqual(bound.values, [7, Decimal("12.50"), "it's", True])
+        self.assertFalse(bound.returning)
+        self.assertEqual(bind("INSERT INTO orders (id, total, note, paid) VALUES (8, 1, 'x', FALSE);").text, bound.text)
+
+    def test_returning_and_statements_without_literals(self):
+        self.assertTrue(bind("INSERT INTO orders (total) VALUES (1) RETURNING id;").returning)
+        self.assertIsNone(bind("DELETE FROM orders WHERE id = 1;"))
+
+
+class TestPreparedStatementCache(unittest.TestCase):
+    def test_prepares_once_per_connection_and_evicts_lru(self):
+        cache = PreparedStatementCache(capacity=2)
+        conn, cur = mock_connection()
+        other, other_cur = mock_connection()
+
+        name = cache.prepare(conn, cur, "INSERT INTO a (id) VALUES ($1)")
+        self.assertEqual(cache.prepare(conn, cur, "INSERT INTO a (id) VALUES ($1)"), name)
+        self.assertEqual(sum("PREPARE" in call.args[0] for call in cur.execute.call_args_list), 1)
+        cache.prepare(other, other_cur, "INSERT INTO a (id) VALUES ($1)")
+        other_cur.execute.assert_called_once()
+
+        cache.prepare(conn, cur, "INSERT INTO b (id) VALUES ($1)")
+        cache.prepare(conn, cur, "INSERT INTO c (id) VALUES ($1)")
+
+        cur.execute.assert_called_with(f"DEALLOCATE {name};")
+        self.assertEqual(cache.size(conn), 2)
+
+    def test_refused_shape_runs_as_literal_sql(self):
+        cache = PreparedStatementCache()
+        conn, cur = mock_connection()
+        cur.execute.side_effect = [PgError("could not determine data type", "42P18"), None]
+        query = "INSERT INTO a (id) VALUES (1 + 2);"
+
+        self.assertEqual(cache.render(conn, cur, query), query)
+        self.assertEqual(cache.render(conn, cur, query), query)
+        self.assertEqual(cur.execute.call_count, 2)
+
+    def test_render_binds_parameters(self):
+        cache = PreparedStatementCache()
+        conn, cur = mock_connection()
+        name = statement_name("INSERT INTO a (id, name) VALUES ($1, $2)")
+
+        rendered = cache.render(conn, cur, "INSERT INTO a (id, name) VALUES (5, 'x');")
+
+        self.assertEqual(rendered, f"EXECUTE {name} (5, 'x')")
+
+
+class TestPreparedExecution(unittest.TestCase):
+    @patch.dict("os.environ", {"PREPARED_STATEMENTS": "true"})
+    def test_statement_mode_executes_prepared_statements(self):
+        executor = QueryExecutor("statement")
+        conn, cur = mock_connection()
+        name = statement_name("INSERT INTO a (id) VALUES ($1)")
+
+        results = executor.execute(conn, ["INSERT INTO a (id) VALUES (1);", "INSERT INTO a (id) VALUES (2);"])
+
+        self.assertTrue(all(result.success for result in results))
+        self.assertEqual(results[0].query, "INSERT INTO a (id) VALUES (1);")
+        cur.execute.assert_any_call(f"EXECUTE {name} (1)")
+        cur.execute.assert_any_call(f"EXECUTE {name} (2)")
+
+    @patch.dict("os.environ", {"PREPARED_STATEMENTS": "true", "PREPARED_PAGE_SIZE": "50"})
+    @patch("src.executor.execute_batch")
+    def test_batch_mode_sends_runs_with_execute_batch(self, mock_execute_batch: MagicMock):
+        executor = QueryExecutor("batch")
+        conn, cur = mock_connection()
+        name = statement_name("INSERT INTO a (id) VALUES ($1)")
+        queries = [
+            "INSERT INTO a (id) VALUES (1);",
+            "INSERT INTO a (id) VALUES (2);",
+            "DELETE FROM a WHERE id = 1;",
+        ]
+
+        results = executor.execute(conn, queries)
+
+        self.assertEqual([result.query for result in results], queries)
+        self.assertTrue(all(result.success for result in results))
+        mock_execute_batch.assert_called_once_with(cur, f"EXECUTE {name} (%s)", [[1], [2]], page_size=50)
+        cur.execute.assert_any_call("RELEASE SAVEPOINT synpg_stmt; SAVEPOINT synpg_stmt; DELETE FROM a WHERE id = 1;")
+        conn.commit.assert_called_once()
+
+    @patch.dict("os.environ", {"PREPARED_STATEMENTS": "true"})
+    @patch("src.executor.execute_batch")
+    def test_failed_run_is_retried_one_by_one(self, mock_execute_batch: MagicMock):
+        executor = QueryExecutor("batch")
+        conn, cur = mock_connection()
+        mock_execute_batch.side_effect = PgError("prepared statement does not exist", "26000")
+        queries = ["INSERT INTO a (id) VALUES (1);", "INSERT INTO a (id) VALUES (2);"]
+
+        results = executor.execute(conn, queries)
+
+        self.assertTrue(all(result.success for result in results))
+        cur.execute.assert_any_call("ROLLBACK TO SAVEPOINT synpg_stmt;")
+        self.assertEqual(sum("PREPARE" in call.args[0] for call in cur.execute.call_args_list), 2)
+
+    @patch.dict("os.environ", {"PREPARED_STATEMENTS": "true", "PREPARED_CACHE_SIZE": "1"})
+    @patch("src.executor.execute_batch")
+    def test_next_shape_does_not_evict_the_pending_run(self, mock_execute_batch: MagicMock):
+        executor = QueryExecutor("batch")
+        conn, cur = mock_connection()
+        prepared = set()
+
+        def execute(sql, *args):
+            for statement in sql.split(";"):
+                words = statement.split()
+                if words[:1] == ["PREPARE"]:
+                    prepared.add(words[1])
+                elif words[:1] == ["DEALLOCATE"]:
+                    prepared.discard(words[1])
+
+        def run_batch(cur, template, params, page_size):
+            if template.split()[1] not in prepared:
+                raise PgError("prepared statement does not exist", "26000")
+
+        cur.execute.side_effect = execute
+        mock_execute_batch.side_effect = run_batch
+        queries = [
+            "INSERT INTO a (id) VALUES (1);",
+            "INSERT INTO a (id) VALUES (2);",
+            "INSERT INTO b (id) VALUES (3);",
+            "INSERT INTO b (id) VALUES (4);",
+            "INSERT INTO a (id) VALUES (5);",
+            "INSERT INTO a (id) VALUES (6);",
+        ]
+
+        results = executor.execute(conn, queries)
+
+        self.assertTrue(all(result.success for result in results))
+        self.assertEqual(mock_execute_batch.call_count, 3)
+        self.assertNotIn(call("ROLLBACK TO SAVEPOINT synpg_stmt;"), cur.execute.call_args_list)
+
+    @patch.dict("os.environ", {"PREPARED_STATEMENTS": "true", "EXECUTION_MODE": "batch"})
+    @patch("src.executor.execute_batch")
+    @patch("src.data_generator.GPTQueryGenerator")
+    def test_run_queries_groups_inserts_with_returning(self, MockGPTQueryGenerator: MagicMock, mock_execute_batch: MagicMock):
+        from src.data_generator import DataGenerator
+        mock_db = MagicMock()
+        mock_db.get_primary_keys.return_value = {"customers": ["id"]}
+        mock_db.get_table_columns.return_value = {"customers": [{"name": "id", "type": "integer"}, {"name": "name", "type": "text"}]}
+        mock_db.get_foreign_keys.return_value = []
+        mock_db.get_table_row_estimates.return_value = {}
+        conn, cur = mock_connection()
+        cur.fetchall.side_effect = [[(41,)], [(42,)], [(43,)]]
+        mock_db.connection = conn
+        generator = DataGenerator(mock_db)
+        name = statement_name('INSERT INTO customers (name) VALUES ($1) RETURNING "id"')
+        queries = [f"INSERT INTO customers (name) VALUES ('{letter}');" for letter in "abc"]
+
+        results = generator.run_queries(queries, False)
+
+        self.assertTrue(all(result.success for result in results))
+        self.assertEqual([result.rows for result in results], [[(41,)], [(42,)], [(43,)]])
+        self.assertEqual(sum("SAVEPOINT synpg_stmt;" in c.args[0] for c in cur.execute.call_args_list), 1)
+        cur.execute.assert_any_call(f"EXECUTE {name} (%s)", ["b"])
+        mock_execute_batch.assert_not_called()
+        self.assertIn(43, generator.get_key_pools().pool("customers"))
+
+    def test_disabled_by_default(self):
+        self.assertIsNone(QueryExecutor().prepared)
+
+
+if __name__ == "__main__":
+    unittest.main()
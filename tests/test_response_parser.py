@@ -0,0 +1,55 @@
+import unittest
+from src.response_parser import IncrementalListParser
+
+
+def feed_in_chunks(text, size):
+    parser = IncrementalListParser()
+    statements = []
+    for i in range(0, len(text), size):
+        statements.extend(parser.feed(text[i:i + size]))
+    return parser, statements
+
+
+class TestIncrementalListParser(unittest.TestCase):
+    def test_statements_complete_as_they_close(self):
+        parser = IncrementalListParser()
+
+        self.assertEqual(parser.feed("['INSERT INTO t (a) VALUES (1);', 'DEL"), ["INSERT INTO t (a) VALUES (1);"])
+        self.assertEqual(parser.feed("ETE FROM t WHERE a = 1;']"), ["DELETE FROM t WHERE a = 1;"])
+        self.assertTrue(parser.finished)
+
+    def test_chunk_boundaries_do_not_matter(self):
+        text = (
+            "```python\nsql_queries = [\n"
+            "    \"INSERT INTO t (a) VALUES ('x');\",  # a comment with 'quotes'\n"
+            "    'UPDATE t SET a = \\'y\\' WHERE id = 1;',\n"
+            "    \"\"\"DELETE FROM t WHERE a = '\"';\"\"\",\n"
+            "]\n```"
+        )
+        expected = [
+            "INSERT INTO t (a) VALUES ('x');",
+            "UPDATE t SET a = 'y' WHERE id = 1;",
+            "DELETE FROM t WHERE a = '\"';",
+        ]
+        for size in (1, 2, 3, 5, len(text)):
+            parser, statements = feed_in_chunks(text, size)
+            self.assertEqual(statements, expected, f"chunk size {size}")
+            self.assertTrue(parser.finished)
+
+    def test_truncated_tail_keeps_completed_statements(self):
+        parser, statements = feed_in_chunks("['INSERT INTO t (a) VALUES (1);', 'INSERT INTO t (a) VAL", 4)
+
+        self.assertEqual(statements, ["INSERT INTO t (a) VALUES (1);"])
+        self.assertFalse(parser.finished)
+
+    def test_text_after_list_is_ignored(self):
+        parser = IncrementalListParser()
+        self.assertEqual(parser.feed("['SELECT 1;'] and also 'not this'"), ["SELECT 1;"])
+
+    def test_nested_and_empty_values_are_skipped(self):
+        parser = IncrementalListParser()
+        self.assertEqual(parser.feed("[('nested',), '', 'SELECT 1;']"), ["SELECT 1;"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,118 @@
+import unittest
+from datetime import datetime
+from unittest.mock import MagicMock
+from src.row_generator import CsvCopyStream, RowGenerator
+
+
+def column(name, data_type, nullable=False, has_default=False, generated=False, max_length=None, precision=None, scale=None):
+    return {
+        "name": name,
+        "type": data_type,
+        "nullable": nullable,
+        "has_default": has_default,
+        "generated": generated,
+        "max_length": max_length,
+        "precision": precision,
+        "scale": scale,
+    }
+
+
+COLUMNS = {
+    "orders": [
+        column("id", "integer", has_default=True),
+        column("amount", "numeric", precision=8, scale=2),
+        column("code", "character", max_length=3),
+        column("created_at", "timestamp without time zone"),
+        column("shape", "USER-DEFINED", nullable=True),
+    ],
+    "shapes": [column("shape", "USER-DEFINED")],
+}
+
+
+class TestRowGenerator(unittest.TestCase):
+    def test_insertable_columns(self):
+        generator = RowGenerator(COLUMNS, seed=1)
+        names = [c["name"] for c in generator.insertable_columns("orders")]
+        self.assertEqual(names, ["amount", "code", "created_at"])
+        self.assertIsNone(generator.insertable_columns("shapes"))
+
+    def test_generate_batch(self):
+        generator = RowGenerator(COLUMNS, seed=1)
+        amounts, codes, created = generator.generate_batch("orders", 50)
+
+        self.assertEqual(len(amounts), 50)
+        self.assertTrue(all(len(code) <= 3 for code in codes))
+        self.assertTrue(all(float(amount) < 10 ** 6 for amount in amounts))
+        self.assertTrue(all(value[:10] in generator._days for value in created))
+
+    def test_dates_stay_inside_time_range(self):
+        generator = RowGenerator({"events": [column("day", "date")]}, seed=1)
+
+        generator.set_time_range(datetime(2024, 1, 1), datetime(2024, 1, 2))
+        days, = generator.generate_batch("events", 100)
+        self.assertEqual(set(days), {"2024-01-01"})
+
+        generator.set_time_range(datetime(2024, 1, 1, 10), datetime(2024, 1, 1, 12))
+        days, = generator.generate_batch("events", 100)
+        self.assertEqual(set(days), {"2024-01-01"})
+
+        generator.set_time_range(datetime(2024, 1, 1, 12), datetime(2024, 1, 3, 6))
+        days, = generator.generate_batch("events", 100)
+        self.assertEqual(set(days), {"2024-01-01", "2024-01-02", "2024-01-03"})
+
+    def test_csv_stream(self):
+        stream = CsvCopyStream(iter([[["1", "2"], ["a", "b,c"]]]))
+        self.assertEqual(stream.read(), '1,a\n2,"b,c"\n')
+        self.assertEqual(stream.read(), "")
+        self.assertEqual(stream.rows, 2)
+
+    def test_copy_rows(self):
+        generator = RowGenerator(COLUMNS, seed=1)
+        generator.batch_size = 4
+        mock_conn = MagicMock()
+        mock_cursor = mock_conn.cursor.return_value.__enter__.return_value
+        mock_cursor.copy_expert.side_effect = lambda sql, stream, size: [None for _ in iter(lambda: stream.read(size), "")]
+
+        loaded = generator.copy_rows(mock_conn, "orders", 10)
+
+        self.assertEqual(loaded, 10)
+        sql = mock_cursor.copy_expert.call_args[0][0]
+        self.assertEqual(sql, 'COPY "orders" ("amount", "code", "created_at") FROM STDIN WITH (FORMAT csv)')
+        self.assertEqual(generator.copy_rows(mock_conn, "shapes", 10), 0)
+
+    def test_column_stats(self):
+        generator = RowGenerator(COLUMNS, seed=1)
+        generator.set_column_stats({"orders": {
+            "amount": {"null_frac": 0.0, "n_distinct": -0.5, "most_common_vals": ["9.99"], "most_common_freqs": [0.5],
+                       "histogram_bounds": ["10.00", "20.00", "100.00"]},
+            "code": {"null_frac": 0.0, "n_distinct": -1, "most_common_vals": None, "most_common_freqs": None,
+                     "histogram_bounds": ["aaa", "zzz"]},
+        }})
+
+        amounts, codes, _ = generator.generate_batch("orders", 2000)
+
+        self.assertEqual(set(generator.samplers), {("orders", "amount")})
+        common = amounts.count("9.99")
+        self.assertTrue(850 < common < 1150)
+        others = [float(amount) for amount in amounts if amount != "9.99"]
+        self.assertTrue(all(10 <= amount <= 100 for amount in others))
+        self.assertTrue(300 < sum(1 for amount in others if amount < 20) < 700)
+        self.assertNotIn("aaa", codes)
+
+    def test_text_column_stats_keep_cardinality(self):
+        columns = {"users": [column("email", "text")]}
+        bounds = [f"user{i:03d}@example.com" for i in range(101)]
+        generator = RowGenerator(columns, seed=1)
+        generator.set_column_stats({"users": {
+            "email": {"null_frac": 0.0, "n_distinct": -0.95, "most_common_vals": None, "most_common_freqs": None,
+                      "histogram_bounds": bounds, "reltuples": 100000.0},
+        }})
+
+        emails, = generator.generate_batch("users", 5000)
+
+        self.assertGreater(len(set(emails)), len(bounds))
+        self.assertGreater(len(set(emails)), 4000)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,6 +1,9 @@
+import time
 import unittest
+import threading
 from unittest.mock import patch, MagicMock
 from src.scheduler import Scheduler
+from src.throttle import AdaptiveThrottle
 
 
 class TestScheduler(unittest.TestCase):
@@ -40,16 +43,16 @@ class TestScheduler(unittest.TestCase):
     def test_start_scheduler(self, mock_getenv: MagicMock, MockBackgroundScheduler: MagicMock):
         mock_scheduler_instance = MockBackgroundScheduler.return_value
 
-        def mock_getenv_side_effect(key):
+        def mock_getenv_side_effect(key, default=None):
             if key == "SCHEDULE_CRON":
                 return "* * * * *"
             elif key == "POSTGRES_PORT":
                 return "5432"
             elif key == "OPENAI_API_KEY":
                 return "dummy_api_key"
-            elif key.startswith("POSTGRES"):
+            elif key in ("POSTGRES_HOST", "POSTGRES_USER", "POSTGRES_PASSWORD", "POSTGRES_DB"):
                 return "dummy_value"
-            return None
+            return default
 
         mock_getenv.side_effect = mock_getenv_side_effect
 
@@ -73,6 +76,67 @@ class TestScheduler(unittest.TestCase):
         scheduler.stop()
         mock_scheduler_instance.shutdown.assert_called_once()
 
+    @patch.dict("os.environ", {"LOAD_MODE": "rate", "LOAD_TARGET_RATE": "1000", "LOAD_HOLD_SECONDS": "0.2"})
+    @patch("src.scheduler.BackgroundScheduler")
+    @patch("src.scheduler.Database")
+    @patch("src.scheduler.DataGenerator")
+    def test_rate_mode(
+        self,
+        MockDataGenerator: MagicMock,
+        MockDatabase: MagicMock,
+        MockBackgroundScheduler: MagicMock,
+    ):
+        mock_data_generator = MockDataGenerator.return_value
+        mock_data_generator.run_chunk.side_effect = lambda limit: limit
+        mock_scheduler_instance = MockBackgroundScheduler.return_value
+        mock_scheduler_instance.running = False
+
+        scheduler = Scheduler()
+        scheduler.start()
+        scheduler._rate_thread.join(timeout=5)
+        scheduler.stop()
+
+        mock_scheduler_instance.add_job.assert_not_called()
+        mock_data_generator.open_session.assert_called_once()
+        mock_data_generator.close_session.assert_called_once()
+        self.assertGreater(mock_data_generator.run_chunk.call_count, 0)
+        mock_scheduler_instance.shutdown.assert_not_called()
+
+    @patch.dict("os.environ", {"LOAD_MODE": "rate", "THROTTLE_MAX_BATCH": "1", "THROTTLE_SAMPLE_SECONDS": "0.05", "THROTTLE_MAX_PAUSE_SECONDS": "60"})
+    @patch("src.scheduler.BackgroundScheduler")
+    @patch("src.scheduler.Database")
+    @patch("src.scheduler.DataGenerator")
+    def test_stop_interrupts_throttle_pause(
+        self,
+        MockDataGenerator: MagicMock,
+        MockDatabase: MagicMock,
+        MockBackgroundScheduler: MagicMock,
+    ):
+        monitor = MagicMock()
+        monitor.utilization.return_value = 2.0
+        throttle = AdaptiveThrottle(1, monitor)
+        throttle.update(MagicMock())
+        paused = threading.Event()
+
+        def run_chunk(limit):
+            paused.set()
+            throttle.wait_until_healthy(MagicMock())
+            return limit
+
+        mock_data_generator = MockDataGenerator.return_value
+        mock_data_generator.run_chunk.side_effect = run_chunk
+        mock_data_generator.interrupt.side_effect = throttle.stop
+        MockBackgroundScheduler.return_value.running = False
+
+        scheduler = Scheduler()
+        scheduler.start()
+        self.assertTrue(paused.wait(timeout=5))
+        start = time.monotonic()
+        scheduler.stop()
+
+        self.assertLess(time.monotonic() - start, 5)
+        self.assertIsNone(scheduler._rate_thread)
+
 
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
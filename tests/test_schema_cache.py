@@ -0,0 +1,54 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import MagicMock
+from src.schema_cache import SchemaCache
+
+
+class TestSchemaCache(unittest.TestCase):
+    def test_get_loads_once_per_fingerprint(self):
+        mock_db = MagicMock()
+        mock_db.get_catalog_fingerprint.return_value = "abc"
+        loader = MagicMock(return_value=["CREATE TABLE test (id integer);"])
+
+        cache = SchemaCache(path="")
+        cache.refresh(mock_db)
+        first = cache.get("ddl", loader)
+        cache.refresh(mock_db)
+        second = cache.get("ddl", loader)
+
+        self.assertEqual(first, second)
+        loader.assert_called_once()
+
+    def test_refresh_invalidates_on_fingerprint_change(self):
+        mock_db = MagicMock()
+        mock_db.get_catalog_fingerprint.side_effect = ["abc", "def"]
+        loader = MagicMock(side_effect=[["CREATE TABLE a (id integer);"], ["CREATE TABLE b (id integer);"]])
+
+        cache = SchemaCache(path="")
+        self.assertTrue(cache.refresh(mock_db))
+        cache.get("ddl", loader)
+        self.assertTrue(cache.refresh(mock_db))
+        ddl = cache.get("ddl", loader)
+
+        self.assertEqual(ddl, ["CREATE TABLE b (id integer);"])
+        self.assertEqual(loader.call_count, 2)
+
+    def test_persists_to_disk(self):
+        mock_db = MagicMock()
+        mock_db.get_catalog_fingerprint.return_value = "abc"
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "schema_cache.json")
+            cache = SchemaCache(path=path)
+            cache.refresh(mock_db)
+            cache.get("ddl", lambda: ["CREATE TABLE test (id integer);"])
+
+            reloaded = SchemaCache(path=path)
+            self.assertFalse(reloaded.refresh(mock_db))
+            loader = MagicMock()
+            self.assertEqual(reloaded.get("ddl", loader), ["CREATE TABLE test (id integer);"])
+            loader.assert_not_called()
+
+
+if __name__ == "__main__":
+    unittest.main()
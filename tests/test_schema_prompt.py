@@ -0,0 +1,82 @@
+import unittest
+from src.schema_prompt import (
+    SCHEMA_LEGEND,
+    SchemaShards,
+    abbreviate_type,
+    compact_schema,
+    estimate_tokens,
+    shard_schema,
+)
+
+
+def column(name, data_type, nullable=False, has_default=False, generated=False, max_length=None, precision=None, scale=None):
+    return {
+        "name": name, "type": data_type, "nullable": nullable, "has_default": has_default,
+        "generated": generated, "max_length": max_length, "precision": precision, "scale": scale,
+    }
+
+
+class TestSchemaPrompt(unittest.TestCase):
+    def setUp(self):
+        self.columns = {
+            "orders": [
+                column("id", "integer", has_default=True),
+                column("customer_id", "integer"),
+                column("total", "numeric", precision=10, scale=2),
+                column("created_at", "timestamp with time zone", nullable=True),
+            ],
+            "customers": [
+                column("id", "integer", has_default=True),
+                column("name", "character varying", max_length=40),
+                column("slug", "text", generated=True),
+            ],
+        }
+        self.primary_keys = {"orders": ["id"], "customers": ["id"]}
+        self.foreign_keys = [{
+            "name": "orders_customer_id_fkey", "table": "orders", "columns": ["customer_id"],
+            "ref_table": "customers", "ref_columns": ["id"],
+        }]
+
+    def test_abbreviate_type(self):
+        self.assertEqual(abbreviate_type(column("a", "timestamp without time zone")), "ts")
+        self.assertEqual(abbreviate_type(column("a", "character varying", max_length=20)), "varchar(20)")
+        self.assertEqual(abbreviate_type(column("a", "numeric", precision=12, scale=4)), "numeric(12,4)")
+        self.assertEqual(abbreviate_type(column("a", "uuid")), "uuid")
+
+    def test_compact_schema(self):
+        tables = compact_schema(self.columns, self.primary_keys, self.foreign_keys)
+
+        self.assertEqual(list(tables), ["customers", "orders"])
+        self.assertEqual(tables["customers"], "customers(id int PK=, name varchar(40), slug text~)")
+        self.assertEqual(
+            tables["orders"],
+            "orders(id int PK=, customer_id int FK>customers.id, total numeric(10,2), created_at tstz?)",
+        )
+
+    def test_estimate_tokens(self):
+        self.assertEqual(estimate_tokens(""), 0)
+        self.assertEqual(estimate_tokens("abcde"), 2)
+
+    def test_shard_schema_respects_budget(self):
+        tables = {f"t{i}": f"t{i}(" + "c int, " * 20 + "id int PK)" for i in range(6)}
+        budget = 150
+        shards = shard_schema(tables, budget, overhead=20)
+
+        self.assertGreater(len(shards), 1)
+        self.assertEqual(sum(len(shard) - 1 for shard in shards), 6)
+        for shard in shards:
+            self.assertEqual(shard[0], SCHEMA_LEGEND)
+            self.assertLessEqual(20 + sum(estimate_tokens(line) + 1 for line in shard), budget)
+
+    def test_oversized_table_gets_own_shard(self):
+        shards = shard_schema({"a": "x" * 400, "b": "b(id int)"}, budget=50, legend=None)
+        self.assertEqual(shards, [["x" * 400], ["b(id int)"]])
+
+    def test_rotation(self):
+        shards = SchemaShards([["a"], ["b"]])
+        self.assertEqual([shards.next() for _ in range(3)], [["a"], ["b"], ["a"]])
+        self.assertEqual(SchemaShards([]).next(), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,42 @@
+import signal
+import threading
+import unittest
+from unittest.mock import MagicMock
+from src.service import Service
+
+
+class TestService(unittest.TestCase):
+    def test_run_blocks_until_shutdown_and_drains(self):
+        mock_scheduler = MagicMock()
+        mock_metrics = MagicMock()
+        service = Service(mock_scheduler, mock_metrics)
+
+        threading.Timer(0.1, service.handle_signal, args=(signal.SIGTERM, None)).start()
+        exit_code = service.run()
+
+        self.assertEqual(exit_code, 0)
+        mock_scheduler.start.assert_called_once()
+        mock_scheduler.stop.assert_called_once()
+        mock_metrics.start.assert_called_once()
+        mock_metrics.stop.assert_called_once()
+
+    def test_run_reports_startup_failure(self):
+        mock_scheduler = MagicMock()
+        mock_scheduler.start.side_effect = ValueError("Invalid CRON schedule format in SCHEDULE_CRON.")
+        mock_metrics = MagicMock()
+
+        self.assertEqual(Service(mock_scheduler, mock_metrics).run(), 1)
+        mock_metrics.stop.assert_called_once()
+
+    def test_run_reports_metrics_port_in_use(self):
+        mock_scheduler = MagicMock()
+        mock_metrics = MagicMock()
+        mock_metrics.start.side_effect = OSError("Address already in use")
+
+        with self.assertLogs(level="CRITICAL"):
+            self.assertEqual(Service(mock_scheduler, mock_metrics).run(), 1)
+        mock_scheduler.start.assert_not_called()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,44 @@
+import unittest
+from src.sql_parser import lift_literals, quote_literal, statement_kind, statement_shape, target_table, tokenize
+
+
+class TestSqlParser(unittest.TestCase):
+    def test_tokenize_round_trip(self):
+        sql = "INSERT INTO \"Order\" (note) VALUES ('it''s -- not a comment'); -- trailing"
+        self.assertEqual("".join(token.text for token in tokenize(sql)), sql)
+
+    def test_statement_kind_and_target_table(self):
+        self.assertEqual(statement_kind("insert into public.customers (id) values (1);"), "INSERT")
+        self.assertEqual(target_table("insert into public.customers (id) values (1);"), "customers")
+        self.assertEqual(target_table("UPDATE ONLY orders SET qty = 1;"), "orders")
+        self.assertEqual(target_table('DELETE FROM "Order Items" WHERE id = 1;'), "Order Items")
+        self.assertEqual(statement_kind("WITH x AS (SELECT 1) DELETE FROM t;"), "DELETE")
+
+    def test_lift_insert_literals(self):
+        parts, literals = lift_literals(
+            "INSERT INTO customers (id, name, email, joined, active) "
+            "VALUES (7, 'O''Brien', 'a@b.com', '2024-01-02', TRUE);"
+        )
+        self.assertEqual([literal.type for literal in literals], ["int", "text", "email", "date", "bool"])
+        self.assertEqual(literals[1].value, "O'Brien")
+        self.assertEqual(len(parts), len(literals) + 1)
+
+    def test_lift_update_keeps_where_clause(self):
+        sql = "UPDATE orders SET status = 'shipped' WHERE id = (SELECT id FROM orders ORDER BY RANDOM() LIMIT 1);"
+        self.assertEqual(
+            statement_shape(sql),
+            "UPDATE orders SET status = ? WHERE id = (SELECT id FROM orders ORDER BY RANDOM() LIMIT 1)",
+        )
+
+    def test_subquery_literals_are_not_lifted(self):
+        _, literals = lift_literals("INSERT INTO t (a, b) VALUES ((SELECT id FROM u WHERE name = 'x' LIMIT 1), 2);")
+        self.assertEqual([literal.value for literal in literals], [2])
+
+    def test_quote_literal(self):
+        self.assertEqual(quote_literal("text", "it's"), "'it''s'")
+        self.assertEqual(quote_literal("bool", False), "FALSE")
+        self.assertEqual(quote_literal("int", 5), "5")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,85 @@
+import unittest
+from unittest.mock import MagicMock
+from src.foreign_keys import KeyPoolRegistry
+from src.target_selection import TargetSelector, sample_keys, tablesample_percent
+
+RANDOM_DELETE = "DELETE FROM events WHERE id = (SELECT id FROM events ORDER BY RANDOM() LIMIT 1);"
+
+
+class TestTargetSelector(unittest.TestCase):
+    def test_strategy_by_table_size(self):
+        selector = TargetSelector(integer_keys=["events"], mode="auto")
+        selector.small_table_rows = 1000
+        selector.refresh(lambda: {"events": 5e7, "sessions": 5e7, "countries": 200.0, "fresh": -1.0})
+
+        self.assertEqual(selector.strategy_for("events").name, "key_range")
+        self.assertEqual(selector.strategy_for("sessions").name, "tablesample")
+        self.assertEqual(selector.strategy_for("countries").name, "reservoir")
+        self.assertEqual(selector.strategy_for("fresh").name, "reservoir")
+
+    def test_refresh_is_cached(self):
+        selector = TargetSelector(mode="auto")
+        loader = MagicMock(return_value={"events": 10.0})
+        selector.refresh(loader)
+        selector.refresh(loader)
+        loader.assert_called_once()
+
+    def test_invalid_mode(self):
+        with self.assertRaises(EnvironmentError):
+            TargetSelector(mode="sorted")
+
+    def test_tablesample_percent(self):
+        self.assertEqual(tablesample_percent(None, 100), 1.0)
+        self.assertAlmostEqual(tablesample_percent(1e6, 100), 0.01)
+        self.assertEqual(tablesample_percent(10, 100), 100.0)
+
+
+class TestStrategies(unittest.TestCase):
+    def setUp(self):
+        self.mock_conn = MagicMock()
+        self.mock_cursor = self.mock_conn.cursor.return_value.__enter__.return_value
+        self.registry = KeyPoolRegistry({"events": ["id"]}, seed=1)
+
+    def test_key_range_probe(self):
+        self.registry.selector = TargetSelector(integer_keys=["events"], mode="key_range")
+        self.mock_cursor.fetchone.return_value = (10, 10)
+        queries = self.registry.rewrite(self.mock_conn, [RANDOM_DELETE])
+        self.assertEqual(
+            queries,
+            ['DELETE FROM events WHERE id = (SELECT "id" FROM "events" WHERE "id" >= 10 ORDER BY "id" LIMIT 1);'],
+        )
+
+    def test_tablesample(self):
+        self.registry.selector = TargetSelector(mode="tablesample")
+        self.registry.selector.refresh(lambda: {"events": 1e6})
+        queries = self.registry.rewrite(self.mock_conn, [RANDOM_DELETE])
+        self.assertIn('TABLESAMPLE SYSTEM (0.0100) LIMIT 1', queries[0])
+        self.assertIn('COALESCE(', queries[0])
+        self.assertIn('(SELECT "id" FROM "events" LIMIT 1))', queries[0])
+        self.mock_cursor.execute.assert_not_called()
+
+    def test_key_range_refresh_follows_selector_setting(self):
+        self.registry.selector = TargetSelector(integer_keys=["events"], mode="key_range")
+        self.registry.refresh_seconds = 0
+        self.mock_cursor.fetchone.return_value = (1, 10)
+        self.registry.rewrite(self.mock_conn, [RANDOM_DELETE])
+        self.registry.rewrite(self.mock_conn, [RANDOM_DELETE])
+        self.assertEqual(self.mock_cursor.execute.call_count, 1)
+
+        self.registry.selector.refresh_seconds = -1
+        self.registry.rewrite(self.mock_conn, [RANDOM_DELETE])
+        self.assertEqual(self.mock_cursor.execute.call_count, 2)
+
+    def test_random_keeps_subquery(self):
+        self.registry.selector = TargetSelector(mode="random")
+        self.assertEqual(self.registry.rewrite(self.mock_conn, [RANDOM_DELETE]), [RANDOM_DELETE])
+
+    def test_sample_keys_falls_back_when_tablesample_is_empty(self):
+        self.mock_cursor.fetchall.side_effect = [[], [(1,), (2,)]]
+        keys = sample_keys(self.mock_conn, "events", "id", 10, None, 1000)
+        self.assertEqual(keys, [1, 2])
+        self.assertIn("TABLESAMPLE", self.mock_cursor.execute.call_args_list[0][0][0])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,104 @@
+import os
+import json
+import tempfile
+import unittest
+from unittest.mock import MagicMock, patch
+from src.targets import Target, TargetFleet, load_targets
+
+
+def make_generator(ddl):
+    generator = MagicMock()
+    generator.mode = "gpt"
+    generator.templates = None
+    generator.schema_cache.path = None
+    generator.journal.enabled = False
+    generator.open_session.return_value = ddl
+    generator.schema_cache.get.return_value = ddl
+    generator.produce_queries.return_value = (["INSERT INTO a VALUES (1);", "INSERT INTO a VALUES (2);"], True)
+    return generator
+
+
+class TestLoadTargets(unittest.TestCase):
+    def write(self, config):
+        f = tempfile.NamedTemporaryFile("w", suffix=".json", delete=False)
+        json.dump(config, f)
+        f.close()
+        self.addCleanup(os.remove, f.name)
+        return f.name
+
+    def test_unset(self):
+        self.assertEqual(load_targets(""), [])
+
+    def test_expands_schemas(self):
+        path = self.write({"targets": [
+            {"name": "eu", "dsn": "host=eu dbname=app"},
+            {"name": "tenants", "schemas": ["a", "b"]},
+        ]})
+
+        targets = load_targets(path)
+
+        self.assertEqual(targets, [
+            Target("eu", "host=eu dbname=app", "public"),
+            Target("tenants/a", None, "a"),
+            Target("tenants/b", None, "b"),
+        ])
+
+    def test_rejects_duplicates(self):
+        path = self.write([{"name": "x"}, {"name": "x"}])
+
+        with self.assertRaises(EnvironmentError):
+            load_targets(path)
+
+
+class TestTargetFleet(unittest.TestCase):
+    @patch("src.targets.Database")
+    def test_shares_batches_between_identical_schemas(self, MockDatabase: MagicMock):
+        generators = {
+            "a": make_generator(["CREATE TABLE a (id integer);"]),
+            "b": make_generator(["CREATE TABLE a (id integer);"]),
+            "c": make_generator(["CREATE TABLE c (id integer);"]),
+        }
+        targets = [Target(name) for name in generators]
+        names = iter(generators)
+        fleet = TargetFleet(targets, generator_factory=lambda db: generators[next(names)])
+
+        fleet.generate_and_run_queries()
+        fleet.stop()
+
+        generators["a"].produce_queries.assert_called_once()
+        generators["b"].produce_queries.assert_not_called()
+        generators["c"].produce_queries.assert_called_once()
+        for generator in generators.values():
+            generator.run_queries.assert_called_once()
+            generator.close_session.assert_called_once()
+        self.assertEqual(generators["b"].run_queries.call_args[0][0], generators["a"].run_queries.call_args[0][0])
+
+    @patch("src.targets.Database")
+    def test_unreachable_target_is_skipped(self, MockDatabase: MagicMock):
+        generators = {"a": make_generator(["CREATE TABLE a (id integer);"]), "b": make_generator([])}
+        generators["b"].open_session.side_effect = ConnectionError("down")
+        names = iter(generators)
+        fleet = TargetFleet([Target(name) for name in generators], generator_factory=lambda db: generators[next(names)])
+
+        fleet.generate_and_run_queries()
+
+        generators["a"].run_queries.assert_called_once()
+        generators["b"].run_queries.assert_not_called()
+        generators["b"].close_session.assert_called_once()
+
+    @patch("src.targets.Database")
+    def test_run_chunk_splits_shared_batch(self, MockDatabase: MagicMock):
+        generators = {"a": make_generator(["CREATE TABLE a (id integer);"]), "b": make_generator(["CREATE TABLE a (id integer);"])}
+        names = iter(generators)
+        fleet = TargetFleet([Target(name) for name in generators], generator_factory=lambda db: generators[next(names)])
+        fleet.open_session()
+
+        self.assertEqual(fleet.run_chunk(1), 1)
+        self.assertEqual(fleet.run_chunk(5), 1)
+
+        generators["a"].produce_queries.assert_called_once()
+        self.assertEqual(generators["b"].run_queries.call_count, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
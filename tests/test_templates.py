@@ -0,0 +1,80 @@
+import unittest
+from src.executor import QueryResult
+from src.sql_parser import statement_shape
+from src.templates import QueryTemplate, TemplateLibrary
+
+
+class TestQueryTemplate(unittest.TestCase):
+    def test_render_keeps_shape(self):
+        query = "INSERT INTO customers (id, name, joined) VALUES (3, 'Ann 42', '2024-05-01');"
+        template = QueryTemplate.from_query(query)
+        library = TemplateLibrary(path="", seed=1)
+        rendered = template.render(library._rng)
+
+        self.assertEqual(template.param_types, ["int", "text", "date"])
+        self.assertEqual(statement_shape(rendered), statement_shape(query))
+
+    def test_select_is_not_a_template(self):
+        self.assertIsNone(QueryTemplate.from_query("SELECT 1;"))
+
+
+class TestTemplateLibrary(unittest.TestCase):
+    def test_learn_and_generate(self):
+        library = TemplateLibrary(path="", seed=1)
+        library.min_templates = 1
+        self.assertTrue(library.needs_refresh())
+
+        library.learn([
+            QueryResult("INSERT INTO t (a) VALUES (1);", True),
+            QueryResult("INSERT INTO t (a) VALUES (2);", True),
+            QueryResult("DELETE FROM t WHERE a = 1;", True),
+            QueryResult("INSERT INTO u (b) VALUES ('x');", False),
+        ])
+        self.assertEqual(len(library), 2)
+        self.assertFalse(library.needs_refresh())
+
+        queries = library.generate(20, percent_inserts=100, percent_updates=0, percent_deletes=0)
+        self.assertEqual(len(queries), 20)
+        self.assertTrue(all(query.startswith("INSERT INTO t") for query in queries))
+
+    def test_failing_templates_are_dropped(self):
+        library = TemplateLibrary(path="", seed=1)
+        library.learn([QueryResult("INSERT INTO t (a) VALUES (1);", True)])
+        for _ in range(5):
+            queries = library.generate(1)
+            library.record_results([QueryResult(queries[0], False, "boom")])
+        self.assertEqual(len(library), 0)
+
+    def test_literal_types_are_part_of_the_shape(self):
+        library = TemplateLibrary(path="", seed=1)
+        library.learn([
+            QueryResult("INSERT INTO t (a) VALUES ('a@example.com');", True),
+            QueryResult("INSERT INTO t (a) VALUES ('n/a');", True),
+            QueryResult("INSERT INTO t (a) VALUES ('2024-05-01');", True),
+        ])
+
+        self.assertEqual(len(library), 3)
+        self.assertEqual(len(library.generate(30, percent_inserts=100, percent_updates=0, percent_deletes=0)), 30)
+
+    def test_results_are_recorded_across_chunks(self):
+        library = TemplateLibrary(path="", seed=1)
+        library.learn([QueryResult("INSERT INTO t (a) VALUES (1);", True)])
+        queries = library.generate(6)
+        queries = list(dict.fromkeys(queries))
+
+        library.record_results([QueryResult(query, True) for query in queries[:2]])
+        library.record_results([QueryResult(query, False, "boom") for query in queries[2:]])
+
+        template = next(iter(library.templates.values()))
+        self.assertEqual((template.uses, template.failures), (len(queries), len(queries) - 2))
+
+    def test_schema_change_discards_templates(self):
+        library = TemplateLibrary(path="", seed=1)
+        library.bind_schema("a")
+        library.learn([QueryResult("INSERT INTO t (a) VALUES (1);", True)])
+        library.bind_schema("b")
+        self.assertEqual(len(library), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,130 @@
+import unittest
+from unittest.mock import patch, MagicMock
+from src.executor import QueryResult
+from src.throttle import AdaptiveThrottle, AimdController, HealthMonitor, HealthSample
+
+
+class FakeMonitor:
+    def __init__(self, utilizations):
+        self.utilizations = list(utilizations)
+        self.observed = []
+
+    def observe(self, results):
+        self.observed.extend(results)
+
+    def sample(self, conn):
+        return HealthSample(active=1, lock_waits=0, replicas=0, replication_lag=0.0, p95_latency=0.0)
+
+    def utilization(self, sample):
+        return self.utilizations.pop(0)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestAimdController(unittest.TestCase):
+    def test_additive_increase_multiplicative_decrease(self):
+        controller = AimdController(minimum=2, maximum=100, increase=10, decrease=0.5)
+
+        self.assertEqual(controller.value, 100)
+        self.assertEqual(controller.update(True), 50)
+        self.assertEqual(controller.update(True), 25)
+        self.assertEqual(controller.update(False), 35)
+        for _ in range(10):
+            controller.update(True)
+        self.assertEqual(controller.value, 2)
+        for _ in range(20):
+            controller.update(False)
+        self.assertEqual(controller.value, 100)
+
+
+class TestHealthMonitor(unittest.TestCase):
+    @patch.dict("os.environ", {"THROTTLE_MAX_LOCK_WAITS": "4", "THROTTLE_MAX_REPLICATION_LAG_SECONDS": "10", "THROTTLE_MAX_LATENCY_SECONDS": "0.5"})
+    def test_sample_and_utilization(self):
+        monitor = HealthMonitor()
+        conn = MagicMock()
+        cursor = conn.cursor.return_value.__enter__.return_value
+        cursor.fetchone.side_effect = [(3, 1), (1, 2.5)]
+        monitor.observe([QueryResult("SELECT 1;", True, latency=0.1), QueryResult("SELECT 1;", True, latency=0.6)])
+
+        sample = monitor.sample(conn)
+
+        self.assertEqual(sample.active, 3)
+        self.assertEqual(sample.lock_waits, 1)
+        self.assertEqual(sample.replicas, 1)
+        self.assertEqual(sample.replication_lag, 2.5)
+        self.assertGreater(sample.p95_latency, 0.5)
+        conn.rollback.assert_called_once()
+        self.assertAlmostEqual(monitor.utilization(sample), sample.p95_latency / 0.5)
+        cursor.fetchone.side_effect = [(0, 0), (0, 0.0)]
+        self.assertEqual(monitor.utilization(monitor.sample(conn)), 0.0)
+
+
+class TestAdaptiveThrottle(unittest.TestCase):
+    @patch.dict("os.environ", {"THROTTLE_MAX_BATCH": "100", "THROTTLE_BATCH_STEP": "10", "THROTTLE_SAMPLE_SECONDS": "5", "THROTTLE_CEILING": "0.8"})
+    def test_backs_off_when_over_the_ceiling(self):
+        clock = FakeClock()
+        throttle = AdaptiveThrottle(4, FakeMonitor([0.9, 0.5]), clock)
+
+        throttle.update(MagicMock())
+        self.assertEqual((throttle.batch_size, throttle.workers), (50, 2))
+        clock.now = 1
+        throttle.update(MagicMock())
+        self.assertEqual((throttle.batch_size, throttle.workers), (50, 2))
+        clock.now = 5
+        throttle.update(MagicMock())
+        self.assertEqual((throttle.batch_size, throttle.workers), (60, 3))
+
+    @patch.dict("os.environ", {"THROTTLE_MAX_BATCH": "2", "THROTTLE_SAMPLE_SECONDS": "0", "THROTTLE_MAX_PAUSE_SECONDS": "60"})
+    def test_pauses_while_saturated(self):
+        throttle = AdaptiveThrottle(1, FakeMonitor([1.5, 1.5, 1.5, 0.2]))
+        throttle.update(MagicMock())
+        throttle.update(MagicMock())
+        self.assertTrue(throttle.saturated)
+
+        throttle.wait_until_healthy(MagicMock())
+
+        self.assertFalse(throttle.saturated)
+        self.assertEqual(throttle.batch_size, 2)
+
+    @patch.dict("os.environ", {"THROTTLE_DECREASE_FACTOR": "1.5"})
+    def test_invalid_decrease_factor(self):
+        with self.assertRaises(EnvironmentError):
+            AdaptiveThrottle(1)
+
+    def test_disabled_by_default(self):
+        self.assertFalse(AdaptiveThrottle(1).enabled)
+
+
+class TestThrottledExecution(unittest.TestCase):
+    @patch.dict("os.environ", {"THROTTLE_ENABLED": "true", "THROTTLE_MAX_BATCH": "2", "THROTTLE_SAMPLE_SECONDS": "0"})
+    @patch("src.data_generator.GPTQueryGenerator")
+    def test_run_queries_in_throttled_batches(self, MockGPTQueryGenerator: MagicMock):
+        from src.data_generator import DataGenerator
+        mock_db = MagicMock()
+        generator = DataGenerator(mock_db)
+        monitor = FakeMonitor([0.1, 0.9, 0.1])
+        generator.throttle = AdaptiveThrottle(1, monitor)
+        generator.executor = MagicMock()
+        generator.executor.execute.side_effect = lambda conn, batch: [QueryResult(query, True) for query in batch]
+        generator.validator.filter = lambda conn, queries: queries
+        key_pools = MagicMock()
+        key_pools.rewrite_stream = lambda conn, queries: queries
+        generator.get_key_pools = lambda: key_pools
+
+        queries = [f"INSERT INTO test (id) VALUES ({i});" for i in range(3)]
+        results = generator.run_queries(queries, False)
+
+        self.assertEqual([result.query for result in results], queries)
+        batches = [call.args[1] for call in generator.executor.execute.call_args_list]
+        self.assertEqual(batches, [queries[:2], queries[2:]])
+        self.assertEqual(len(monitor.observed), 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,105 @@
+import unittest
+from unittest.mock import MagicMock, call
+from src.executor import QueryResult
+from src.validator import FailureCache, StatementValidator, classify_error, precheck
+
+
+class TestPrecheck(unittest.TestCase):
+    def test_accepts_single_dml(self):
+        self.assertIsNone(precheck("INSERT INTO t (a) VALUES ('x;y');"))
+        self.assertIsNone(precheck("WITH s AS (SELECT 1) DELETE FROM t WHERE id IN (SELECT * FROM s)"))
+
+    def test_rejects_other_statements(self):
+        self.assertEqual(precheck("DROP TABLE t;"), "not_dml")
+        self.assertEqual(precheck("SELECT * FROM t;"), "not_dml")
+        self.assertEqual(precheck("DELETE FROM t; DROP TABLE t;"), "multiple_statements")
+        self.assertEqual(precheck("  -- nothing\n"), "empty")
+
+
+class TestClassifyError(unittest.TestCase):
+    def test_classify(self):
+        self.assertEqual(
+            classify_error('column "nickname" of relation "customers" does not exist'),
+            ("undefined_column", "customers", "nickname"),
+        )
+        self.assertEqual(classify_error('relation "clients" does not exist'), ("undefined_table", "clients", None))
+        self.assertEqual(
+            classify_error('null value in column "status" of relation "orders" violates not-null constraint'),
+            ("not_null_violation", "orders", "status"),
+        )
+        self.assertEqual(classify_error("something else"), ("other", None, None))
+
+
+class TestFailureCache(unittest.TestCase):
+    def test_recurring_failures_block_and_hint(self):
+        cache = FailureCache(size=10, threshold=2)
+        query = "INSERT INTO customers (name, nickname) VALUES ('a', 'b');"
+        error = 'column "nickname" of relation "customers" does not exist'
+
+        cache.record(query, error)
+        self.assertIsNone(cache.blocked(query))
+        cache.record(query, error)
+
+        self.assertEqual(cache.blocked(query), ("customers", "nickname", "undefined_column"))
+        self.assertIsNone(cache.blocked("INSERT INTO customers (name) VALUES ('a');"))
+        self.assertEqual(cache.prompt_hints(), [
+            'column "nickname" of table "customers" failed 2 times recently with undefined column; avoid repeating it.'
+        ])
+
+    def test_window_is_rolling(self):
+        cache = FailureCache(size=2, threshold=2)
+        cache.record("INSERT INTO a (x) VALUES (1);", "syntax error at or near")
+        cache.record("INSERT INTO a (x) VALUES (1);", "syntax error at or near")
+        cache.record("INSERT INTO b (x) VALUES (1);", "duplicate key value violates unique constraint")
+        cache.record("INSERT INTO b (x) VALUES (1);", "duplicate key value violates unique constraint")
+
+        self.assertEqual(len(cache), 2)
+        self.assertEqual(cache.recurring(), [(("b", None, "unique_violation"), 2)])
+
+
+class TestStatementValidator(unittest.TestCase):
+    def setUp(self):
+        self.mock_conn = MagicMock()
+        self.mock_cursor = self.mock_conn.cursor.return_value.__enter__.return_value
+
+    def test_parse_mode_filters_without_database(self):
+        validator = StatementValidator("parse")
+        queries = ["INSERT INTO t (a) VALUES (1);", "TRUNCATE t;"]
+
+        self.assertEqual(list(validator.filter(self.mock_conn, queries)), ["INSERT INTO t (a) VALUES (1);"])
+        self.mock_cursor.execute.assert_not_called()
+
+    def test_explain_is_cached_per_shape(self):
+        validator = StatementValidator("explain")
+        queries = ["INSERT INTO t (a) VALUES (1);", "INSERT INTO t (a) VALUES (2);"]
+
+        self.assertEqual(list(validator.filter(self.mock_conn, queries)), queries)
+        self.assertEqual(self.mock_cursor.execute.call_args_list, [
+            call("SAVEPOINT synpg_validate; EXPLAIN INSERT INTO t (a) VALUES (1);"),
+            call("RELEASE SAVEPOINT synpg_validate;"),
+        ])
+
+    def test_explain_failure_rejects_shape(self):
+        validator = StatementValidator("explain")
+        self.mock_cursor.execute.side_effect = [Exception('column "b" of relation "t" does not exist'), None]
+        queries = ["INSERT INTO t (b) VALUES (1);", "INSERT INTO t (b) VALUES (2);"]
+
+        self.assertEqual(list(validator.filter(self.mock_conn, queries)), [])
+        self.mock_cursor.execute.assert_called_with("ROLLBACK TO SAVEPOINT synpg_validate;")
+        self.assertEqual(len(validator.failures), 1)
+
+    def test_observe_records_execution_failures(self):
+        validator = StatementValidator("off")
+        validator.observe([
+            QueryResult("INSERT INTO t (a) VALUES (1);", True),
+            QueryResult("INSERT INTO t (a) VALUES ('x');", False, 'invalid input syntax for type integer: "x"'),
+        ])
+        self.assertEqual(len(validator.failures), 1)
+
+    def test_invalid_mode(self):
+        with self.assertRaises(EnvironmentError):
+            StatementValidator("strict")
+
+
+if __name__ == "__main__":
+    unittest.main()
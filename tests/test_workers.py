@@ -0,0 +1,107 @@
+import unittest
+from unittest.mock import MagicMock
+from contextlib import contextmanager
+from src.executor import QueryResult
+from src.workers import ExecutionReport, WorkerPool, partition_by_table, percentile
+
+
+class TestPartitionByTable(unittest.TestCase):
+    def test_keeps_tables_on_one_worker(self):
+        queries = [
+            "INSERT INTO a (id) VALUES (1);",
+            "INSERT INTO b (id) VALUES (1);",
+            "UPDATE a SET name = 'x' WHERE id = 1;",
+            "DELETE FROM c WHERE id = 1;",
+            "INSERT INTO a (id) VALUES (2);",
+        ]
+        parts = partition_by_table(queries, 2)
+
+        self.assertEqual(parts, [[0, 2, 4], [1, 3]])
+
+    def test_keeps_linked_tables_on_one_worker(self):
+        queries = [
+            "INSERT INTO customers (id) VALUES (1);",
+            "INSERT INTO products (id) VALUES (1);",
+            "INSERT INTO orders (id, customer_id) VALUES (1, 1);",
+            "INSERT INTO order_items (order_id) VALUES (1);",
+        ]
+        components = {"customers": "customers", "orders": "customers", "order_items": "customers", "products": "products"}
+
+        self.assertEqual(partition_by_table(queries, 2, components), [[0, 2, 3], [1]])
+
+    def test_single_worker(self):
+        queries = ["INSERT INTO a (id) VALUES (1);", "INSERT INTO b (id) VALUES (1);"]
+        self.assertEqual(partition_by_table(queries, 1), [[0, 1]])
+
+    def test_empty_batch(self):
+        self.assertEqual(partition_by_table([], 4), [])
+
+
+class TestExecutionReport(unittest.TestCase):
+    def test_percentiles(self):
+        latencies = [i / 1000 for i in range(1, 101)]
+        report = ExecutionReport(statements=100, succeeded=100, elapsed=2.0, workers=2, latencies=latencies)
+
+        self.assertEqual(report.throughput, 50.0)
+        self.assertEqual(report.p50, 0.05)
+        self.assertEqual(report.p95, 0.095)
+        self.assertEqual(report.p99, 0.099)
+        self.assertEqual(percentile([], 99), 0.0)
+
+
+class TestWorkerPool(unittest.TestCase):
+    def test_execute_returns_results_in_input_order(self):
+        connections = []
+        mock_db = MagicMock()
+
+        @contextmanager
+        def borrow():
+            conn = MagicMock()
+            connections.append(conn)
+            yield conn
+
+        mock_db.borrow.side_effect = borrow
+        mock_executor = MagicMock()
+        mock_executor.execute.side_effect = lambda conn, queries: [
+            QueryResult(query, "fail" not in query, latency=0.01) for query in queries
+        ]
+        queries = [
+            "INSERT INTO a (id) VALUES (1);",
+            "INSERT INTO b (name) VALUES ('fail');",
+            "INSERT INTO a (id) VALUES (2);",
+        ]
+
+        pool = WorkerPool(mock_db, mock_executor, workers=2)
+        try:
+            results, report = pool.execute(queries)
+        finally:
+            pool.shutdown()
+
+        self.assertEqual([result.query for result in results], queries)
+        self.assertEqual([result.success for result in results], [True, False, True])
+        self.assertEqual(len(connections), 2)
+        self.assertEqual(report.statements, 3)
+        self.assertEqual(report.succeeded, 2)
+        self.assertEqual(report.workers, 2)
+
+    def test_worker_error_marks_its_statements_failed(self):
+        mock_db = MagicMock()
+        mock_db.borrow.side_effect = ConnectionError("pool exhausted")
+
+        pool = WorkerPool(mock_db, MagicMock(), workers=2)
+        try:
+            results, report = pool.execute(["INSERT INTO a (id) VALUES (1);"])
+        finally:
+            pool.shutdown()
+
+        self.assertFalse(results[0].success)
+        self.assertEqual(results[0].error, "pool exhausted")
+        self.assertEqual(report.succeeded, 0)
+
+    def test_invalid_worker_count(self):
+        with self.assertRaises(EnvironmentError):
+            WorkerPool(MagicMock(), MagicMock(), workers=0)
+
+
+if __name__ == "__main__":
+    unittest.main()